@@ -14,6 +14,27 @@ class Settings(BaseSettings):
     DEBUG: bool = True
     API_V1_PREFIX: str = "/api"
 
+    # Analytics engine: "mongo" (rollup aggregations) or "columnar" (in-memory NumPy columns)
+    ANALYTICS_ENGINE: str = "mongo"
+
+    # Session storage: "collection" (regular collection) or "timeseries" (MongoDB 7.0+
+    # time-series collection, see app/services/session_storage.py)
+    SESSION_STORAGE: str = "collection"
+
+    # Subtopic storage: "embedded" (nested array in the subject document) or "collection"
+    # (one document per subtopic with materialized paths, see app/services/subtopic_storage.py)
+    SUBTOPIC_STORAGE: str = "embedded"
+
+    # Analytics response cache (invalidated by write epochs, see app/services/cache.py)
+    ANALYTICS_CACHE_ENABLED: bool = True
+    ANALYTICS_CACHE_SIZE: int = 256
+
+    # Trusted reads: documents loaded from MongoDB are encoded as stored instead of
+    # being re-validated through response_model (see app/services/serialization.py)
+    FAST_SERIALIZATION: bool = True
+    # Debug: validate every document on the trusted-read path against its model
+    VALIDATE_READS: bool = False
+
     # CORS
     BACKEND_CORS_ORIGINS: List[str] = [
         "http://localhost:5173",
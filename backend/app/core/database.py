@@ -1,9 +1,19 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
+from pymongo.errors import OperationFailure
 from app.core.config import settings
 import logging
 
 logger = logging.getLogger(__name__)
 
+# Running sessions are the ones whose endTime is stored as null. Queries use this
+# exact filter so they are answered from the partial index below. Legacy sessions
+# without an endTime field get an explicit null from migrations.normalize_sessions.
+ACTIVE_SESSION_FILTER = {"endTime": {"$type": "null"}}
+
+# SESSION_STORAGE=timeseries: sessions are bucketed by startTime and grouped per
+# reference. referenceId is the metaField so documents keep their usual shape.
+SESSIONS_TIMESERIES = {"timeField": "startTime", "metaField": "referenceId", "granularity": "hours"}
+
 
 class Database:
     client: AsyncIOMotorClient = None
@@ -49,6 +59,36 @@ async def close_mongo_connection():
         logger.info("MongoDB connection closed")
 
 
+async def ensure_sessions_collection():
+    """
+    With SESSION_STORAGE=timeseries, create `sessions` as a time-series collection
+    if it does not exist yet, and refuse to start on a regular one.
+    """
+    if settings.SESSION_STORAGE != "timeseries":
+        return
+
+    cursor = await db.db.list_collections(filter={"name": "sessions"})
+    existing = await cursor.to_list(1)
+    if not existing:
+        await db.db.create_collection("sessions", timeseries=SESSIONS_TIMESERIES)
+        logger.info("Created time-series sessions collection")
+    elif existing[0].get("type") != "timeseries":
+        raise RuntimeError(
+            "SESSION_STORAGE=timeseries but sessions is a regular collection; "
+            "run python -m migrations.sessions_to_timeseries first"
+        )
+
+
+async def create_subtopic_indexes(database: AsyncIOMotorDatabase):
+    """Indexes of the subtopics collection (SUBTOPIC_STORAGE=collection)."""
+    # Node lookups and updates; subtopic ids are unique within a subject
+    await database.subtopics.create_index([("subjectId", 1), ("id", 1)], unique=True)
+    # Subtrees: one range over the materialized paths
+    await database.subtopics.create_index([("subjectId", 1), ("path", 1)])
+    # Children in sibling order
+    await database.subtopics.create_index([("subjectId", 1), ("parentId", 1), ("position", 1)])
+
+
 async def create_indexes():
     """Create database indexes for better performance."""
     logger.info("Creating database indexes...")
@@ -62,21 +102,63 @@ async def create_indexes():
     await db.db.subjects.create_index("createdAt")
     await db.db.subjects.create_index("status")
     await db.db.subjects.create_index([("tags", 1)])
+    # Cursor-paginated lists: newest first, optionally by status
+    await db.db.subjects.create_index([("createdAt", -1), ("_id", -1)])
+    await db.db.subjects.create_index([("status", 1), ("createdAt", -1), ("_id", -1)])
+    if settings.SUBTOPIC_STORAGE == "collection":
+        await create_subtopic_indexes(db.db)
 
     # Practices indexes
     await db.db.practices.create_index("createdAt")
     await db.db.practices.create_index("platform")
+    await db.db.practices.create_index([("createdAt", -1), ("_id", -1)])
 
     # Projects indexes
     await db.db.projects.create_index("createdAt")
     await db.db.projects.create_index("status")
     await db.db.projects.create_index([("tags", 1)])
+    await db.db.projects.create_index([("createdAt", -1), ("_id", -1)])
+    await db.db.projects.create_index([("status", 1), ("createdAt", -1), ("_id", -1)])
 
     # Sessions indexes
+    await ensure_sessions_collection()
     await db.db.sessions.create_index("startTime")
-    await db.db.sessions.create_index("referenceId")
-    await db.db.sessions.create_index([("type", 1), ("startTime", -1)])
     await db.db.sessions.create_index([("startTime", -1)])
+    # Equality filter first, then the startTime sort/range of the session list and analytics
+    await db.db.sessions.create_index([("referenceType", 1), ("startTime", -1)])
+    await db.db.sessions.create_index([("referenceId", 1), ("startTime", -1)])
+    await db.db.sessions.create_index([("sessionType", 1), ("startTime", -1)])
+    await db.db.sessions.create_index([("startTime", -1), ("_id", -1)])
+
+    # Only running sessions are indexed, and they all share the key endTime=null,
+    # so the index holds at most one entry: the active session lookup is a point
+    # read and a second concurrent start fails with a duplicate key error.
+    # Time-series collections have no unique indexes; session_storage checks instead.
+    if settings.SESSION_STORAGE == "timeseries":
+        await db.db.sessions.create_index([("endTime", 1)], name="active_session")
+    else:
+        try:
+            await db.db.sessions.create_index(
+                [("endTime", 1)],
+                name="active_session",
+                unique=True,
+                partialFilterExpression=ACTIVE_SESSION_FILTER
+            )
+        except OperationFailure as e:
+            logger.warning(f"Could not create the active session index (stop all but one running session): {e}")
+
+    # Session daily rollups (day-prefixed so range reads over days use the index)
+    await db.db.session_daily_rollups.create_index(
+        [("day", 1), ("referenceType", 1), ("referenceId", 1)],
+        unique=True
+    )
+    await db.db.session_daily_rollups.create_index([("referenceId", 1), ("day", 1)])
+
+    # Session-length sketches (one per month and scope)
+    await db.db.session_length_sketches.create_index(
+        [("month", 1), ("referenceType", 1), ("referenceId", 1)],
+        unique=True
+    )
 
     # Boards indexes
     await db.db.boards.create_index("order")
@@ -4,8 +4,10 @@ from contextlib import asynccontextmanager
 import logging
 
 from app.core.config import settings
-from app.core.database import connect_to_mongo, close_mongo_connection
-from app.routes import courses, subjects, practices, practice_sessions, projects, sessions, boards, settings_router, analytics, ui_customization, visions
+from app.core.database import connect_to_mongo, close_mongo_connection, db
+from app.services.columnar import load_session_columns
+from app.services.serialization import default_response_class
+from app.routes import courses, subjects, practices, practice_sessions, projects, sessions, boards, settings_router, analytics, ui_customization, visions, events
 
 # Configure logging
 logging.basicConfig(
@@ -21,6 +23,8 @@ async def lifespan(app: FastAPI):
     # Startup
     logger.info(f"Starting {settings.APP_NAME}")
     await connect_to_mongo()
+    if settings.ANALYTICS_ENGINE == "columnar":
+        await load_session_columns(db.db)
     yield
     # Shutdown
     logger.info("Shutting down application")
@@ -31,6 +35,7 @@ app = FastAPI(
     title=settings.APP_NAME,
     version="1.0.0",
     description="Time Tracker & Learning Management API",
+    default_response_class=default_response_class(),
     lifespan=lifespan
 )
 
@@ -41,6 +46,7 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor", "X-Overlapping-Sessions"],
 )
 
 # Include routers
@@ -55,6 +61,7 @@ app.include_router(settings_router.router, prefix=f"{settings.API_V1_PREFIX}/set
 app.include_router(analytics.router, prefix=f"{settings.API_V1_PREFIX}/analytics", tags=["analytics"])
 app.include_router(ui_customization.router, prefix=f"{settings.API_V1_PREFIX}/ui-customization", tags=["ui-customization"])
 app.include_router(visions.router, prefix=f"{settings.API_V1_PREFIX}/visions", tags=["visions"])
+app.include_router(events.router, prefix=f"{settings.API_V1_PREFIX}/events", tags=["events"])
 
 
 @app.get("/")
@@ -3,6 +3,8 @@ from typing import List, Optional, Any, Dict
 from pydantic import BaseModel, Field, HttpUrl
 from enum import Enum
 
+from app.models.session import RecentSession
+
 
 class ProjectStatus(str, Enum):
     ACTIVE = "active"
@@ -152,8 +154,12 @@ class Project(BaseModel):
     environmentNotes: str = ""
     setupCommands: str = ""
 
-    # Session tracking (for backup/cross-checking)
-    sessions: List[str] = []  # Array of session IDs
+    # Session aggregates, maintained on every session write
+    sessionCount: int = 0
+    totalMinutes: int = 0
+    timeSpent: float = 0.0  # Calculated from sessions (hours)
+    lastStudied: Optional[datetime] = None
+    recentSessions: List[RecentSession] = []  # Newest first, at most 10
 
     class Config:
         json_schema_extra = {
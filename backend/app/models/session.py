@@ -46,6 +46,15 @@ def generate_session_id(reference_type: str, name: str) -> str:
     return f"{prefix}{clean_name}{type_indicator}{random_num}"
 
 
+class RecentSession(BaseModel):
+    """Summary of a session kept on its subject/project (most recent few only)"""
+    id: str
+    startTime: datetime
+    endTime: Optional[datetime] = None
+    duration: int = 0  # Duration in MINUTES
+    sessionType: str = "study"
+
+
 class Session(BaseModel):
     id: Optional[str] = None
     uniqueId: Optional[str] = None  # Custom formatted ID
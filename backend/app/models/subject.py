@@ -4,6 +4,8 @@ from pydantic import BaseModel, Field, HttpUrl
 from enum import Enum
 import uuid
 
+from app.models.session import RecentSession
+
 
 class SubjectStatus(str, Enum):
     NOT_STARTED = "not_started"
@@ -68,6 +70,25 @@ class Subtopic(BaseModel):
 Subtopic.model_rebuild()
 
 
+class SubtopicNode(BaseModel):
+    """
+    A subtopic as returned by GET /subjects/{id}/subtopics: `subtopics` holds
+    only the requested levels, `childCount` the number of direct children
+    either way, and `cachedCompletion` is the node's completion (by status for leaves).
+    """
+    id: str
+    name: str
+    status: SubtopicStatus = SubtopicStatus.ACTIVE
+    completedDate: Optional[datetime] = None
+    cachedCompletion: float = 0.0
+    order: int = 0
+    childCount: int = 0
+    subtopics: List['SubtopicNode'] = []
+
+
+SubtopicNode.model_rebuild()
+
+
 class KnowledgeBaseLink(BaseModel):
     label: str
     url: str
@@ -177,9 +198,12 @@ class Subject(BaseModel):
     completionPercentage: float = 0.0  # Overall completion percentage (0-100)
     completedSubtopicsCount: int = 0  # Total checked subtopics (all levels)
     totalSubtopicsCount: int = 0  # Total subtopics (all levels)
+    # Session aggregates, maintained on every session write
+    sessionCount: int = 0
+    totalMinutes: int = 0
     timeSpent: float = 0.0  # Calculated from sessions (hours)
     lastStudied: Optional[datetime] = None
-    sessions: List[str] = []  # Array of session IDs for backup/cross-checking
+    recentSessions: List[RecentSession] = []  # Newest first, at most 10
 
     class Config:
         json_schema_extra = {
@@ -1,81 +1,69 @@
-from fastapi import APIRouter, Depends, Query
-from datetime import datetime, timedelta
-from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Query
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional
+import asyncio
 
+from app.core.config import settings
 from app.core.database import get_database
+from app.services import columnar
+from app.services.cache import analytics_cache, cached_response
+from app.services.rollups import ROLLUPS_COLLECTION, day_key
+from app.services.sketches import SKETCHES_COLLECTION, merge_sketches, months_ago, sketch_summary
+from app.services.streaks import get_streak_state, rebuild_streaks, streaks_response
+from app.services.subtopic_storage import subtopic_collection_enabled
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 
+# Rollup referenceType -> breakdown section
+BREAKDOWN_SECTIONS = {
+    "subject": "subjects",
+    "project": "projects",
+    "practice_platform": "practices",
+    "practice": "practices",
+}
 
-@router.get("/time-summary")
-async def get_time_summary(
-    period: str = Query("week", regex="^(day|week|month)$"),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """
-    Get time summary for a specific period.
-    Period can be: day, week, month
-    """
-    now = datetime.utcnow()
+# Rollup referenceType -> distribution bucket
+DISTRIBUTION_BUCKETS = {
+    "subject": "subject",
+    "project": "project",
+    "practice_platform": "practice",
+    "practice": "practice",
+}
+
+DAILY_ACTIVITY_SORT = [("day", 1), ("referenceType", 1), ("referenceId", 1)]
+
+# Calendar days per /heatmap page
+HEATMAP_PAGE_DAYS = 366
+HEATMAP_MAX_PAGE_DAYS = 1000
+
+
+def period_start(period: str, now: Optional[datetime] = None) -> datetime:
+    """Start of the current day, week or month."""
+    now = now or datetime.utcnow()
     today_start = now.replace(hour=0, minute=0, second=0, microsecond=0)
 
     if period == "day":
-        start_date = today_start
+        return today_start
     elif period == "week":
-        start_date = today_start - timedelta(days=today_start.weekday())
+        return today_start - timedelta(days=today_start.weekday())
     else:  # month
-        start_date = today_start.replace(day=1)
+        return today_start.replace(day=1)
 
-    # Aggregate total time
-    pipeline = [
-        {"$match": {"startTime": {"$gte": start_date}}},
-        {"$group": {
-            "_id": None,
-            "totalDuration": {"$sum": "$duration"},
-            "sessionCount": {"$sum": 1}
-        }}
-    ]
-
-    result = await db.sessions.aggregate(pipeline).to_list(1)
-
-    if result:
-        return {
-            "period": period,
-            "startDate": start_date.isoformat(),
-            "totalDuration": result[0]["totalDuration"],
-            "totalHours": round(result[0]["totalDuration"] / 3600, 2),
-            "sessionCount": result[0]["sessionCount"]
-        }
 
+def time_summary_payload(period: str, start_date: datetime, total_duration: int, session_count: int) -> dict:
+    """Format the /time-summary response."""
     return {
         "period": period,
         "startDate": start_date.isoformat(),
-        "totalDuration": 0,
-        "totalHours": 0.0,
-        "sessionCount": 0
+        "totalDuration": total_duration,
+        "totalHours": round(total_duration / 3600, 2),
+        "sessionCount": session_count
     }
 
 
-@router.get("/distribution")
-async def get_time_distribution(
-    days: int = Query(30, ge=1, le=365),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """Get time distribution by type (subject vs project vs practice) over specified days."""
-    start_date = datetime.utcnow() - timedelta(days=days)
-
-    pipeline = [
-        {"$match": {"startTime": {"$gte": start_date}}},
-        {"$group": {
-            "_id": "$type",
-            "totalDuration": {"$sum": "$duration"},
-            "sessionCount": {"$sum": 1}
-        }}
-    ]
-
-    results = await db.sessions.aggregate(pipeline).to_list(10)
-
+def distribution_payload(days: int, results: Iterable[dict]) -> dict:
+    """Format the /distribution response from per-referenceType totals."""
     distribution = {
         "subject": {"duration": 0, "hours": 0.0, "count": 0},
         "project": {"duration": 0, "hours": 0.0, "count": 0},
@@ -83,16 +71,12 @@ async def get_time_distribution(
     }
 
     for item in results:
-        session_type = item["_id"]
-        # Backward compatibility: treat "course" as "subject"
-        if session_type == "course":
-            session_type = "subject"
-        if session_type in distribution:
-            distribution[session_type] = {
-                "duration": item["totalDuration"],
-                "hours": round(item["totalDuration"] / 3600, 2),
-                "count": item["sessionCount"]
-            }
+        session_type = DISTRIBUTION_BUCKETS.get(item["_id"])
+        if session_type:
+            bucket = distribution[session_type]
+            bucket["duration"] += item["totalDuration"]
+            bucket["hours"] = round(bucket["duration"] / 3600, 2)
+            bucket["count"] += item["sessionCount"]
 
     return {
         "days": days,
@@ -100,121 +84,14 @@ async def get_time_distribution(
     }
 
 
-@router.get("/streaks")
-async def calculate_streaks(db: AsyncIOMotorDatabase = Depends(get_database)):
-    """Calculate current learning streak (consecutive days with sessions)."""
-    # Get all unique dates with sessions, sorted descending
-    pipeline = [
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$startTime"
-                    }
-                }
-            }
-        },
-        {"$sort": {"_id": -1}}
-    ]
-
-    dates = await db.sessions.aggregate(pipeline).to_list(365)
-
-    if not dates:
-        return {
-            "currentStreak": 0,
-            "longestStreak": 0,
-            "lastActivityDate": None
-        }
-
-    # Convert to datetime objects
-    activity_dates = [
-        datetime.strptime(d["_id"], "%Y-%m-%d").date()
-        for d in dates
-    ]
-
-    today = datetime.utcnow().date()
-    yesterday = today - timedelta(days=1)
-
-    # Calculate current streak
-    current_streak = 0
-    if activity_dates[0] == today or activity_dates[0] == yesterday:
-        current_streak = 1
-        check_date = activity_dates[0] - timedelta(days=1)
-
-        for date in activity_dates[1:]:
-            if date == check_date:
-                current_streak += 1
-                check_date -= timedelta(days=1)
-            else:
-                break
-
-    # Calculate longest streak
-    longest_streak = 0
-    temp_streak = 1
-
-    for i in range(1, len(activity_dates)):
-        if (activity_dates[i-1] - activity_dates[i]).days == 1:
-            temp_streak += 1
-            longest_streak = max(longest_streak, temp_streak)
-        else:
-            temp_streak = 1
-
-    longest_streak = max(longest_streak, temp_streak) if activity_dates else 0
-
-    return {
-        "currentStreak": current_streak,
-        "longestStreak": longest_streak,
-        "lastActivityDate": activity_dates[0].isoformat() if activity_dates else None
-    }
-
-
-@router.get("/progress")
-async def get_overall_progress(db: AsyncIOMotorDatabase = Depends(get_database)):
-    """Get overall progress metrics."""
-    # Count subjects by status
-    subject_pipeline = [
-        {"$group": {
-            "_id": "$status",
-            "count": {"$sum": 1}
-        }}
-    ]
-
-    # Count projects by status
-    project_pipeline = [
-        {"$group": {
-            "_id": "$status",
-            "count": {"$sum": 1}
-        }}
-    ]
-
-    # Total time logged
-    time_pipeline = [
-        {"$group": {
-            "_id": None,
-            "totalDuration": {"$sum": "$duration"}
-        }}
-    ]
-
-    subjects = await db.subjects.aggregate(subject_pipeline).to_list(10)
-    projects = await db.projects.aggregate(project_pipeline).to_list(10)
-    time_result = await db.sessions.aggregate(time_pipeline).to_list(1)
-
-    # Count completed subtopics
-    completed_subtopics_pipeline = [
-        {"$unwind": "$subtopics"},
-        {"$match": {"subtopics.completed": True}},
-        {"$count": "total"}
-    ]
-
-    total_subtopics_pipeline = [
-        {"$unwind": "$subtopics"},
-        {"$count": "total"}
-    ]
-
-    completed_subtopics = await db.subjects.aggregate(completed_subtopics_pipeline).to_list(1)
-    total_subtopics = await db.subjects.aggregate(total_subtopics_pipeline).to_list(1)
-
+def progress_payload(
+    subjects: List[dict],
+    projects: List[dict],
+    total_duration: int,
+    completed_subtopics: int,
+    total_subtopics: int
+) -> dict:
+    """Format the /progress response from status counts and totals."""
     # Format subject stats
     subject_stats = {
         "not_started": 0,
@@ -238,14 +115,253 @@ async def get_overall_progress(db: AsyncIOMotorDatabase = Depends(get_database))
     return {
         "subjectsByStatus": subject_stats,
         "projectsByStatus": project_stats,
-        "totalTimeLogged": time_result[0]["totalDuration"] if time_result else 0,
-        "totalHoursLogged": round((time_result[0]["totalDuration"] if time_result else 0) / 3600, 2),
-        "completedSubtopics": completed_subtopics[0]["total"] if completed_subtopics else 0,
-        "totalSubtopics": total_subtopics[0]["total"] if total_subtopics else 0
+        "totalTimeLogged": total_duration,
+        "totalHoursLogged": round(total_duration / 3600, 2),
+        "completedSubtopics": completed_subtopics,
+        "totalSubtopics": total_subtopics
+    }
+
+
+def activity_days(rows: Iterable[dict], breakdown: bool = True) -> List[dict]:
+    """
+    Group rollup rows (sorted by day) into per-day activity entries.
+    Each row becomes a breakdown entry unless `breakdown` is False.
+    """
+    activity = []
+    for row in rows:
+        if not activity or activity[-1]["date"] != row["day"]:
+            activity.append({
+                "date": row["day"],
+                "duration": 0,  # in minutes
+                "totalSeconds": 0,  # for backward compatibility
+                "hours": 0.0,
+                "sessionCount": 0,
+                **({"breakdown": []} if breakdown else {})
+            })
+        day = activity[-1]
+        day["duration"] += row["duration"]
+        day["sessionCount"] += row["sessionCount"]
+        if not breakdown:
+            continue
+        day["breakdown"].append({
+            "referenceType": row["referenceType"],
+            "referenceId": row["referenceId"],
+            "name": row.get("name", "Unknown"),
+            "duration": row["duration"],
+            "hours": round(row["duration"] / 60, 2),  # duration is in minutes
+            "sessionCount": row["sessionCount"]
+        })
+
+    for day in activity:
+        day["totalSeconds"] = day["duration"] * 60
+        day["hours"] = round(day["duration"] / 60, 2)
+
+    return activity
+
+
+def daily_activity_payload(days: int, rows: Iterable[dict]) -> dict:
+    """Format the /daily-activity response from rollup documents sorted by day."""
+    return {
+        "days": days,
+        "activity": activity_days(rows)
+    }
+
+
+def _percentage(part: int, total: int) -> float:
+    return round(part / total * 100, 1) if total > 0 else 0.0
+
+
+def breakdown_payload(period: Optional[str], start_day: str, end_day: str, rows: Iterable[dict]) -> dict:
+    """Format the /breakdown response from per-reference totals sorted by duration."""
+    rows = list(rows)
+    total = sum(row["duration"] for row in rows)
+
+    sections = {section: [] for section in ("subjects", "projects", "practices")}
+    for row in rows:
+        section = BREAKDOWN_SECTIONS.get(row["_id"]["referenceType"])
+        if not section:
+            continue
+        sections[section].append({
+            "id": row["_id"]["referenceId"],
+            "name": row.get("name") or "Unknown",
+            "duration": row["duration"],  # in minutes
+            "hours": round(row["duration"] / 60, 2),
+            "sessionCount": row["sessionCount"],
+            "percentage": _percentage(row["duration"], total)
+        })
+
+    by_category = {}
+    for section, items in sections.items():
+        section_total = sum(item["duration"] for item in items)
+        by_category[section] = section_total
+        by_category[f"{section}Hours"] = round(section_total / 60, 2)
+        by_category[f"{section}Percentage"] = _percentage(section_total, total)
+
+    return {
+        "period": period,
+        "startDate": start_day,
+        "endDate": end_day,
+        "total": total,  # in minutes
+        "totalHours": round(total / 60, 2),
+        **sections,
+        "byCategory": by_category
+    }
+
+
+# Collections each endpoint reads (derived session data is versioned under "sessions")
+SESSION_DATA = ("sessions",)
+DASHBOARD_DATA = ("sessions", "subjects", "projects")
+
+
+# Subject-side progress counters, shared by /progress and /snapshot
+SUBJECT_PROGRESS_FACET = {
+    "$facet": {
+        "byStatus": [
+            {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+        ],
+        "completedSubtopics": [
+            {"$unwind": "$subtopics"},
+            {"$match": {"subtopics.completed": True}},
+            {"$count": "total"}
+        ],
+        "totalSubtopics": [
+            {"$unwind": "$subtopics"},
+            {"$count": "total"}
+        ]
+    }
+}
+
+# SUBTOPIC_STORAGE=collection: subject documents carry no subtopics, so the
+# totals come from the counters that subtopic writes keep on each subject
+STORED_SUBJECT_PROGRESS_FACET = {
+    "$facet": {
+        "byStatus": SUBJECT_PROGRESS_FACET["$facet"]["byStatus"],
+        "completedSubtopics": [
+            {"$group": {"_id": None, "total": {"$sum": "$completedSubtopicsCount"}}}
+        ],
+        "totalSubtopics": [
+            {"$group": {"_id": None, "total": {"$sum": "$totalSubtopicsCount"}}}
+        ]
     }
+}
+
+PROJECT_STATUS_PIPELINE = [
+    {"$group": {"_id": "$status", "count": {"$sum": 1}}}
+]
+
+TOTAL_DURATION_GROUP = {"$group": {"_id": None, "totalDuration": {"$sum": "$duration"}}}
+
+
+def subject_progress_facet() -> dict:
+    return STORED_SUBJECT_PROGRESS_FACET if subtopic_collection_enabled() else SUBJECT_PROGRESS_FACET
+
+
+def columnar_engine() -> Optional[columnar.ColumnarSessionStore]:
+    """The in-memory columnar store, when it is enabled and loaded."""
+    if settings.ANALYTICS_ENGINE == "columnar":
+        return columnar.session_columns
+    return None
+
+
+def _first_value(rows: List[dict], field: str) -> int:
+    return rows[0][field] if rows else 0
+
+
+@router.get("/time-summary")
+@cached_response(*SESSION_DATA)
+async def get_time_summary(
+    period: str = Query("week", regex="^(day|week|month)$"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Get time summary for a specific period.
+    Period can be: day, week, month
+    """
+    start_date = period_start(period)
+
+    engine = columnar_engine()
+    if engine is not None:
+        totals = engine.totals(day_key(start_date))
+        return time_summary_payload(period, start_date, totals["totalDuration"], totals["sessionCount"])
+
+    # Aggregate total time
+    pipeline = [
+        {"$match": {"day": {"$gte": day_key(start_date)}}},
+        {"$group": {
+            "_id": None,
+            "totalDuration": {"$sum": "$duration"},
+            "sessionCount": {"$sum": "$sessionCount"}
+        }}
+    ]
+
+    result = await db[ROLLUPS_COLLECTION].aggregate(pipeline).to_list(1)
+
+    return time_summary_payload(
+        period,
+        start_date,
+        _first_value(result, "totalDuration"),
+        _first_value(result, "sessionCount")
+    )
+
+
+@router.get("/distribution")
+@cached_response(*SESSION_DATA)
+async def get_time_distribution(
+    days: int = Query(30, ge=1, le=365),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get time distribution by type (subject vs project vs practice) over specified days."""
+    start_date = datetime.utcnow() - timedelta(days=days)
+
+    engine = columnar_engine()
+    if engine is not None:
+        return distribution_payload(days, engine.by_reference_type(day_key(start_date)))
+
+    pipeline = [
+        {"$match": {"day": {"$gte": day_key(start_date)}}},
+        {"$group": {
+            "_id": "$referenceType",
+            "totalDuration": {"$sum": "$duration"},
+            "sessionCount": {"$sum": "$sessionCount"}
+        }}
+    ]
+
+    results = await db[ROLLUPS_COLLECTION].aggregate(pipeline).to_list(10)
+    return distribution_payload(days, results)
+
+
+@router.get("/streaks")
+@cached_response(*SESSION_DATA)
+async def calculate_streaks(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Get current and longest learning streak (consecutive days with sessions)."""
+    # Maintained incrementally on session writes, so this is a single document read
+    state = await get_streak_state(db) or await rebuild_streaks(db)
+    return streaks_response(state)
+
+
+@router.get("/progress")
+@cached_response(*DASHBOARD_DATA)
+async def get_overall_progress(db: AsyncIOMotorDatabase = Depends(get_database)):
+    """Get overall progress metrics."""
+    # One query per collection, issued concurrently
+    subject_result, projects, time_result = await asyncio.gather(
+        db.subjects.aggregate([subject_progress_facet()]).to_list(1),
+        db.projects.aggregate(PROJECT_STATUS_PIPELINE).to_list(10),
+        db[ROLLUPS_COLLECTION].aggregate([TOTAL_DURATION_GROUP]).to_list(1)
+    )
+    subject_facets = subject_result[0]
+
+    return progress_payload(
+        subject_facets["byStatus"],
+        projects,
+        _first_value(time_result, "totalDuration"),
+        _first_value(subject_facets["completedSubtopics"], "total"),
+        _first_value(subject_facets["totalSubtopics"], "total")
+    )
 
 
 @router.get("/daily-activity")
+@cached_response(*SESSION_DATA)
 async def get_daily_activity(
     days: int = Query(30, ge=1, le=365),
     db: AsyncIOMotorDatabase = Depends(get_database)
@@ -253,86 +369,271 @@ async def get_daily_activity(
     """Get daily activity for calendar heatmap with breakdown by subject/project."""
     start_date = datetime.utcnow() - timedelta(days=days)
 
-    # Get total per day
-    pipeline = [
-        {"$match": {"startTime": {"$gte": start_date}}},
-        {
-            "$group": {
-                "_id": {
-                    "$dateToString": {
-                        "format": "%Y-%m-%d",
-                        "date": "$startTime"
-                    }
-                },
-                "duration": {"$sum": "$duration"},
-                "sessionCount": {"$sum": 1}
-            }
-        },
-        {"$sort": {"_id": 1}}
-    ]
+    engine = columnar_engine()
+    if engine is not None:
+        return daily_activity_payload(days, engine.daily_rows(day_key(start_date)))
 
-    results = await db.sessions.aggregate(pipeline).to_list(365)
-
-    # Get breakdown by subject/project per day
-    breakdown_pipeline = [
-        {"$match": {"startTime": {"$gte": start_date}}},
-        {
-            "$group": {
-                "_id": {
-                    "date": {
-                        "$dateToString": {
-                            "format": "%Y-%m-%d",
-                            "date": "$startTime"
-                        }
-                    },
-                    "referenceType": "$referenceType",
-                    "referenceId": "$referenceId",
-                    "name": "$name"
-                },
+    # Rollup rows are already one per (day, reference), so a range read gives both
+    # the per-day totals and the breakdown
+    rows = await db[ROLLUPS_COLLECTION].find(
+        {"day": {"$gte": day_key(start_date)}},
+        {"_id": 0}
+    ).sort(DAILY_ACTIVITY_SORT).to_list(None)
+
+    return daily_activity_payload(days, rows)
+
+
+@router.get("/heatmap")
+@cached_response(*SESSION_DATA)
+async def get_heatmap(
+    start: Optional[date] = Query(None, description="First day (inclusive); defaults to one year ago"),
+    end: Optional[date] = Query(None, description="Last day (inclusive); defaults to today"),
+    breakdown: bool = Query(False, description="Include per-reference entries for each day"),
+    cursor: Optional[date] = Query(None, description="nextCursor from the previous page"),
+    limit: int = Query(HEATMAP_PAGE_DAYS, ge=1, le=HEATMAP_MAX_PAGE_DAYS, description="Calendar days per page"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Get daily activity for any date range, one page of calendar days at a time.
+    Days without sessions are omitted. Follow nextCursor until it is null to
+    read the whole range; each page is a range scan over its own days only.
+    """
+    end = end or datetime.utcnow().date()
+    start = start or end - timedelta(days=365)
+    if start > end:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+    if cursor is not None and not start <= cursor <= end:
+        raise HTTPException(status_code=400, detail="cursor is outside the requested range")
+
+    page_start = cursor or start
+    page_end = min(page_start + timedelta(days=limit - 1), end)
+    page_range = {"$gte": day_key(page_start), "$lte": day_key(page_end)}
+
+    engine = columnar_engine()
+    if engine is not None:
+        rows = engine.daily_rows(page_range["$gte"], page_range["$lte"])
+    elif breakdown:
+        rows = await db[ROLLUPS_COLLECTION].find(
+            {"day": page_range},
+            {"_id": 0}
+        ).sort(DAILY_ACTIVITY_SORT).to_list(None)
+    else:
+        rows = await db[ROLLUPS_COLLECTION].aggregate([
+            {"$match": {"day": page_range}},
+            {"$group": {
+                "_id": "$day",
                 "duration": {"$sum": "$duration"},
-                "sessionCount": {"$sum": 1}
-            }
-        },
-        {"$sort": {"_id.date": 1}}
+                "sessionCount": {"$sum": "$sessionCount"}
+            }},
+            {"$sort": {"_id": 1}},
+            {"$project": {"_id": 0, "day": "$_id", "duration": 1, "sessionCount": 1}}
+        ]).to_list(None)
+
+    return {
+        "startDate": day_key(start),
+        "endDate": day_key(end),
+        "pageStart": page_range["$gte"],
+        "pageEnd": page_range["$lte"],
+        "breakdown": breakdown,
+        "activity": activity_days(rows, breakdown),
+        "nextCursor": day_key(page_end + timedelta(days=1)) if page_end < end else None
+    }
+
+
+@router.get("/breakdown")
+@cached_response(*SESSION_DATA)
+async def get_time_breakdown(
+    period: Optional[str] = Query("month", regex="^(day|week|month)$"),
+    start: Optional[date] = Query(None, description="First day (inclusive); overrides period"),
+    end: Optional[date] = Query(None, description="Last day (inclusive); defaults to today"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """Get per-subject, per-project and per-practice time totals for a date range."""
+    now = datetime.utcnow()
+    start_day = day_key(start) if start else day_key(period_start(period, now))
+    end_day = day_key(end) if end else day_key(now)
+    if start_day > end_day:
+        raise HTTPException(status_code=400, detail="start must not be after end")
+
+    engine = columnar_engine()
+    if engine is not None:
+        return breakdown_payload(None if start else period, start_day, end_day, engine.by_reference(start_day, end_day))
+
+    # Rows are sorted by day before grouping so $last picks the most recent name
+    pipeline = [
+        {"$match": {"day": {"$gte": start_day, "$lte": end_day}}},
+        {"$sort": {"day": 1}},
+        {"$group": {
+            "_id": {"referenceType": "$referenceType", "referenceId": "$referenceId"},
+            "name": {"$last": "$name"},
+            "duration": {"$sum": "$duration"},
+            "sessionCount": {"$sum": "$sessionCount"}
+        }},
+        {"$sort": {"duration": -1}}
     ]
 
-    breakdown_results = await db.sessions.aggregate(breakdown_pipeline).to_list(1000)
+    rows = await db[ROLLUPS_COLLECTION].aggregate(pipeline).to_list(None)
+    return breakdown_payload(None if start else period, start_day, end_day, rows)
+
 
-    # Organize breakdown by date
-    breakdown_by_date = {}
-    for item in breakdown_results:
-        date = item["_id"]["date"]
-        if date not in breakdown_by_date:
-            breakdown_by_date[date] = []
+@router.get("/session-lengths")
+@cached_response(*SESSION_DATA)
+async def get_session_lengths(
+    months: Optional[int] = Query(None, ge=1, le=120, description="Only the last N calendar months (default: all time)"),
+    reference_type: Optional[str] = Query(None, description="Filter by referenceType"),
+    reference_id: Optional[str] = Query(None, description="Filter by referenceId"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Get the distribution of session lengths (minutes): histogram and p50/p90/p99,
+    overall, per referenceType and per subject/project/practice, plus a monthly trend.
+    Read from sketches maintained on session writes, so no sessions are scanned.
+    """
+    query = {}
+    if months:
+        query["month"] = {"$gte": months_ago(months)}
+    if reference_type:
+        query["referenceType"] = reference_type
+    if reference_id:
+        query["referenceId"] = reference_id
+
+    docs = await db[SKETCHES_COLLECTION].find(query, {"_id": 0}).sort("month", 1).to_list(None)
+
+    overall, by_type, by_reference = [], {}, {}
+    for doc in docs:
+        if doc.get("referenceType") is None:
+            overall.append(doc)
+        elif doc.get("referenceId") is None:
+            by_type.setdefault(doc["referenceType"], []).append(doc)
+        else:
+            by_reference.setdefault((doc["referenceType"], doc["referenceId"]), []).append(doc)
 
-        # Handle missing fields for backward compatibility with old sessions
-        ref_type = item["_id"].get("referenceType") or item["_id"].get("type") or "unknown"
-        ref_id = item["_id"].get("referenceId", "unknown")
-        name = item["_id"].get("name", "Unknown")
+    # With a reference filter there are no overall/type-level rows to read
+    if not overall:
+        overall = [doc for group in (by_type or by_reference).values() for doc in group]
 
-        breakdown_by_date[date].append({
+    # The monthly trend covers the same sessions as `overall`, merged per month
+    by_month = {}
+    for doc in overall:
+        by_month.setdefault(doc["month"], []).append(doc)
+
+    references = []
+    for (ref_type, ref_id), group in by_reference.items():
+        references.append({
             "referenceType": ref_type,
             "referenceId": ref_id,
-            "name": name,
-            "duration": item["duration"],
-            "hours": round(item["duration"] / 60, 2),  # duration is in minutes
-            "sessionCount": item["sessionCount"]
+            "name": next((doc["name"] for doc in reversed(group) if doc.get("name")), "Unknown"),
+            **sketch_summary(merge_sketches(group))
         })
+    references.sort(key=lambda item: -item["count"])
+
+    return {
+        "months": months,
+        "overall": sketch_summary(merge_sketches(overall)),
+        "byReferenceType": {
+            ref_type: sketch_summary(merge_sketches(group)) for ref_type, group in sorted(by_type.items())
+        },
+        "byReference": references,
+        "monthly": [
+            {"month": month, **sketch_summary(merge_sketches(group), histogram=False)}
+            for month, group in sorted(by_month.items())
+        ]
+    }
+
 
-    # Combine total and breakdown
-    activity = [
-        {
-            "date": item["_id"],
-            "duration": item["duration"],  # in minutes
-            "totalSeconds": item["duration"] * 60,  # for backward compatibility
-            "hours": round(item["duration"] / 60, 2),
-            "sessionCount": item["sessionCount"],
-            "breakdown": breakdown_by_date.get(item["_id"], [])
+@router.get("/snapshot")
+@cached_response(*DASHBOARD_DATA)
+async def get_dashboard_snapshot(
+    distribution_days: int = Query(30, ge=1, le=365),
+    activity_window: int = Query(30, ge=1, le=365, alias="activity_days"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Get every dashboard widget in one request.
+    Widgets backed by the same collection share one $facet aggregation, and the
+    per-collection queries run concurrently.
+    """
+    now = datetime.utcnow()
+    starts = {period: period_start(period, now) for period in ("day", "week", "month")}
+    period_keys = {period: day_key(start) for period, start in starts.items()}
+    distribution_key = day_key(now - timedelta(days=distribution_days))
+    activity_key = day_key(now - timedelta(days=activity_window))
+
+    period_totals = {}
+    for period, key in period_keys.items():
+        in_period = {"$gte": ["$day", key]}
+        period_totals[f"{period}Duration"] = {"$sum": {"$cond": [in_period, "$duration", 0]}}
+        period_totals[f"{period}Count"] = {"$sum": {"$cond": [in_period, "$sessionCount", 0]}}
+
+    rollup_facet = {
+        "$facet": {
+            "periods": [
+                {"$match": {"day": {"$gte": min(period_keys.values())}}},
+                {"$group": {"_id": None, **period_totals}}
+            ],
+            "distribution": [
+                {"$match": {"day": {"$gte": distribution_key}}},
+                {"$group": {
+                    "_id": "$referenceType",
+                    "totalDuration": {"$sum": "$duration"},
+                    "sessionCount": {"$sum": "$sessionCount"}
+                }}
+            ],
+            "activity": [
+                {"$match": {"day": {"$gte": activity_key}}},
+                {"$sort": dict(DAILY_ACTIVITY_SORT)},
+                {"$project": {"_id": 0}}
+            ],
+            "total": [TOTAL_DURATION_GROUP]
         }
-        for item in results
-    ]
+    }
+
+    rollup_result, subject_result, projects, streak_state = await asyncio.gather(
+        db[ROLLUPS_COLLECTION].aggregate([rollup_facet], allowDiskUse=True).to_list(1),
+        db.subjects.aggregate([subject_progress_facet()]).to_list(1),
+        db.projects.aggregate(PROJECT_STATUS_PIPELINE).to_list(10),
+        get_streak_state(db)
+    )
+    if streak_state is None:
+        streak_state = await rebuild_streaks(db)
+
+    rollups = rollup_result[0]
+    subject_facets = subject_result[0]
+    periods = rollups["periods"][0] if rollups["periods"] else {}
+
+    time_summary = {
+        period: time_summary_payload(
+            period,
+            start,
+            periods.get(f"{period}Duration", 0),
+            periods.get(f"{period}Count", 0)
+        )
+        for period, start in starts.items()
+    }
 
     return {
-        "days": days,
-        "activity": activity
+        "generatedAt": now.isoformat(),
+        "timeSummary": time_summary,
+        "distribution": distribution_payload(distribution_days, rollups["distribution"]),
+        "streaks": streaks_response(streak_state, now.date()),
+        "progress": progress_payload(
+            subject_facets["byStatus"],
+            projects,
+            _first_value(rollups["total"], "totalDuration"),
+            _first_value(subject_facets["completedSubtopics"], "total"),
+            _first_value(subject_facets["totalSubtopics"], "total")
+        ),
+        "dailyActivity": daily_activity_payload(activity_window, rollups["activity"]),
+        # Same shape as /sessions/stats/summary without a reference filter
+        "sessionStats": {
+            "today": time_summary["day"]["totalDuration"],
+            "thisWeek": time_summary["week"]["totalDuration"],
+            "thisMonth": time_summary["month"]["totalDuration"]
+        }
     }
+
+
+@router.get("/cache-stats")
+async def get_cache_stats():
+    """Get analytics cache hit/miss counters and current write epochs."""
+    return analytics_cache.stats()
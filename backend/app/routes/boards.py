@@ -2,9 +2,13 @@ from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List
 from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
 
 from app.models.board import Board
 from app.core.database import get_database
+from app.services.crud import insert_document, parse_object_id, update_document
+from app.services.events import notify_write
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -94,22 +98,51 @@ async def create_board(
     board_dict["updatedAt"] = datetime.utcnow()
     board_dict["isDefault"] = False
 
-    result = await db.boards.insert_one(board_dict)
-    created_board = await db.boards.find_one({"_id": result.inserted_id})
+    created_board = await insert_document(db.boards, board_dict)
+    notify_write("boards", "created", str(created_board["_id"]))
 
     return serialize_board(created_board)
 
 
+# Registered before the /{board_id} routes, which would otherwise match "reorder"
+@router.put("/reorder")
+async def reorder_boards(
+    board_orders: List[dict],
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Reorder boards.
+    Expects: [{"id": "board_id", "order": 0}, ...]
+    """
+    operations = []
+    for item in board_orders:
+        board_id = item.get("id")
+        order = item.get("order")
+
+        if board_id and order is not None:
+            try:
+                oid = ObjectId(board_id)
+            except (InvalidId, TypeError):
+                continue
+            operations.append(UpdateOne(
+                {"_id": oid},
+                {"$set": {"order": order, "updatedAt": datetime.utcnow()}}
+            ))
+
+    if operations:
+        await db.boards.bulk_write(operations, ordered=False)
+
+    notify_write("boards", "updated")
+    return {"message": "Boards reordered successfully"}
+
+
 @router.get("/{board_id}", response_model=Board)
 async def get_board(
     board_id: str,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific board by ID."""
-    try:
-        board = await db.boards.find_one({"_id": ObjectId(board_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid board ID format")
+    board = await db.boards.find_one({"_id": parse_object_id(board_id, "board")})
 
     if not board:
         raise HTTPException(status_code=404, detail="Board not found")
@@ -124,26 +157,15 @@ async def update_board(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update an existing board."""
-    try:
-        oid = ObjectId(board_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid board ID format")
-
-    # Check if board exists
-    existing_board = await db.boards.find_one({"_id": oid})
-    if not existing_board:
-        raise HTTPException(status_code=404, detail="Board not found")
+    oid = parse_object_id(board_id, "board")
 
     # Update board
     update_dict = board_update.model_dump(exclude={"id", "createdAt", "isDefault"})
     update_dict["updatedAt"] = datetime.utcnow()
 
-    await db.boards.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
-    )
+    updated_board = await update_document(db.boards, oid, {"$set": update_dict}, "Board not found")
+    notify_write("boards", "updated", board_id)
 
-    updated_board = await db.boards.find_one({"_id": oid})
     return serialize_board(updated_board)
 
 
@@ -153,47 +175,20 @@ async def delete_board(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a custom board (cannot delete default boards)."""
-    try:
-        oid = ObjectId(board_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid board ID format")
+    oid = parse_object_id(board_id, "board")
 
-    # Check if board is default
-    board = await db.boards.find_one({"_id": oid})
-    if not board:
+    # Default boards are excluded by the filter itself
+    deleted_board = await db.boards.find_one_and_delete(
+        {"_id": oid, "isDefault": {"$ne": True}},
+        projection={"_id": 1}
+    )
+    if not deleted_board:
+        if await db.boards.count_documents({"_id": oid}, limit=1):
+            raise HTTPException(
+                status_code=400,
+                detail="Cannot delete default boards"
+            )
         raise HTTPException(status_code=404, detail="Board not found")
 
-    if board.get("isDefault"):
-        raise HTTPException(
-            status_code=400,
-            detail="Cannot delete default boards"
-        )
-
-    await db.boards.delete_one({"_id": oid})
+    notify_write("boards", "deleted", board_id)
     return None
-
-
-@router.put("/reorder")
-async def reorder_boards(
-    board_orders: List[dict],
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """
-    Reorder boards.
-    Expects: [{"id": "board_id", "order": 0}, ...]
-    """
-    for item in board_orders:
-        board_id = item.get("id")
-        order = item.get("order")
-
-        if board_id and order is not None:
-            try:
-                oid = ObjectId(board_id)
-                await db.boards.update_one(
-                    {"_id": oid},
-                    {"$set": {"order": order, "updatedAt": datetime.utcnow()}}
-                )
-            except Exception:
-                continue
-
-    return {"message": "Boards reordered successfully"}
@@ -0,0 +1,50 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator
+import asyncio
+import json
+
+from app.services.events import event_broker
+
+router = APIRouter()
+
+# Seconds between keep-alive comments on an idle stream (proxies drop silent connections)
+HEARTBEAT_SECONDS = 15
+
+# Milliseconds the browser waits before reconnecting a dropped stream
+RETRY_MILLISECONDS = 3000
+
+
+def format_event(event: dict) -> str:
+    """One server-sent event frame, named after the event type."""
+    return f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+
+
+async def _event_stream(request: Request, queue: asyncio.Queue) -> AsyncIterator[str]:
+    try:
+        yield f"retry: {RETRY_MILLISECONDS}\n\n"
+        yield format_event({"type": "ready"})
+        while not await request.is_disconnected():
+            try:
+                event = await asyncio.wait_for(queue.get(), timeout=HEARTBEAT_SECONDS)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+            yield format_event(event)
+    finally:
+        event_broker.unsubscribe(queue)
+
+
+@router.get("/")
+async def stream_events(request: Request):
+    """
+    Server-sent events: active session started/stopped and sessions, subjects,
+    projects and boards changes. Clients refresh affected data on each event
+    instead of polling; an idle stream costs no database queries.
+    """
+    queue = event_broker.subscribe()
+    return StreamingResponse(
+        _event_stream(request, queue),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, HTTPException, Depends, status
 from typing import List, Optional
 from datetime import datetime
-from bson import ObjectId
 
 from app.models.practice_session import PracticeSession, PracticeSessionCreate, PracticeSessionUpdate
 from app.core.database import get_database
+from app.services.crud import insert_document, parse_object_id, update_document
+from app.services.serialization import DocumentSerializer
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -18,6 +19,9 @@ def serialize_practice_session(session_doc: dict) -> dict:
     return session_doc
 
 
+PRACTICE_SESSION_DOCUMENTS = DocumentSerializer(PracticeSession, serialize_practice_session)
+
+
 @router.get("/", response_model=List[PracticeSession])
 async def list_practice_sessions(
     subject_id: Optional[str] = None,
@@ -29,7 +33,7 @@ async def list_practice_sessions(
         query["subjectId"] = subject_id
 
     sessions = await db.practice_sessions.find(query).sort("createdAt", -1).to_list(1000)
-    return [serialize_practice_session(session) for session in sessions]
+    return PRACTICE_SESSION_DOCUMENTS.list_response(sessions)
 
 
 @router.post("/", response_model=PracticeSession, status_code=status.HTTP_201_CREATED)
@@ -47,10 +51,9 @@ async def create_practice_session(
         duration = (session_dict["endTime"] - session_dict["startTime"]).total_seconds()
         session_dict["duration"] = int(duration)
 
-    result = await db.practice_sessions.insert_one(session_dict)
-    created_session = await db.practice_sessions.find_one({"_id": result.inserted_id})
+    created_session = await insert_document(db.practice_sessions, session_dict)
 
-    return serialize_practice_session(created_session)
+    return PRACTICE_SESSION_DOCUMENTS.response(created_session, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{session_id}", response_model=PracticeSession)
@@ -59,15 +62,12 @@ async def get_practice_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific practice session by ID."""
-    try:
-        session = await db.practice_sessions.find_one({"_id": ObjectId(session_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
+    session = await db.practice_sessions.find_one({"_id": parse_object_id(session_id, "session")})
 
     if not session:
         raise HTTPException(status_code=404, detail="Practice session not found")
 
-    return serialize_practice_session(session)
+    return PRACTICE_SESSION_DOCUMENTS.response(session)
 
 
 @router.put("/{session_id}", response_model=PracticeSession)
@@ -77,15 +77,7 @@ async def update_practice_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update an existing practice session."""
-    try:
-        oid = ObjectId(session_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    existing_session = await db.practice_sessions.find_one({"_id": oid})
-    if not existing_session:
-        raise HTTPException(status_code=404, detail="Practice session not found")
+    oid = parse_object_id(session_id, "session")
 
     # Update session
     update_dict = session_update.model_dump(exclude_unset=True, exclude={"createdAt"})
@@ -97,13 +89,10 @@ async def update_practice_session(
             duration = (update_dict["endTime"] - update_dict["startTime"]).total_seconds()
             update_dict["duration"] = int(duration)
 
-    await db.practice_sessions.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
+    updated_session = await update_document(
+        db.practice_sessions, oid, {"$set": update_dict}, "Practice session not found"
     )
-
-    updated_session = await db.practice_sessions.find_one({"_id": oid})
-    return serialize_practice_session(updated_session)
+    return PRACTICE_SESSION_DOCUMENTS.response(updated_session)
 
 
 @router.patch("/{session_id}", response_model=PracticeSession)
@@ -113,15 +102,7 @@ async def partial_update_practice_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Partially update a practice session."""
-    try:
-        oid = ObjectId(session_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    existing_session = await db.practice_sessions.find_one({"_id": oid})
-    if not existing_session:
-        raise HTTPException(status_code=404, detail="Practice session not found")
+    oid = parse_object_id(session_id, "session")
 
     if not session_update:
         raise HTTPException(status_code=400, detail="No fields to update")
@@ -132,13 +113,10 @@ async def partial_update_practice_session(
 
     session_update["updatedAt"] = datetime.utcnow()
 
-    await db.practice_sessions.update_one(
-        {"_id": oid},
-        {"$set": session_update}
+    updated_session = await update_document(
+        db.practice_sessions, oid, {"$set": session_update}, "Practice session not found"
     )
-
-    updated_session = await db.practice_sessions.find_one({"_id": oid})
-    return serialize_practice_session(updated_session)
+    return PRACTICE_SESSION_DOCUMENTS.response(updated_session)
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -147,10 +125,7 @@ async def delete_practice_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a practice session."""
-    try:
-        oid = ObjectId(session_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
+    oid = parse_object_id(session_id, "session")
 
     result = await db.practice_sessions.delete_one({"_id": oid})
 
@@ -1,11 +1,13 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from typing import List, Optional
 from datetime import datetime
-from bson import ObjectId
 from pydantic import BaseModel
 
 from app.models.practice import Practice
 from app.core.database import get_database
+from app.services.crud import insert_document, parse_object_id, update_document
+from app.services.pagination import NEXT_CURSOR_HEADER, ListView, find_page
+from app.services.serialization import DocumentSerializer
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -27,13 +29,32 @@ def serialize_practice(practice_doc: dict) -> dict:
     return practice_doc
 
 
+PRACTICE_DOCUMENTS = DocumentSerializer(Practice, serialize_practice)
+
+# Sections left out of practice lists unless requested with ?include=
+PRACTICE_LIST = ListView(Practice, {"notes": ["notes"]})
+
+
 @router.get("/", response_model=List[Practice])
 async def list_practices(
+    response: Response,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of the summary"),
+    include: Optional[str] = Query(None, description="Sections to add to the summary: notes or all"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get all practice platforms."""
-    practices = await db.practices.find({}).sort("createdAt", -1).to_list(100)
-    return [serialize_practice(practice) for practice in practices]
+    """
+    Get practice platforms, newest first, as summaries unless `fields` or
+    `include` say otherwise.
+    When more practices match, the X-Next-Cursor response header holds the cursor for the next page.
+    """
+    projection, selected = PRACTICE_LIST.select(fields, include)
+    practices, next_cursor = await find_page(db.practices, {}, limit, cursor, projection)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return PRACTICE_DOCUMENTS.list_response(practices, headers=dict(response.headers), fields=selected)
 
 
 @router.post("/", response_model=Practice, status_code=status.HTTP_201_CREATED)
@@ -46,10 +67,9 @@ async def create_practice(
     practice_dict["createdAt"] = datetime.utcnow()
     practice_dict["updatedAt"] = datetime.utcnow()
 
-    result = await db.practices.insert_one(practice_dict)
-    created_practice = await db.practices.find_one({"_id": result.inserted_id})
+    created_practice = await insert_document(db.practices, practice_dict)
 
-    return serialize_practice(created_practice)
+    return PRACTICE_DOCUMENTS.response(created_practice, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{practice_id}", response_model=Practice)
@@ -58,15 +78,12 @@ async def get_practice(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific practice platform by ID."""
-    try:
-        practice = await db.practices.find_one({"_id": ObjectId(practice_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid practice ID format")
+    practice = await db.practices.find_one({"_id": parse_object_id(practice_id, "practice")})
 
     if not practice:
         raise HTTPException(status_code=404, detail="Practice not found")
 
-    return serialize_practice(practice)
+    return PRACTICE_DOCUMENTS.response(practice)
 
 
 @router.put("/{practice_id}", response_model=Practice)
@@ -76,27 +93,14 @@ async def update_practice(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update an existing practice platform."""
-    try:
-        oid = ObjectId(practice_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid practice ID format")
-
-    # Check if practice exists
-    existing_practice = await db.practices.find_one({"_id": oid})
-    if not existing_practice:
-        raise HTTPException(status_code=404, detail="Practice not found")
+    oid = parse_object_id(practice_id, "practice")
 
     # Update practice
     update_dict = practice_update.model_dump(exclude={"id", "createdAt"})
     update_dict["updatedAt"] = datetime.utcnow()
 
-    await db.practices.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
-    )
-
-    updated_practice = await db.practices.find_one({"_id": oid})
-    return serialize_practice(updated_practice)
+    updated_practice = await update_document(db.practices, oid, {"$set": update_dict}, "Practice not found")
+    return PRACTICE_DOCUMENTS.response(updated_practice)
 
 
 @router.delete("/{practice_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -105,10 +109,7 @@ async def delete_practice(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a practice platform."""
-    try:
-        oid = ObjectId(practice_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid practice ID format")
+    oid = parse_object_id(practice_id, "practice")
 
     result = await db.practices.delete_one({"_id": oid})
 
@@ -125,18 +126,12 @@ async def update_practice_stats(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update practice platform statistics (problems solved, difficulty breakdown)."""
-    try:
-        oid = ObjectId(practice_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid practice ID format")
-
-    practice = await db.practices.find_one({"_id": oid})
-    if not practice:
-        raise HTTPException(status_code=404, detail="Practice not found")
+    oid = parse_object_id(practice_id, "practice")
 
     # Update stats
-    await db.practices.update_one(
-        {"_id": oid},
+    updated_practice = await update_document(
+        db.practices,
+        oid,
         {
             "$set": {
                 "problemsSolved": stats.problemsSolved,
@@ -145,8 +140,7 @@ async def update_practice_stats(
                 "hardCount": stats.hardCount,
                 "updatedAt": datetime.utcnow()
             }
-        }
+        },
+        "Practice not found"
     )
-
-    updated_practice = await db.practices.find_one({"_id": oid})
-    return serialize_practice(updated_practice)
+    return PRACTICE_DOCUMENTS.response(updated_practice)
@@ -1,13 +1,17 @@
-from fastapi import APIRouter, HTTPException, Depends, status
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
 from typing import List, Optional, Tuple
 from datetime import datetime
-from bson import ObjectId
 import secrets
 import httpx
 import re
 
 from app.models.project import Project, ProjectCreate, ProjectUpdate
 from app.core.database import get_database
+from app.services.crud import insert_document, parse_object_id, update_document
+from app.services.events import notify_write
+from app.services.pagination import NEXT_CURSOR_HEADER, ListView, find_page
+from app.services.reference_stats import SESSION_AGGREGATE_FIELDS
+from app.services.serialization import DocumentSerializer
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
@@ -362,18 +366,42 @@ def serialize_project(project_doc: dict) -> dict:
     return project_doc
 
 
+PROJECT_DOCUMENTS = DocumentSerializer(Project, serialize_project)
+
+# Sections left out of project lists unless requested with ?include=
+PROJECT_LIST = ListView(Project, {
+    "readme": ["readme", "githubData.readme"],
+    "notes": ["notes", "technicalNotes", "environmentNotes", "setupCommands", "blockers", "successCriteria"],
+    "github": ["githubData.issues", "githubData.commits"],
+    "recentSessions": ["recentSessions"],
+})
+
+
 @router.get("/", response_model=List[Project])
 async def list_projects(
+    response: Response,
     status_filter: str = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of the summary"),
+    include: Optional[str] = Query(None, description="Sections to add to the summary: readme, notes, github, recentSessions or all"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get all projects with optional status filter."""
+    """
+    Get projects with optional status filter, newest first, as summaries
+    unless `fields` or `include` say otherwise.
+    When more projects match, the X-Next-Cursor response header holds the cursor for the next page.
+    """
     query = {}
     if status_filter:
         query["status"] = status_filter
 
-    projects = await db.projects.find(query).sort("createdAt", -1).to_list(100)
-    return [serialize_project(project) for project in projects]
+    projection, selected = PROJECT_LIST.select(fields, include)
+    projects, next_cursor = await find_page(db.projects, query, limit, cursor, projection)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+
+    return PROJECT_DOCUMENTS.list_response(projects, headers=dict(response.headers), fields=selected)
 
 
 @router.post("/", response_model=Project, status_code=status.HTTP_201_CREATED)
@@ -387,10 +415,10 @@ async def create_project(
     project_dict["createdAt"] = datetime.utcnow()
     project_dict["updatedAt"] = datetime.utcnow()
 
-    result = await db.projects.insert_one(project_dict)
-    created_project = await db.projects.find_one({"_id": result.inserted_id})
+    created_project = await insert_document(db.projects, project_dict)
+    notify_write("projects", "created", str(created_project["_id"]))
 
-    return serialize_project(created_project)
+    return PROJECT_DOCUMENTS.response(created_project, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{project_id}", response_model=Project)
@@ -399,15 +427,12 @@ async def get_project(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific project by ID."""
-    try:
-        project = await db.projects.find_one({"_id": ObjectId(project_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid project ID format")
+    project = await db.projects.find_one({"_id": parse_object_id(project_id, "project")})
 
     if not project:
         raise HTTPException(status_code=404, detail="Project not found")
 
-    return serialize_project(project)
+    return PROJECT_DOCUMENTS.response(project)
 
 
 @router.put("/{project_id}", response_model=Project)
@@ -417,27 +442,16 @@ async def update_project(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update an existing project."""
-    try:
-        oid = ObjectId(project_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid project ID format")
-
-    # Check if project exists
-    existing_project = await db.projects.find_one({"_id": oid})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    oid = parse_object_id(project_id, "project")
 
     # Update project - only update fields that are provided (not None)
     update_dict = project_update.model_dump(exclude_unset=True)
     update_dict["updatedAt"] = datetime.utcnow()
 
-    await db.projects.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
-    )
+    updated_project = await update_document(db.projects, oid, {"$set": update_dict}, "Project not found")
+    notify_write("projects", "updated", project_id)
 
-    updated_project = await db.projects.find_one({"_id": oid})
-    return serialize_project(updated_project)
+    return PROJECT_DOCUMENTS.response(updated_project)
 
 
 @router.patch("/{project_id}", response_model=Project)
@@ -447,27 +461,20 @@ async def partial_update_project(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Partially update specific fields of a project."""
-    try:
-        oid = ObjectId(project_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid project ID format")
-
-    # Check if project exists
-    existing_project = await db.projects.find_one({"_id": oid})
-    if not existing_project:
-        raise HTTPException(status_code=404, detail="Project not found")
+    oid = parse_object_id(project_id, "project")
+
+    # Session aggregates are maintained by session writes
+    for field in SESSION_AGGREGATE_FIELDS:
+        updates.pop(field, None)
 
     # Add updatedAt timestamp
     updates["updatedAt"] = datetime.utcnow()
 
     # Update only the provided fields
-    await db.projects.update_one(
-        {"_id": oid},
-        {"$set": updates}
-    )
+    updated_project = await update_document(db.projects, oid, {"$set": updates}, "Project not found")
+    notify_write("projects", "updated", project_id)
 
-    updated_project = await db.projects.find_one({"_id": oid})
-    return serialize_project(updated_project)
+    return PROJECT_DOCUMENTS.response(updated_project)
 
 
 @router.delete("/{project_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -476,16 +483,14 @@ async def delete_project(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a project."""
-    try:
-        oid = ObjectId(project_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid project ID format")
+    oid = parse_object_id(project_id, "project")
 
     result = await db.projects.delete_one({"_id": oid})
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Project not found")
 
+    notify_write("projects", "deleted", project_id)
     return None
 
 
@@ -498,10 +503,7 @@ async def sync_github_data(
     Sync GitHub data for a project.
     Fetches repository info, commits, README, and languages from GitHub API.
     """
-    try:
-        oid = ObjectId(project_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid project ID format")
+    oid = parse_object_id(project_id, "project")
 
     project = await db.projects.find_one({"_id": oid})
     if not project:
@@ -525,8 +527,9 @@ async def sync_github_data(
     github_data = await fetch_github_data(owner, repo, github_token if github_token else None)
 
     # Update project with GitHub data
-    await db.projects.update_one(
-        {"_id": oid},
+    updated_project = await update_document(
+        db.projects,
+        oid,
         {
             "$set": {
                 "githubData.stars": github_data["stars"],
@@ -542,8 +545,9 @@ async def sync_github_data(
                 "githubData.readme": github_data["readme"],
                 "updatedAt": datetime.utcnow()
             }
-        }
+        },
+        "Project not found"
     )
+    notify_write("projects", "updated", project_id)
 
-    updated_project = await db.projects.find_one({"_id": oid})
-    return serialize_project(updated_project)
+    return PROJECT_DOCUMENTS.response(updated_project)
@@ -1,14 +1,32 @@
-from fastapi import APIRouter, HTTPException, Depends, status, Query
-from typing import List, Optional
+from fastapi import APIRouter, HTTPException, Depends, status, Query, Response, UploadFile, File
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator, List, Optional
 from datetime import datetime, timedelta
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+import csv
+import io
+import json
 
 from app.models.session import Session, generate_session_id
-from app.core.database import get_database
+from app.core.database import ACTIVE_SESSION_FILTER, get_database
+from app.services.cache import cached_response
+from app.services.crud import as_stored, parse_object_id
+from app.services.pagination import NEXT_CURSOR_HEADER, decode_cursor, encode_cursor
+from app.services.rollups import ROLLUPS_COLLECTION, day_key
+from app.services.serialization import DocumentSerializer
+from app.services.session_import import IMPORT_FORMATS, detect_format, parse_rows, prepare_sessions
+from app.services.session_overlaps import find_mergeable_groups, find_overlapping_sessions, merge_group, merge_summary
+from app.services.session_storage import (
+    delete_session_document, insert_session_document, merge_session_documents, update_session_document
+)
+from app.services.session_sync import sync_session_changes, sync_session_write
 from motor.motor_asyncio import AsyncIOMotorDatabase
 
 router = APIRouter()
 
+ALREADY_RUNNING = "Another session is already running; stop it first"
+
 
 def serialize_session(session_doc: dict) -> dict:
     """Convert MongoDB document to Session model."""
@@ -16,44 +34,36 @@ def serialize_session(session_doc: dict) -> dict:
         session_doc["id"] = str(session_doc["_id"])
         del session_doc["_id"]
 
-    # Backwards compatibility: handle old 'type' field
-    if "type" in session_doc and "referenceType" not in session_doc:
-        session_doc["referenceType"] = session_doc["type"]
+    return session_doc
 
-    # Default sessionType if not present
-    if "sessionType" not in session_doc:
-        session_doc["sessionType"] = "study"
 
-    # Ensure date field exists
-    if "date" not in session_doc and "startTime" in session_doc:
-        session_doc["date"] = session_doc["startTime"]
+SESSION_DOCUMENTS = DocumentSerializer(Session, serialize_session)
 
-    # Default name if not present
-    if "name" not in session_doc:
-        session_doc["name"] = "Unknown"
 
-    return session_doc
+# Newest first; _id breaks ties between sessions that started at the same instant
+SESSION_LIST_SORT = [("startTime", -1), ("_id", -1)]
 
+# Comma-separated IDs of existing sessions a created/updated session overlaps
+OVERLAP_HEADER = "X-Overlapping-Sessions"
 
-@router.get("/", response_model=List[Session])
-async def list_sessions(
-    type_filter: Optional[str] = Query(None, description="Filter by referenceType (subject/project/practice_platform)"),
-    reference_id: Optional[str] = Query(None, description="Filter by referenceId"),
-    session_type: Optional[str] = Query(None, description="Filter by sessionType (study/practice)"),
-    start_date: Optional[datetime] = Query(None),
-    end_date: Optional[datetime] = Query(None),
-    limit: int = Query(100, le=1000),
-    db: AsyncIOMotorDatabase = Depends(get_database)
-):
-    """Get sessions with optional filters."""
+EXPORT_COLUMNS = [
+    "id", "uniqueId", "name", "referenceType", "referenceId", "sessionType",
+    "date", "startTime", "endTime", "duration", "notes", "tags", "manualEntry", "createdAt"
+]
+
+
+def build_session_query(
+    type_filter: Optional[str] = None,
+    reference_id: Optional[str] = None,
+    session_type: Optional[str] = None,
+    start_date: Optional[datetime] = None,
+    end_date: Optional[datetime] = None
+) -> dict:
+    """MongoDB filter for the session list/export query parameters."""
     query = {}
 
     if type_filter:
-        # Support both old 'type' field and new 'referenceType' field
-        query["$or"] = [
-            {"referenceType": type_filter},
-            {"type": type_filter}  # Backwards compatibility
-        ]
+        query["referenceType"] = type_filter
     if reference_id:
         query["referenceId"] = reference_id
     if session_type:
@@ -65,13 +75,124 @@ async def list_sessions(
         if end_date:
             query["startTime"]["$lte"] = end_date
 
-    sessions = await db.sessions.find(query).sort("startTime", -1).limit(limit).to_list(limit)
-    return [serialize_session(session) for session in sessions]
+    return query
+
+
+@router.get("/", response_model=List[Session])
+async def list_sessions(
+    response: Response,
+    type_filter: Optional[str] = Query(None, description="Filter by referenceType (subject/project/practice_platform)"),
+    reference_id: Optional[str] = Query(None, description="Filter by referenceId"),
+    session_type: Optional[str] = Query(None, description="Filter by sessionType (study/practice)"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Get sessions with optional filters, newest first.
+    When more sessions match, the X-Next-Cursor response header holds the cursor for the next page.
+    """
+    query = build_session_query(type_filter, reference_id, session_type, start_date, end_date)
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor, "startTime")]}
+
+    # One extra document tells us whether there is a next page
+    sessions = await db.sessions.find(query).sort(SESSION_LIST_SORT).limit(limit + 1).to_list(limit + 1)
+    if len(sessions) > limit:
+        sessions = sessions[:limit]
+        response.headers[NEXT_CURSOR_HEADER] = encode_cursor(sessions[-1], "startTime")
+
+    return SESSION_DOCUMENTS.list_response(sessions, headers=dict(response.headers))
+
+
+def _export_value(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    return value
+
+
+async def _export_ndjson(documents) -> AsyncIterator[str]:
+    async for session in documents:
+        yield json.dumps(serialize_session(session), default=_export_value) + "\n"
+
+
+async def _export_csv(documents) -> AsyncIterator[str]:
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fieldnames=EXPORT_COLUMNS, extrasaction="ignore")
+    writer.writeheader()
+
+    async for session in documents:
+        row = {key: _export_value(value) for key, value in serialize_session(session).items()}
+        row["tags"] = ";".join(row.get("tags") or [])
+        writer.writerow(row)
+        if buffer.tell() >= 64 * 1024:
+            yield buffer.getvalue()
+            buffer.seek(0)
+            buffer.truncate()
+
+    yield buffer.getvalue()
+
+
+@router.get("/export")
+async def export_sessions(
+    format: str = Query("ndjson", regex="^(ndjson|csv)$"),
+    type_filter: Optional[str] = Query(None, description="Filter by referenceType (subject/project/practice_platform)"),
+    reference_id: Optional[str] = Query(None, description="Filter by referenceId"),
+    session_type: Optional[str] = Query(None, description="Filter by sessionType (study/practice)"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Export every matching session, oldest first, as NDJSON or CSV.
+    Documents are streamed from the database cursor, so memory use does not grow with history.
+    """
+    query = build_session_query(type_filter, reference_id, session_type, start_date, end_date)
+    documents = db.sessions.find(query).sort([("startTime", 1), ("_id", 1)]).batch_size(1000)
+
+    if format == "csv":
+        body, media_type = _export_csv(documents), "text/csv"
+    else:
+        body, media_type = _export_ndjson(documents), "application/x-ndjson"
+
+    filename = f"sessions-{datetime.utcnow().strftime('%Y%m%d')}.{format}"
+    return StreamingResponse(
+        body,
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
+
+async def check_overlaps(
+    db: AsyncIOMotorDatabase,
+    response: Response,
+    session_dict: dict,
+    reject: bool,
+    exclude: Optional[ObjectId] = None
+) -> None:
+    """Report sessions overlapping `session_dict` in the X-Overlapping-Sessions header, or 409 when `reject`."""
+    overlapping = await find_overlapping_sessions(db, session_dict["startTime"], session_dict.get("endTime"), exclude)
+    if not overlapping:
+        return
+
+    ids = [str(doc["_id"]) for doc in overlapping]
+    if reject:
+        raise HTTPException(
+            status_code=409,
+            detail={"message": "Session overlaps existing sessions", "overlapping": ids}
+        )
+    response.headers[OVERLAP_HEADER] = ",".join(ids)
 
 
 @router.post("/", response_model=Session, status_code=status.HTTP_201_CREATED)
 async def create_session(
     session: Session,
+    response: Response,
+    reject_overlap: bool = Query(False, description="Fail with 409 instead of reporting overlapping sessions"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Create/start a new session."""
@@ -98,44 +219,142 @@ async def create_session(
         duration_seconds = (end - start).total_seconds()
         session_dict["duration"] = int(duration_seconds / 60)  # Convert to minutes
 
-    result = await db.sessions.insert_one(session_dict)
-    created_session = await db.sessions.find_one({"_id": result.inserted_id})
+    await check_overlaps(db, response, session_dict, reject_overlap)
+
+    try:
+        created_session = await insert_session_document(db, session_dict)
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=ALREADY_RUNNING)
+    await sync_session_write(db, after=dict(created_session))
+
+    return SESSION_DOCUMENTS.response(
+        created_session,
+        status_code=status.HTTP_201_CREATED,
+        headers=dict(response.headers)
+    )
+
+
+# Sessions per insert_many / derived-data sync during a bulk import
+IMPORT_BATCH_SIZE = 5000
 
-    # Add session ID to subject/project for backup/cross-checking
-    session_id = str(result.inserted_id)
-    reference_type = session_dict.get("referenceType")
-    reference_id = session_dict.get("referenceId")
+@router.post("/bulk")
+async def import_sessions(
+    file: UploadFile = File(..., description="CSV, JSON lines or iCalendar file"),
+    format: Optional[str] = Query(None, regex="^(csv|jsonl|ics)$", description="Defaults to the file extension"),
+    reference_type: Optional[str] = Query(None, description="referenceType for rows that do not set one"),
+    reference_id: Optional[str] = Query(None, description="referenceId for rows that do not set one"),
+    name: Optional[str] = Query(None, description="Session name for rows that do not set one"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Import many finished sessions at once.
+    Valid rows are inserted even when others fail; failures are reported per row
+    (CSV/JSON lines: data row number, iCalendar: event number).
+    """
+    file_format = format or detect_format(file.filename, file.content_type)
+    if file_format not in IMPORT_FORMATS:
+        raise HTTPException(status_code=400, detail="Unknown import format; pass format=csv|jsonl|ics")
 
     try:
-        if reference_type == "subject":
-            await db.subjects.update_one(
-                {"id": reference_id},
-                {"$addToSet": {"sessions": session_id}}  # addToSet prevents duplicates
+        text = (await file.read()).decode("utf-8-sig")
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import file must be UTF-8 encoded")
+
+    defaults = {
+        field: value for field, value in
+        (("referenceType", reference_type), ("referenceId", reference_id), ("name", name))
+        if value
+    }
+    documents, errors = prepare_sessions(parse_rows(text, file_format), defaults)
+    received = len(documents) + len(errors)
+
+    inserted = 0
+    for offset in range(0, len(documents), IMPORT_BATCH_SIZE):
+        batch = documents[offset:offset + IMPORT_BATCH_SIZE]
+        session_docs = [doc for _, doc in batch]
+
+        try:
+            await db.sessions.insert_many(session_docs, ordered=False)
+            failed = set()
+        except BulkWriteError as e:
+            failed = set()
+            for error in e.details.get("writeErrors", []):
+                failed.add(error["index"])
+                errors.append({"row": batch[error["index"]][0], "error": error.get("errmsg", "Insert failed")})
+
+        # insert_many sets _id on every document it was given
+        written = [doc for index, doc in enumerate(session_docs) if index not in failed]
+        if not written:
+            continue
+        inserted += len(written)
+
+        await sync_session_changes(db, added=written)
+
+    errors.sort(key=lambda error: error["row"])
+    return {
+        "format": file_format,
+        "received": received,
+        "inserted": inserted,
+        "failed": len(errors),
+        "errors": errors
+    }
+
+
+# Merged sessions per storage write / derived-data sync, and merges listed in the response
+MERGE_BATCH_SIZE = 1000
+MERGE_REPORT_LIMIT = 100
+
+@router.post("/merge-overlaps")
+async def merge_overlapping_sessions(
+    type_filter: Optional[str] = Query(None, description="Filter by referenceType (subject/project/practice_platform)"),
+    reference_id: Optional[str] = Query(None, description="Filter by referenceId"),
+    start_date: Optional[datetime] = Query(None),
+    end_date: Optional[datetime] = Query(None),
+    gap_minutes: int = Query(0, ge=0, le=1440, description="Also merge sessions at most this many minutes apart"),
+    dry_run: bool = Query(False, description="Report the merges without writing them"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Coalesce overlapping or adjacent finished sessions of the same reference.
+    Each merged session keeps the earliest session's ID and spans the whole run;
+    the other sessions in the run are deleted.
+    """
+    query = build_session_query(type_filter, reference_id, None, start_date, end_date)
+    groups = await find_mergeable_groups(db, query, timedelta(minutes=gap_minutes))
+    merges = [(group, merge_group(group)) for group in groups]
+
+    if not dry_run:
+        for offset in range(0, len(merges), MERGE_BATCH_SIZE):
+            batch = merges[offset:offset + MERGE_BATCH_SIZE]
+            await merge_session_documents(
+                db,
+                [group[0] for group, _ in batch],
+                [merged for _, merged in batch],
+                [doc["_id"] for group, _ in batch for doc in group[1:]]
             )
-        elif reference_type == "project":
-            await db.projects.update_one(
-                {"id": reference_id},
-                {"$addToSet": {"sessions": session_id}}
+            await sync_session_changes(
+                db,
+                removed=[doc for group, _ in batch for doc in group],
+                added=[merged for _, merged in batch]
             )
-    except Exception as e:
-        # Log but don't fail the session creation
-        print(f"Warning: Failed to link session to {reference_type}: {e}")
 
-    return serialize_session(created_session)
+    return {
+        "dryRun": dry_run,
+        "groups": len(merges),
+        "removed": sum(len(group) - 1 for group, _ in merges),
+        "merges": [merge_summary(group, merged) for group, merged in merges[:MERGE_REPORT_LIMIT]]
+    }
 
 
 @router.get("/active", response_model=Optional[Session])
 async def get_active_session(db: AsyncIOMotorDatabase = Depends(get_database)):
     """Get currently active session (no endTime)."""
-    session = await db.sessions.find_one(
-        {"endTime": None},
-        sort=[("startTime", -1)]
-    )
+    session = await db.sessions.find_one(ACTIVE_SESSION_FILTER)
 
     if not session:
         return None
 
-    return serialize_session(session)
+    return SESSION_DOCUMENTS.response(session)
 
 
 @router.get("/{session_id}", response_model=Session)
@@ -144,43 +363,31 @@ async def get_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific session by ID."""
-    try:
-        session = await db.sessions.find_one({"_id": ObjectId(session_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
+    session = await db.sessions.find_one({"_id": parse_object_id(session_id, "session")})
 
     if not session:
         raise HTTPException(status_code=404, detail="Session not found")
 
-    return serialize_session(session)
+    return SESSION_DOCUMENTS.response(session)
 
 
 @router.put("/{session_id}", response_model=Session)
 async def update_session(
     session_id: str,
     session_update: Session,
+    response: Response,
+    reject_overlap: bool = Query(False, description="Fail with 409 instead of reporting overlapping sessions"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update/stop a session."""
-    try:
-        oid = ObjectId(session_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
-
-    # Check if session exists
-    existing_session = await db.sessions.find_one({"_id": oid})
-    if not existing_session:
-        raise HTTPException(status_code=404, detail="Session not found")
+    oid = parse_object_id(session_id, "session")
 
     # Update session
     update_dict = session_update.model_dump(exclude={"id", "createdAt"})
 
-    # Generate uniqueId if not present
-    if not update_dict.get("uniqueId") and not existing_session.get("uniqueId"):
-        update_dict["uniqueId"] = generate_session_id(
-            update_dict.get("referenceType", existing_session.get("referenceType", "subject")),
-            update_dict.get("name", existing_session.get("name", "Unknown"))
-        )
+    # Keep the stored uniqueId unless a new one is given
+    if not update_dict.get("uniqueId"):
+        update_dict.pop("uniqueId", None)
 
     # Recalculate duration in MINUTES if endTime is set
     if update_dict.get("endTime") and update_dict.get("startTime"):
@@ -189,13 +396,31 @@ async def update_session(
         duration_seconds = (end - start).total_seconds()
         update_dict["duration"] = int(duration_seconds / 60)  # Convert to minutes
 
-    await db.sessions.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
-    )
+    if reject_overlap:
+        # A missing session is a 404 whatever it would overlap, and a rejected one must not be written
+        if not await db.sessions.find_one({"_id": oid}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Session not found")
+        await check_overlaps(db, response, update_dict, reject=True, exclude=oid)
+
+    # One round trip with regular storage: the document is returned as it was before the update,
+    # and the updated version is that document with the new fields applied
+    try:
+        existing_session = await update_session_document(db, oid, update_dict, "Session not found")
+    except DuplicateKeyError:
+        raise HTTPException(status_code=409, detail=ALREADY_RUNNING)
+    updated_session = as_stored({**existing_session, **update_dict})
+
+    # Generate uniqueId if neither the update nor the stored session has one
+    if not updated_session.get("uniqueId"):
+        updated_session["uniqueId"] = generate_session_id(updated_session["referenceType"], updated_session["name"])
+        await update_session_document(db, oid, {"uniqueId": updated_session["uniqueId"]}, "Session not found")
 
-    updated_session = await db.sessions.find_one({"_id": oid})
-    return serialize_session(updated_session)
+    if not reject_overlap:
+        # Only reported, so checked once the session is known to exist
+        await check_overlaps(db, response, update_dict, reject=False, exclude=oid)
+
+    await sync_session_write(db, before=existing_session, after=dict(updated_session))
+    return SESSION_DOCUMENTS.response(updated_session, headers=dict(response.headers))
 
 
 @router.delete("/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -204,56 +429,51 @@ async def delete_session(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a session."""
-    try:
-        oid = ObjectId(session_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid session ID format")
+    oid = parse_object_id(session_id, "session")
 
-    result = await db.sessions.delete_one({"_id": oid})
+    deleted_session = await delete_session_document(db, oid)
 
-    if result.deleted_count == 0:
+    if not deleted_session:
         raise HTTPException(status_code=404, detail="Session not found")
 
+    await sync_session_write(db, before=deleted_session)
     return None
 
 
 @router.get("/stats/summary")
+@cached_response("sessions")
 async def get_sessions_summary(
     reference_id: Optional[str] = Query(None),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get time statistics for sessions."""
-    match_stage = {}
-    if reference_id:
-        match_stage = {"referenceId": reference_id}
-
-    # Get today's stats
+    """Get time statistics for sessions (read from the daily rollups)."""
     today_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0)
-    today_pipeline = [
-        {"$match": {**match_stage, "startTime": {"$gte": today_start}}},
-        {"$group": {"_id": None, "totalDuration": {"$sum": "$duration"}}}
-    ]
-
-    # Get this week's stats
     week_start = today_start - timedelta(days=today_start.weekday())
-    week_pipeline = [
-        {"$match": {**match_stage, "startTime": {"$gte": week_start}}},
-        {"$group": {"_id": None, "totalDuration": {"$sum": "$duration"}}}
-    ]
-
-    # Get this month's stats
     month_start = today_start.replace(day=1)
-    month_pipeline = [
-        {"$match": {**match_stage, "startTime": {"$gte": month_start}}},
-        {"$group": {"_id": None, "totalDuration": {"$sum": "$duration"}}}
+
+    today_key = day_key(today_start)
+    week_key = day_key(week_start)
+    month_key = day_key(month_start)
+
+    match_stage = {"day": {"$gte": min(week_key, month_key)}}
+    if reference_id:
+        match_stage["referenceId"] = reference_id
+
+    # Today, week and month are all suffixes of the same day range, so one pass covers them
+    pipeline = [
+        {"$match": match_stage},
+        {"$group": {
+            "_id": None,
+            "today": {"$sum": {"$cond": [{"$gte": ["$day", today_key]}, "$duration", 0]}},
+            "thisWeek": {"$sum": {"$cond": [{"$gte": ["$day", week_key]}, "$duration", 0]}},
+            "thisMonth": {"$sum": {"$cond": [{"$gte": ["$day", month_key]}, "$duration", 0]}}
+        }}
     ]
 
-    today_result = await db.sessions.aggregate(today_pipeline).to_list(1)
-    week_result = await db.sessions.aggregate(week_pipeline).to_list(1)
-    month_result = await db.sessions.aggregate(month_pipeline).to_list(1)
+    result = await db[ROLLUPS_COLLECTION].aggregate(pipeline).to_list(1)
 
     return {
-        "today": today_result[0]["totalDuration"] if today_result else 0,
-        "thisWeek": week_result[0]["totalDuration"] if week_result else 0,
-        "thisMonth": month_result[0]["totalDuration"] if month_result else 0
+        "today": result[0]["today"] if result else 0,
+        "thisWeek": result[0]["thisWeek"] if result else 0,
+        "thisMonth": result[0]["thisMonth"] if result else 0
     }
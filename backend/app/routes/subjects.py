@@ -1,12 +1,29 @@
-from fastapi import APIRouter, HTTPException, Depends, status
-from typing import List, Dict, Any
+from fastapi import APIRouter, HTTPException, Depends, Query, Response, status
+from fastapi.exceptions import RequestValidationError
+from pydantic import TypeAdapter, ValidationError
+from typing import List, Optional
 from datetime import datetime
-from bson import ObjectId
 import secrets
+from bson import ObjectId
 
-from app.models.subject import Subject, Subtopic
+from app.models.subject import Subject, Subtopic, SubtopicNode
 from app.core.database import get_database
+from app.services.crud import insert_document, parse_object_id, update_document
+from app.services.events import notify_write
+from app.services.pagination import NEXT_CURSOR_HEADER, ListView, find_page
+from app.services.reference_stats import SESSION_AGGREGATE_FIELDS
+from app.services.serialization import DocumentSerializer, dump_json, trusted_reads_enabled
+from app.services.subtopic_storage import (
+    attach_subtopic_trees, check_subtopic_ids, delete_subtopic_subtree, insert_subtopic, load_subtopic_levels,
+    load_subtopic_tree, replace_subtopic, replace_subtopic_tree, subtopic_collection_enabled,
+    toggle_stored_subtopic, with_subtopics
+)
+from app.services.subtopic_tree import (
+    cached_subtopic_completion, completion_from_children, find_subtopic_path, stored_counts_usable,
+    subtopic_array_path, subtopic_levels, subtopic_progress_fields, subtopic_tree_stats
+)
 from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
 
 router = APIRouter()
 
@@ -24,150 +41,50 @@ def serialize_subject(subject_doc: dict) -> dict:
     return subject_doc
 
 
-def calculate_subtopic_completion(subtopic: dict) -> float:
-    """
-    Calculate completion percentage for a subtopic using weighted depth algorithm.
-    Works with nested subtopic structure.
-    Returns percentage (0-100).
-    """
-    # Leaf node (no nested subtopics)
-    if not subtopic.get("subtopics") or len(subtopic["subtopics"]) == 0:
-        return 100.0 if subtopic.get("status") == "completed" else 0.0
-
-    # Parent node - calculate average of all nested subtopics
-    child_completions = []
-    for child_subtopic in subtopic["subtopics"]:
-        child_completion = calculate_subtopic_completion(child_subtopic)
-        child_completions.append(child_completion)
-
-    if not child_completions:
-        return 100.0 if subtopic.get("status") == "completed" else 0.0
-
-    average = sum(child_completions) / len(child_completions)
-    return round(average, 2)
-
-
-def count_subtopics_recursive(subtopics: List[dict]) -> tuple:
-    """
-    Recursively count total and completed subtopics.
-    Returns (total_count, completed_count)
-    """
-    total = 0
-    completed = 0
-
-    for subtopic in subtopics:
-        total += 1
-        if subtopic.get("status") == "completed":
-            completed += 1
-
-        # Recursively count nested subtopics
-        if subtopic.get("subtopics"):
-            nested_total, nested_completed = count_subtopics_recursive(subtopic["subtopics"])
-            total += nested_total
-            completed += nested_completed
-
-    return total, completed
-
-
-def get_level_stats_recursive(subtopics: List[dict], level: int = 0, stats: dict = None) -> dict:
-    """
-    Recursively calculate stats by level.
-    Returns dict with level stats.
-    """
-    if stats is None:
-        stats = {}
-
-    for subtopic in subtopics:
-        if level not in stats:
-            stats[level] = {"total": 0, "completed": 0}
-
-        stats[level]["total"] += 1
-        if subtopic.get("status") == "completed":
-            stats[level]["completed"] += 1
-
-        # Recursively process nested subtopics
-        if subtopic.get("subtopics"):
-            get_level_stats_recursive(subtopic["subtopics"], level + 1, stats)
-
-    return stats
-
-
-def calculate_subject_completion(subtopics: List[dict]) -> Dict[str, Any]:
-    """
-    Calculate overall subject completion statistics for nested structure.
-    Returns dict with completion percentage, counts, and level stats.
-    """
-    if not subtopics:
-        return {
-            "completionPercentage": 0.0,
-            "completedSubtopicsCount": 0,
-            "totalSubtopicsCount": 0,
-            "levelStats": []
-        }
-
-    # Calculate completion for each root topic
-    root_completions = []
-    for root in subtopics:
-        completion = calculate_subtopic_completion(root)
-        root_completions.append(completion)
-
-    # Overall completion = average of root topics
-    overall_completion = sum(root_completions) / len(root_completions) if root_completions else 0.0
-
-    # Count total and completed subtopics recursively
-    total_count, completed_count = count_subtopics_recursive(subtopics)
-
-    # Calculate stats by level
-    level_stats = get_level_stats_recursive(subtopics)
-    level_stats_list = [
-        {
-            "level": level,
-            "total": stats["total"],
-            "completed": stats["completed"],
-            "percentage": round((stats["completed"] / stats["total"]) * 100, 2) if stats["total"] > 0 else 0.0
-        }
-        for level, stats in sorted(level_stats.items())
-    ]
-
-    return {
-        "completionPercentage": round(overall_completion, 2),
-        "completedSubtopicsCount": completed_count,
-        "totalSubtopicsCount": total_count,
-        "levelStats": level_stats_list
-    }
+SUBJECT_DOCUMENTS = DocumentSerializer(Subject, serialize_subject)
 
+# PATCH bodies are plain dicts; their subtopics are validated with this
+SUBTOPIC_LIST = TypeAdapter(List[Subtopic])
 
-def update_subtopic_cached_completions(subtopics: List[dict]) -> List[dict]:
-    """
-    Recursively update cachedCompletion for all subtopics in nested structure.
-    Returns updated subtopics list.
-    """
-    updated_subtopics = []
-    for subtopic in subtopics:
-        updated_subtopic = subtopic.copy()
-        updated_subtopic["cachedCompletion"] = calculate_subtopic_completion(subtopic)
-
-        # Recursively update nested subtopics
-        if subtopic.get("subtopics"):
-            updated_subtopic["subtopics"] = update_subtopic_cached_completions(subtopic["subtopics"])
+# Re-reads of a subject whose subtopics changed between reading and writing them
+SUBTOPIC_WRITE_ATTEMPTS = 3
 
-        updated_subtopics.append(updated_subtopic)
-
-    return updated_subtopics
+# Sections left out of subject lists unless requested with ?include=
+SUBJECT_LIST = ListView(Subject, {
+    "subtopics": ["subtopics"],
+    "notes": ["notes"],
+    "resources": ["knowledgeBaseLinks", "resourceLinks"],
+    "recentSessions": ["recentSessions"],
+})
 
 
 @router.get("/", response_model=List[Subject])
 async def list_subjects(
+    response: Response,
     status_filter: str = None,
+    fields: Optional[str] = Query(None, description="Comma-separated fields to return instead of the summary"),
+    include: Optional[str] = Query(None, description="Sections to add to the summary: subtopics, notes, resources, recentSessions or all"),
+    limit: int = Query(100, ge=1, le=1000),
+    cursor: Optional[str] = Query(None, description="X-Next-Cursor header from the previous page"),
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Get all subjects with optional status filter."""
+    """
+    Get subjects with optional status filter, newest first, as summaries
+    unless `fields` or `include` say otherwise.
+    When more subjects match, the X-Next-Cursor response header holds the cursor for the next page.
+    """
     query = {}
     if status_filter:
         query["status"] = status_filter
 
-    subjects = await db.subjects.find(query).sort("createdAt", -1).to_list(100)
-    return [serialize_subject(subject) for subject in subjects]
+    projection, selected = SUBJECT_LIST.select(fields, include)
+    subjects, next_cursor = await find_page(db.subjects, query, limit, cursor, projection)
+    if next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = next_cursor
+    if subtopic_collection_enabled() and (selected is None or "subtopics" in selected):
+        await attach_subtopic_trees(db, subjects)
+
+    return SUBJECT_DOCUMENTS.list_response(subjects, headers=dict(response.headers), fields=selected)
 
 
 @router.post("/", response_model=Subject, status_code=status.HTTP_201_CREATED)
@@ -180,11 +97,21 @@ async def create_subject(
     subject_dict["subjectId"] = generate_subject_id()  # Generate custom ID
     subject_dict["createdAt"] = datetime.utcnow()
     subject_dict["updatedAt"] = datetime.utcnow()
+    subject_dict.update(subtopic_progress_fields(subject_dict["subtopics"]))
+
+    subtopics = None
+    if subtopic_collection_enabled():
+        subtopics = subject_dict["subtopics"]
+        check_subtopic_ids(subtopics)
+        subject_dict["subtopics"] = []
 
-    result = await db.subjects.insert_one(subject_dict)
-    created_subject = await db.subjects.find_one({"_id": result.inserted_id})
+    created_subject = await insert_document(db.subjects, subject_dict)
+    if subtopics:
+        await replace_subtopic_tree(db, created_subject["_id"], subtopics)
+        created_subject = await with_subtopics(db, created_subject)
+    notify_write("subjects", "created", str(created_subject["_id"]))
 
-    return serialize_subject(created_subject)
+    return SUBJECT_DOCUMENTS.response(created_subject, status_code=status.HTTP_201_CREATED)
 
 
 @router.get("/{subject_id}", response_model=Subject)
@@ -193,15 +120,12 @@ async def get_subject(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Get a specific subject by ID."""
-    try:
-        subject = await db.subjects.find_one({"_id": ObjectId(subject_id)})
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
+    subject = await db.subjects.find_one({"_id": parse_object_id(subject_id, "subject")})
 
     if not subject:
         raise HTTPException(status_code=404, detail="Subject not found")
 
-    return serialize_subject(subject)
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, subject))
 
 
 @router.put("/{subject_id}", response_model=Subject)
@@ -211,27 +135,24 @@ async def update_subject(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Update an existing subject with full data."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    # Check if subject exists
-    existing_subject = await db.subjects.find_one({"_id": oid})
-    if not existing_subject:
-        raise HTTPException(status_code=404, detail="Subject not found")
+    oid = parse_object_id(subject_id, "subject")
 
     # Update subject
-    update_dict = subject_update.model_dump(exclude={"id", "createdAt"})
+    update_dict = subject_update.model_dump(exclude={"id", "createdAt", *SESSION_AGGREGATE_FIELDS})
     update_dict["updatedAt"] = datetime.utcnow()
+    update_dict.update(subtopic_progress_fields(update_dict["subtopics"]))
+
+    subtopics = None
+    if subtopic_collection_enabled():
+        subtopics = update_dict.pop("subtopics")
+        check_subtopic_ids(subtopics)
 
-    await db.subjects.update_one(
-        {"_id": oid},
-        {"$set": update_dict}
-    )
+    updated_subject = await update_document(db.subjects, oid, {"$set": update_dict}, "Subject not found")
+    if subtopics is not None:
+        await replace_subtopic_tree(db, oid, subtopics)
+    notify_write("subjects", "updated", subject_id)
 
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
 
 
 @router.patch("/{subject_id}", response_model=Subject)
@@ -241,33 +162,38 @@ async def partial_update_subject(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Partially update an existing subject."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    # Check if subject exists
-    existing_subject = await db.subjects.find_one({"_id": oid})
-    if not existing_subject:
-        raise HTTPException(status_code=404, detail="Subject not found")
+    oid = parse_object_id(subject_id, "subject")
 
     # Only update fields that are provided
     if not subject_update:
         raise HTTPException(status_code=400, detail="No fields to update")
 
-    # Don't allow updating id or createdAt
-    subject_update.pop("id", None)
-    subject_update.pop("createdAt", None)
+    # Don't allow updating id, createdAt or the session aggregates
+    for field in ("id", "createdAt", *SESSION_AGGREGATE_FIELDS):
+        subject_update.pop(field, None)
 
     subject_update["updatedAt"] = datetime.utcnow()
 
-    await db.subjects.update_one(
-        {"_id": oid},
-        {"$set": subject_update}
-    )
+    subtopics = None
+    if "subtopics" in subject_update:
+        try:
+            subtopics = [subtopic.model_dump() for subtopic in SUBTOPIC_LIST.validate_python(subject_update["subtopics"] or [])]
+        except ValidationError as e:
+            # Same 422 body as a request that fails model validation
+            raise RequestValidationError([{**error, "loc": ("body", "subtopics", *error["loc"])} for error in e.errors()])
+        subject_update.update(subtopic_progress_fields(subtopics))
+        if subtopic_collection_enabled():
+            check_subtopic_ids(subtopics)
+            del subject_update["subtopics"]
+        else:
+            subject_update["subtopics"] = subtopics
+
+    updated_subject = await update_document(db.subjects, oid, {"$set": subject_update}, "Subject not found")
+    if subtopics is not None and subtopic_collection_enabled():
+        await replace_subtopic_tree(db, oid, subtopics)
+    notify_write("subjects", "updated", subject_id)
 
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
 
 
 @router.delete("/{subject_id}", status_code=status.HTTP_204_NO_CONTENT)
@@ -276,19 +202,194 @@ async def delete_subject(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Delete a subject."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
+    oid = parse_object_id(subject_id, "subject")
 
     result = await db.subjects.delete_one({"_id": oid})
 
     if result.deleted_count == 0:
         raise HTTPException(status_code=404, detail="Subject not found")
 
+    if subtopic_collection_enabled():
+        await db.subtopics.delete_many({"subjectId": oid})
+    notify_write("subjects", "deleted", subject_id)
     return None
 
 
+# Deepest subtree one request of GET /{subject_id}/subtopics may return
+MAX_SUBTOPIC_DEPTH = 20
+
+
+@router.get("/{subject_id}/subtopics", response_model=List[SubtopicNode])
+async def list_subtopics(
+    subject_id: str,
+    parent: Optional[str] = Query(None, description="Subtopic whose children to return; top level when omitted"),
+    depth: int = Query(1, ge=1, le=MAX_SUBTOPIC_DEPTH, description="Levels to return below the parent"),
+    db: AsyncIOMotorDatabase = Depends(get_database)
+):
+    """
+    Load a subject's subtopic tree lazily: the children of `parent` down to
+    `depth` levels, each with its childCount and completion, so expanding a
+    node only fetches that node's children.
+    """
+    oid = parse_object_id(subject_id, "subject")
+
+    if subtopic_collection_enabled():
+        if not await db.subjects.find_one({"_id": oid}, {"_id": 1}):
+            raise HTTPException(status_code=404, detail="Subject not found")
+        nodes = await load_subtopic_levels(db, oid, parent or None, depth)
+    else:
+        subject = await db.subjects.find_one({"_id": oid}, {"subtopics": 1})
+        if not subject:
+            raise HTTPException(status_code=404, detail="Subject not found")
+        subtopics = subject.get("subtopics", [])
+        nodes = None
+        if not parent:
+            nodes = subtopic_levels(subtopics, depth)
+        else:
+            path = find_subtopic_path(subtopics, parent)
+            if path:
+                nodes = subtopic_levels(path[-1].get("subtopics") or [], depth)
+
+    if nodes is None:
+        raise HTTPException(status_code=404, detail="Subtopic not found")
+    if trusted_reads_enabled():
+        return Response(content=dump_json(nodes), media_type="application/json")
+    return nodes
+
+
+# What the subject completion needs from each top-level subtopic, without its subtree
+ROOT_SUMMARY = {
+    "id": "$$root.id",
+    "status": "$$root.status",
+    "cachedCompletion": "$$root.cachedCompletion",
+    "childCount": {"$size": {"$ifNull": ["$$root.subtopics", []]}},
+}
+
+
+async def read_subtopic_roots(db: AsyncIOMotorDatabase, oid: ObjectId, subtopic_id: Optional[str]) -> Optional[dict]:
+    """
+    The subject's counters and updatedAt, a summary of every top-level subtopic
+    (`roots`) and, for a `subtopic_id`, the whole top-level subtopics with that
+    id (`targets`), in one round trip; the other subtrees are not returned.
+    None when the subject is missing.
+    """
+    subtopics = {"$ifNull": ["$subtopics", []]}
+    fields = {
+        "updatedAt": 1,
+        "totalSubtopicsCount": 1,
+        "completedSubtopicsCount": 1,
+        "roots": {"$map": {"input": subtopics, "as": "root", "in": ROOT_SUMMARY}},
+    }
+    if subtopic_id is not None:
+        fields["targets"] = {"$filter": {"input": subtopics, "as": "root", "cond": {"$eq": ["$$root.id", subtopic_id]}}}
+
+    subjects = await db.subjects.aggregate([{"$match": {"_id": oid}}, {"$project": fields}]).to_list(1)
+    return subjects[0] if subjects else None
+
+
+def _root_completion(root: dict) -> float:
+    """cached_subtopic_completion of a ROOT_SUMMARY."""
+    if not root.get("childCount"):
+        return 100.0 if root.get("status") == "completed" else 0.0
+    return root.get("cachedCompletion", 0.0)
+
+
+def _edited_roots(subtopics: List[dict], subtopic_id: Optional[str], replacement: Optional[dict]) -> List[dict]:
+    if subtopic_id is None:
+        return subtopics + [replacement]
+    return [
+        replacement if subtopic.get("id") == subtopic_id else subtopic
+        for subtopic in subtopics
+        if replacement is not None or subtopic.get("id") != subtopic_id
+    ]
+
+
+async def write_top_level_subtopic(
+    db: AsyncIOMotorDatabase,
+    oid: ObjectId,
+    subtopic_id: Optional[str],
+    replacement: Optional[dict],
+    not_found: str
+) -> dict:
+    """
+    Add `replacement` as a top-level subtopic (no `subtopic_id`), replace the
+    top-level subtopic `subtopic_id` with it, or delete that subtopic (no
+    `replacement`) with one targeted $push, arrayFilters $set or $pull. The
+    counters move by the counts of the subtrees added and removed, and the
+    subject completion is recomputed from the top-level cached completions, so
+    the rest of the tree is neither read nor rewritten. Subjects whose stored
+    counters are missing or inconsistent get the whole tree recomputed.
+    """
+    added = subtopic_tree_stats([replacement], cache_completions=True) if replacement is not None else None
+
+    for _ in range(SUBTOPIC_WRITE_ATTEMPTS):
+        subject = await read_subtopic_roots(db, oid, subtopic_id)
+        if not subject:
+            raise HTTPException(status_code=404, detail="Subject not found")
+        targets = subject.get("targets", [])
+        if subtopic_id is not None and not targets:
+            raise HTTPException(status_code=404, detail=not_found)
+
+        # Each matched subtopic is replaced, or the new one appended once
+        copies = (len(targets) if subtopic_id is not None else 1) if added else 0
+        removed = subtopic_tree_stats(targets)
+        total_delta = copies * (added["totalSubtopicsCount"] if added else 0) - removed["totalSubtopicsCount"]
+        completed_delta = copies * (added["completedSubtopicsCount"] if added else 0) - removed["completedSubtopicsCount"]
+
+        completions = []
+        for root in subject["roots"]:
+            if subtopic_id is None or root.get("id") != subtopic_id:
+                completions.append(_root_completion(root))
+            elif added:
+                completions.append(added["completionPercentage"])
+        if subtopic_id is None:
+            completions.append(added["completionPercentage"])
+        overall = round(sum(completions) / len(completions), 2) if completions else 0.0
+
+        updated_at = datetime.utcnow()
+        progress = {"completionPercentage": overall, "progress": overall, "updatedAt": updated_at}
+        array_filters = None
+        counters_usable = stored_counts_usable(subject, total_delta, completed_delta)
+        if not counters_usable:
+            # Counters missing (never computed) or out of step with the tree:
+            # recompute the whole tree once and write it back
+            stored = await db.subjects.find_one({"_id": oid}, {"subtopics": 1})
+            if not stored:
+                raise HTTPException(status_code=404, detail="Subject not found")
+            subtopics = _edited_roots(stored.get("subtopics") or [], subtopic_id, replacement)
+            update = {"$set": {"subtopics": subtopics, **subtopic_progress_fields(subtopics), "updatedAt": updated_at}}
+        elif subtopic_id is None:
+            update = {"$push": {"subtopics": replacement}, "$set": progress}
+        elif replacement is not None:
+            update = {"$set": {"subtopics.$[l0]": replacement, **progress}}
+            array_filters = [{"l0.id": subtopic_id}]
+        else:
+            update = {"$pull": {"subtopics": {"id": subtopic_id}}, "$set": progress}
+        if counters_usable:
+            update["$inc"] = {"totalSubtopicsCount": total_delta, "completedSubtopicsCount": completed_delta}
+
+        # As in the toggle, a subject written since it was read is read again
+        # rather than given a completion computed from stale top-level subtopics
+        updated_subject = await db.subjects.find_one_and_update(
+            {"_id": oid, "updatedAt": subject.get("updatedAt")},
+            update,
+            array_filters=array_filters,
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_subject is not None:
+            return updated_subject
+
+    raise HTTPException(status_code=409, detail="Subject changed while editing its subtopics; try again")
+
+
+async def find_subject_counters(db: AsyncIOMotorDatabase, oid: ObjectId) -> dict:
+    """The subject's subtopic counters, which collection-mode subtopic writes adjust; 404 when missing."""
+    subject = await db.subjects.find_one({"_id": oid}, {"totalSubtopicsCount": 1, "completedSubtopicsCount": 1})
+    if not subject:
+        raise HTTPException(status_code=404, detail="Subject not found")
+    return subject
+
+
 @router.post("/{subject_id}/subtopics", response_model=Subject)
 async def add_subtopic(
     subject_id: str,
@@ -296,29 +397,23 @@ async def add_subtopic(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """Add a subtopic to a subject."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    subject = await db.subjects.find_one({"_id": oid})
-    if not subject:
-        raise HTTPException(status_code=404, detail="Subject not found")
+    oid = parse_object_id(subject_id, "subject")
 
     # Generate subtopic ID if not provided
     if not subtopic.id:
         subtopic.id = str(datetime.utcnow().timestamp())
 
-    await db.subjects.update_one(
-        {"_id": oid},
-        {
-            "$push": {"subtopics": subtopic.model_dump()},
-            "$set": {"updatedAt": datetime.utcnow()}
-        }
-    )
+    if subtopic_collection_enabled():
+        subtopic_dict = subtopic.model_dump()
+        check_subtopic_ids([subtopic_dict])
+        subject = await find_subject_counters(db, oid)
+        update = await insert_subtopic(db, subject, subtopic_dict)
+        updated_subject = await update_document(db.subjects, oid, update, "Subject not found")
+    else:
+        updated_subject = await write_top_level_subtopic(db, oid, None, subtopic.model_dump(), "Subject not found")
+    notify_write("subjects", "updated", subject_id)
 
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
 
 
 @router.put("/{subject_id}/subtopics/{subtopic_id}", response_model=Subject)
@@ -328,27 +423,27 @@ async def update_subtopic(
     subtopic: Subtopic,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Update a subtopic in a subject."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    result = await db.subjects.update_one(
-        {"_id": oid, "subtopics.id": subtopic_id},
-        {
-            "$set": {
-                "subtopics.$": subtopic.model_dump(),
-                "updatedAt": datetime.utcnow()
-            }
-        }
-    )
+    """
+    Update a subtopic in a subject. Embedded trees only match top-level
+    subtopics; with SUBTOPIC_STORAGE=collection any subtopic can be replaced.
+    """
+    oid = parse_object_id(subject_id, "subject")
 
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Subject or subtopic not found")
+    if subtopic_collection_enabled():
+        subtopic_dict = subtopic.model_dump()
+        check_subtopic_ids([subtopic_dict])
+        subject = await find_subject_counters(db, oid)
+        update = await replace_subtopic(db, subject, subtopic_id, subtopic_dict)
+        if update is None:
+            raise HTTPException(status_code=404, detail="Subject or subtopic not found")
+        updated_subject = await update_document(db.subjects, oid, update, "Subject or subtopic not found")
+    else:
+        updated_subject = await write_top_level_subtopic(
+            db, oid, subtopic_id, subtopic.model_dump(), "Subject or subtopic not found"
+        )
+    notify_write("subjects", "updated", subject_id)
 
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
 
 
 @router.delete("/{subject_id}/subtopics/{subtopic_id}", response_model=Subject)
@@ -357,46 +452,23 @@ async def delete_subtopic(
     subtopic_id: str,
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
-    """Delete a subtopic from a subject."""
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    result = await db.subjects.update_one(
-        {"_id": oid},
-        {
-            "$pull": {"subtopics": {"id": subtopic_id}},
-            "$set": {"updatedAt": datetime.utcnow()}
-        }
-    )
-
-    if result.modified_count == 0:
-        raise HTTPException(status_code=404, detail="Subject or subtopic not found")
-
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
-
-
-def find_and_toggle_subtopic(subtopics: List[dict], subtopic_id: str) -> bool:
     """
-    Recursively find and toggle a subtopic by ID in nested structure.
-    Returns True if found and toggled, False otherwise.
+    Delete a subtopic from a subject. Embedded trees only match top-level
+    subtopics; with SUBTOPIC_STORAGE=collection any subtopic and its subtree can be deleted.
     """
-    for subtopic in subtopics:
-        if subtopic["id"] == subtopic_id:
-            # Toggle status
-            current_status = subtopic.get("status", "active")
-            subtopic["status"] = "completed" if current_status == "active" else "active"
-            subtopic["completedDate"] = datetime.utcnow() if subtopic["status"] == "completed" else None
-            return True
+    oid = parse_object_id(subject_id, "subject")
 
-        # Recursively search in nested subtopics
-        if subtopic.get("subtopics"):
-            if find_and_toggle_subtopic(subtopic["subtopics"], subtopic_id):
-                return True
+    if subtopic_collection_enabled():
+        subject = await find_subject_counters(db, oid)
+        update = await delete_subtopic_subtree(db, subject, subtopic_id)
+        if update is None:
+            raise HTTPException(status_code=404, detail="Subject or subtopic not found")
+        updated_subject = await update_document(db.subjects, oid, update, "Subject or subtopic not found")
+    else:
+        updated_subject = await write_top_level_subtopic(db, oid, subtopic_id, None, "Subject or subtopic not found")
+    notify_write("subjects", "updated", subject_id)
 
-    return False
+    return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
 
 
 @router.put("/{subject_id}/subtopics/{subtopic_id}/toggle", response_model=Subject)
@@ -406,82 +478,88 @@ async def toggle_subtopic_completion(
     db: AsyncIOMotorDatabase = Depends(get_database)
 ):
     """
-    Toggle the completion status of a subtopic and recalculate all completion percentages.
-    Works with nested subtopic structure.
+    Toggle the completion status of a subtopic.
+    Only the toggled subtopic, its ancestors' cachedCompletion and the subject
+    counters are recomputed and written, with targeted arrayFilters updates
+    (or per-node updates with SUBTOPIC_STORAGE=collection). Subjects whose
+    stored counters are missing or inconsistent get the whole tree recomputed.
     """
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
-
-    # Get the subject
-    subject = await db.subjects.find_one({"_id": oid})
-    if not subject:
-        raise HTTPException(status_code=404, detail="Subject not found")
-
-    # Get subtopics
-    subtopics = subject.get("subtopics", [])
-    if not subtopics:
-        raise HTTPException(status_code=404, detail="No subtopics found")
-
-    # Find and toggle the target subtopic recursively
-    subtopic_found = find_and_toggle_subtopic(subtopics, subtopic_id)
-
-    if not subtopic_found:
-        raise HTTPException(status_code=404, detail="Subtopic not found")
-
-    # Recalculate all cached completions
-    updated_subtopics = update_subtopic_cached_completions(subtopics)
-
-    # Calculate subject-level completion stats
-    completion_stats = calculate_subject_completion(updated_subtopics)
-
-    # Update the subject with new data
-    await db.subjects.update_one(
-        {"_id": oid},
-        {
-            "$set": {
-                "subtopics": updated_subtopics,
-                "completionPercentage": completion_stats["completionPercentage"],
-                "progress": completion_stats["completionPercentage"],  # Keep in sync
-                "completedSubtopicsCount": completion_stats["completedSubtopicsCount"],
-                "totalSubtopicsCount": completion_stats["totalSubtopicsCount"],
-                "updatedAt": datetime.utcnow()
-            }
+    oid = parse_object_id(subject_id, "subject")
+
+    if subtopic_collection_enabled():
+        subject = await find_subject_counters(db, oid)
+        update = await toggle_stored_subtopic(db, subject, subtopic_id)
+        if update is None:
+            raise HTTPException(status_code=404, detail="Subtopic not found")
+        updated_subject = await update_document(db.subjects, oid, update, "Subject not found")
+        notify_write("subjects", "updated", subject_id)
+        return SUBJECT_DOCUMENTS.response(await with_subtopics(db, updated_subject))
+
+    for _ in range(SUBTOPIC_WRITE_ATTEMPTS):
+        subject = await db.subjects.find_one(
+            {"_id": oid},
+            {"subtopics": 1, "totalSubtopicsCount": 1, "completedSubtopicsCount": 1, "updatedAt": 1}
+        )
+        if not subject:
+            raise HTTPException(status_code=404, detail="Subject not found")
+
+        subtopics = subject.get("subtopics", [])
+        if not subtopics:
+            raise HTTPException(status_code=404, detail="No subtopics found")
+
+        path = find_subtopic_path(subtopics, subtopic_id)
+        if not path:
+            raise HTTPException(status_code=404, detail="Subtopic not found")
+
+        # Toggle the target in memory so the ancestors below see its new state
+        target = path[-1]
+        completed = target.get("status", "active") != "completed"
+        target["status"] = "completed" if completed else "active"
+        target["completedDate"] = datetime.utcnow() if completed else None
+
+        target_path = subtopic_array_path(len(path))
+        updates = {
+            f"{target_path}.status": target["status"],
+            f"{target_path}.completedDate": target["completedDate"],
         }
-    )
-
-    # Return updated subject
-    updated_subject = await db.subjects.find_one({"_id": oid})
-    return serialize_subject(updated_subject)
-
 
-def find_next_uncompleted_subtopic(subtopics: List[dict], level: int = 0) -> dict:
-    """
-    Recursively find the first uncompleted leaf subtopic.
-    Returns subtopic dict or None if all completed.
-    """
-    # Sort by order
-    sorted_subtopics = sorted(subtopics, key=lambda x: x.get("order", 0))
-
-    for subtopic in sorted_subtopics:
-        # Check if it's a leaf node (no nested subtopics) and not completed
-        has_nested = subtopic.get("subtopics") and len(subtopic["subtopics"]) > 0
-
-        if not has_nested and subtopic.get("status") != "completed":
-            return {
-                "id": subtopic["id"],
-                "name": subtopic["name"],
-                "level": level
-            }
-
-        # If has nested subtopics, search recursively
-        if has_nested:
-            nested_result = find_next_uncompleted_subtopic(subtopic["subtopics"], level + 1)
-            if nested_result:
-                return nested_result
-
-    return None
+        # Bottom-up along the path: each node averages its children's cached completions
+        for depth in range(len(path), 0, -1):
+            node = path[depth - 1]
+            node["cachedCompletion"] = completion_from_children(node)
+            updates[f"{subtopic_array_path(depth)}.cachedCompletion"] = node["cachedCompletion"]
+
+        overall = round(sum(cached_subtopic_completion(root) for root in subtopics) / len(subtopics), 2)
+        updates["completionPercentage"] = overall
+        updates["progress"] = overall  # Keep in sync
+        updates["updatedAt"] = datetime.utcnow()
+
+        if stored_counts_usable(subject, completed_delta=1 if completed else -1):
+            update = {"$set": updates, "$inc": {"completedSubtopicsCount": 1 if completed else -1}}
+            array_filters = [{f"l{level}.id": node["id"]} for level, node in enumerate(path)]
+        else:
+            # Counters missing (never computed) or out of step with the tree:
+            # recompute the whole tree once and write it back
+            update = {"$set": {
+                "subtopics": subtopics,
+                **subtopic_progress_fields(subtopics),
+                "updatedAt": updates["updatedAt"]
+            }}
+            array_filters = None
+
+        # Matching on updatedAt makes the read-compute-write optimistic: a subject
+        # written in between is re-read instead of getting stale counters
+        updated_subject = await db.subjects.find_one_and_update(
+            {"_id": oid, "updatedAt": subject.get("updatedAt")},
+            update,
+            array_filters=array_filters,
+            return_document=ReturnDocument.AFTER
+        )
+        if updated_subject is not None:
+            notify_write("subjects", "updated", subject_id)
+            return SUBJECT_DOCUMENTS.response(updated_subject)
+
+    raise HTTPException(status_code=409, detail="Subject changed while toggling; try again")
 
 
 @router.get("/{subject_id}/progress")
@@ -493,31 +571,24 @@ async def get_subject_progress(
     Get detailed progress statistics for a subject with nested structure.
     Returns completion percentage, counts, level breakdowns, and next recommended subtopic.
     """
-    try:
-        oid = ObjectId(subject_id)
-    except Exception:
-        raise HTTPException(status_code=400, detail="Invalid subject ID format")
+    oid = parse_object_id(subject_id, "subject")
 
-    subject = await db.subjects.find_one({"_id": oid})
+    subject = await db.subjects.find_one({"_id": oid}, {"subtopics": 1})
     if not subject:
         raise HTTPException(status_code=404, detail="Subject not found")
 
     subtopics = subject.get("subtopics", [])
+    if subtopic_collection_enabled():
+        subtopics = await load_subtopic_tree(db, oid)
 
-    # Calculate completion stats
-    completion_stats = calculate_subject_completion(subtopics)
-
-    # Find next recommended subtopic (first uncompleted leaf node)
-    next_subtopic = find_next_uncompleted_subtopic(subtopics)
-
-    # Calculate remaining count
-    remaining_count = completion_stats["totalSubtopicsCount"] - completion_stats["completedSubtopicsCount"]
+    # Completion, counts, level stats and the next uncompleted leaf in one traversal
+    stats = subtopic_tree_stats(subtopics)
 
     return {
-        "overallProgress": completion_stats["completionPercentage"],
-        "completedCount": completion_stats["completedSubtopicsCount"],
-        "totalCount": completion_stats["totalSubtopicsCount"],
-        "remainingCount": remaining_count,
-        "levelStats": completion_stats["levelStats"],
-        "nextRecommendedSubtopic": next_subtopic
+        "overallProgress": stats["completionPercentage"],
+        "completedCount": stats["completedSubtopicsCount"],
+        "totalCount": stats["totalSubtopicsCount"],
+        "remainingCount": stats["totalSubtopicsCount"] - stats["completedSubtopicsCount"],
+        "levelStats": stats["levelStats"],
+        "nextRecommendedSubtopic": stats["nextRecommendedSubtopic"]
     }
@@ -0,0 +1,109 @@
+"""
+In-process cache for analytics responses.
+
+Entries are keyed by endpoint, parameters and the current write epoch of every
+collection the endpoint reads. Write routes bump the epoch of the collection
+they changed, so a stale entry can never be hit again (it simply ages out of
+the LRU), and a hit costs no database work at all.
+"""
+from collections import OrderedDict
+from datetime import datetime
+from functools import wraps
+from typing import Any, Dict, Hashable, Tuple
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.config import settings
+
+
+class AnalyticsCache:
+    """LRU cache whose keys embed per-collection write epochs."""
+
+    def __init__(self, max_entries: int = 256):
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self._epochs: Dict[str, int] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def epoch(self, collection: str) -> int:
+        return self._epochs.get(collection, 0)
+
+    def mark_written(self, *collections: str) -> None:
+        """Invalidate every entry that depends on any of `collections`."""
+        for collection in collections:
+            self._epochs[collection] = self.epoch(collection) + 1
+
+    def make_key(self, endpoint: str, params: Dict[str, Any], depends_on: Tuple[str, ...]) -> Hashable:
+        return (
+            endpoint,
+            tuple(sorted(params.items())),
+            tuple(self.epoch(collection) for collection in depends_on),
+        )
+
+    def get(self, key: Hashable):
+        if key in self._entries:
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return True, self._entries[key]
+        self.misses += 1
+        return False, None
+
+    def put(self, key: Hashable, value: Any) -> None:
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def clear(self) -> None:
+        self._entries.clear()
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hitRate": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": len(self._entries),
+            "maxEntries": self.max_entries,
+            "epochs": dict(self._epochs),
+        }
+
+
+analytics_cache = AnalyticsCache(max_entries=settings.ANALYTICS_CACHE_SIZE)
+
+
+def mark_written(*collections: str) -> None:
+    """Record a write to `collections`; call after the write has completed."""
+    analytics_cache.mark_written(*collections)
+
+
+def cached_response(*depends_on: str):
+    """
+    Cache an endpoint's response until one of `depends_on` is written.
+    Query parameters become part of the key; the database dependency is skipped.
+    The current UTC day is included too, since "today"/"this week" windows move.
+    """
+    def decorator(func):
+        @wraps(func)
+        async def wrapper(**kwargs):
+            if not settings.ANALYTICS_CACHE_ENABLED:
+                return await func(**kwargs)
+
+            params = {
+                name: value for name, value in kwargs.items()
+                if not isinstance(value, AsyncIOMotorDatabase)
+            }
+            params["__day"] = datetime.utcnow().date().isoformat()
+
+            key = analytics_cache.make_key(func.__name__, params, depends_on)
+            found, value = analytics_cache.get(key)
+            if found:
+                return value
+
+            value = await func(**kwargs)
+            analytics_cache.put(key, value)
+            return value
+
+        return wrapper
+    return decorator
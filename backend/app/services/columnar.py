@@ -0,0 +1,296 @@
+"""
+Optional in-memory columnar session store for analytics.
+
+Keeps every session as a row across NumPy columns (start epoch, duration
+minutes, referenceType code, interned referenceId code) so windowed totals are
+computed with vectorized masks and `bincount` instead of Mongo aggregations.
+Enabled with ANALYTICS_ENGINE=columnar; requires numpy (requirements-optional.txt).
+
+Queries return rows shaped like the daily rollup documents/aggregation results,
+so the analytics routes format both engines' output with the same code.
+"""
+from datetime import date, datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.rollups import day_key, session_reference_type
+
+try:
+    import numpy as np
+except ImportError:  # pragma: no cover - optional dependency
+    np = None
+
+logger = logging.getLogger(__name__)
+
+EPOCH = datetime(1970, 1, 1)
+EPOCH_ORDINAL = EPOCH.date().toordinal()
+SECONDS_PER_DAY = 86400
+
+# Fields needed to build the columns
+SESSION_PROJECTION = {
+    "startTime": 1,
+    "duration": 1,
+    "referenceType": 1,
+    "referenceId": 1,
+    "name": 1,
+}
+
+
+def epoch_day(value: date) -> int:
+    """Days since 1970-01-01 for a date."""
+    return (value - EPOCH.date()).days
+
+
+class Interner:
+    """Maps strings to dense integer codes and back."""
+
+    def __init__(self):
+        self.codes: Dict[str, int] = {}
+        self.values: List[str] = []
+        self._ranks = None
+
+    def code(self, value: str) -> int:
+        code = self.codes.get(value)
+        if code is None:
+            code = len(self.values)
+            self.codes[value] = code
+            self.values.append(value)
+            self._ranks = None
+        return code
+
+    def ranks(self):
+        """Array mapping each code to its position in sorted string order."""
+        if self._ranks is None:
+            order = np.argsort(np.array(self.values, dtype=object), kind="stable")
+            ranks = np.empty(len(self.values), dtype=np.int64)
+            ranks[order] = np.arange(len(self.values))
+            self._ranks = ranks
+        return self._ranks
+
+
+class ColumnarSessionStore:
+    """Append-mostly columnar copy of the sessions collection."""
+
+    def __init__(self, capacity: int = 1024):
+        if np is None:
+            raise RuntimeError("The columnar analytics engine requires numpy")
+
+        self.size = 0
+        self.start = np.zeros(capacity, dtype=np.int64)  # epoch seconds
+        self.duration = np.zeros(capacity, dtype=np.int64)  # minutes
+        self.ref_type = np.zeros(capacity, dtype=np.int32)
+        self.ref_id = np.zeros(capacity, dtype=np.int32)
+        self.alive = np.zeros(capacity, dtype=bool)
+
+        self.ref_types = Interner()
+        self.ref_ids = Interner()
+        self.row_by_session: Dict[str, int] = {}
+        # Last written name per (day, referenceType, referenceId), as in the rollups
+        self.names: Dict[Tuple[int, int, int], str] = {}
+
+    # ------------------------------------------------------------------
+    # Writes
+    # ------------------------------------------------------------------
+
+    def _grow(self, needed: int) -> None:
+        capacity = len(self.start)
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2)
+        for column in ("start", "duration", "ref_type", "ref_id", "alive"):
+            old = getattr(self, column)
+            new = np.zeros(new_capacity, dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, column, new)
+
+    def add(self, session_docs: Iterable[dict]) -> None:
+        """Append sessions (documents as stored in MongoDB)."""
+        rows = []
+        for doc in session_docs:
+            start_time = doc.get("startTime")
+            if not start_time:
+                continue
+            start = int((start_time - EPOCH).total_seconds())
+            type_code = self.ref_types.code(session_reference_type(doc))
+            id_code = self.ref_ids.code(doc.get("referenceId") or "unknown")
+            rows.append((str(doc["_id"]), start, doc.get("duration") or 0, type_code, id_code))
+            self.names[(start // SECONDS_PER_DAY, type_code, id_code)] = doc.get("name") or "Unknown"
+
+        if not rows:
+            return
+
+        self._grow(self.size + len(rows))
+        first = self.size
+        for offset, (session_id, start, duration, type_code, id_code) in enumerate(rows):
+            previous = self.row_by_session.get(session_id)
+            if previous is not None:
+                self.alive[previous] = False
+            row = first + offset
+            self.start[row] = start
+            self.duration[row] = duration
+            self.ref_type[row] = type_code
+            self.ref_id[row] = id_code
+            self.alive[row] = True
+            self.row_by_session[session_id] = row
+        self.size += len(rows)
+
+    def remove(self, session_docs: Iterable[dict]) -> None:
+        """Tombstone sessions by _id."""
+        for doc in session_docs:
+            row = self.row_by_session.pop(str(doc["_id"]), None)
+            if row is not None:
+                self.alive[row] = False
+
+    def apply(self, removed: Iterable[dict], added: Iterable[dict]) -> None:
+        self.remove(removed)
+        self.add(added)
+
+    # ------------------------------------------------------------------
+    # Queries
+    # ------------------------------------------------------------------
+
+    def _window(self, start_day: str, end_day: Optional[str] = None):
+        """Row mask and day index for sessions whose UTC day lies in the range."""
+        n = self.size
+        days = self.start[:n] // SECONDS_PER_DAY
+        mask = self.alive[:n] & (days >= epoch_day(datetime.strptime(start_day, "%Y-%m-%d").date()))
+        if end_day:
+            mask &= days <= epoch_day(datetime.strptime(end_day, "%Y-%m-%d").date())
+        return mask, days
+
+    def _name(self, day: int, type_code: int, id_code: int) -> str:
+        return self.names.get((day, type_code, id_code), "Unknown")
+
+    def totals(self, start_day: str) -> dict:
+        """Total duration and session count since `start_day`."""
+        mask, _ = self._window(start_day)
+        return {
+            "totalDuration": int(self.duration[:self.size][mask].sum()),
+            "sessionCount": int(mask.sum()),
+        }
+
+    def by_reference_type(self, start_day: str) -> List[dict]:
+        """Rows shaped like the rollup $group by referenceType."""
+        mask, _ = self._window(start_day)
+        codes = self.ref_type[:self.size][mask]
+        bins = len(self.ref_types.values)
+        durations = np.bincount(codes, weights=self.duration[:self.size][mask], minlength=bins)
+        counts = np.bincount(codes, minlength=bins)
+
+        return [
+            {
+                "_id": self.ref_types.values[code],
+                "totalDuration": int(durations[code]),
+                "sessionCount": int(counts[code]),
+            }
+            for code in np.nonzero(counts)[0]
+        ]
+
+    def daily_rows(self, start_day: str, end_day: Optional[str] = None) -> List[dict]:
+        """Rows shaped like rollup documents, sorted by (day, referenceType, referenceId)."""
+        mask, days = self._window(start_day, end_day)
+        n = self.size
+        id_bins = max(len(self.ref_ids.values), 1)
+        type_bins = max(len(self.ref_types.values), 1)
+
+        # Rank codes by their string value so integer key order equals the rollup sort order
+        type_rank = self.ref_types.ranks()
+        id_rank = self.ref_ids.ranks()
+        type_by_rank = np.argsort(type_rank)
+        id_by_rank = np.argsort(id_rank)
+
+        # Combine (day, type, id) into one integer key and group on it
+        keys = (days[mask] * type_bins + type_rank[self.ref_type[:n][mask]]) * id_bins \
+            + id_rank[self.ref_id[:n][mask]]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        durations = np.bincount(inverse, weights=self.duration[:n][mask], minlength=len(unique_keys))
+        counts = np.bincount(inverse, minlength=len(unique_keys))
+
+        row_days = unique_keys // id_bins // type_bins
+        type_codes = type_by_rank[(unique_keys // id_bins) % type_bins]
+        id_codes = id_by_rank[unique_keys % id_bins]
+
+        day_labels = {}
+        rows = []
+        for day, type_code, id_code, duration, count in zip(
+            row_days.tolist(), type_codes.tolist(), id_codes.tolist(), durations.tolist(), counts.tolist()
+        ):
+            label = day_labels.get(day)
+            if label is None:
+                label = day_labels[day] = day_key(date.fromordinal(EPOCH_ORDINAL + day))
+            rows.append({
+                "day": label,
+                "referenceType": self.ref_types.values[type_code],
+                "referenceId": self.ref_ids.values[id_code],
+                "name": self._name(day, type_code, id_code),
+                "duration": int(duration),
+                "sessionCount": count,
+            })
+
+        return rows
+
+    def by_reference(self, start_day: str, end_day: str) -> List[dict]:
+        """Rows shaped like the /breakdown aggregation, sorted by duration (desc)."""
+        mask, days = self._window(start_day, end_day)
+        n = self.size
+        id_bins = max(len(self.ref_ids.values), 1)
+
+        keys = self.ref_type[:n][mask] * id_bins + self.ref_id[:n][mask]
+        unique_keys, inverse = np.unique(keys, return_inverse=True)
+        durations = np.bincount(inverse, weights=self.duration[:n][mask], minlength=len(unique_keys))
+        counts = np.bincount(inverse, minlength=len(unique_keys))
+        # Name comes from the latest day in the window, like $last over day-sorted rollups
+        last_days = np.zeros(len(unique_keys), dtype=np.int64)
+        np.maximum.at(last_days, inverse, days[mask])
+
+        rows = []
+        for key, last_day, duration, count in zip(
+            unique_keys.tolist(), last_days.tolist(), durations.tolist(), counts.tolist()
+        ):
+            type_code, id_code = divmod(key, id_bins)
+            rows.append({
+                "_id": {
+                    "referenceType": self.ref_types.values[type_code],
+                    "referenceId": self.ref_ids.values[id_code],
+                },
+                "name": self._name(last_day, type_code, id_code),
+                "duration": int(duration),
+                "sessionCount": int(count),
+            })
+
+        rows.sort(key=lambda row: (-row["duration"], row["_id"]["referenceType"], row["_id"]["referenceId"]))
+        return rows
+
+
+# Set at startup when ANALYTICS_ENGINE=columnar and numpy is available
+session_columns: Optional[ColumnarSessionStore] = None
+
+
+async def load_session_columns(db: AsyncIOMotorDatabase) -> Optional[ColumnarSessionStore]:
+    """Build the columnar store from the sessions collection."""
+    global session_columns
+
+    if np is None:
+        logger.warning("ANALYTICS_ENGINE=columnar but numpy is not installed; using MongoDB aggregations")
+        return None
+
+    store = ColumnarSessionStore(capacity=max(await db.sessions.estimated_document_count(), 1024))
+    batch = []
+    async for doc in db.sessions.find({}, SESSION_PROJECTION).batch_size(10000):
+        batch.append(doc)
+        if len(batch) >= 10000:
+            store.add(batch)
+            batch = []
+    store.add(batch)
+
+    session_columns = store
+    logger.info(f"Loaded {store.size} sessions into the columnar analytics store")
+    return store
+
+
+def apply_session_columns(removed: Iterable[dict], added: Iterable[dict]) -> None:
+    """Mirror session writes into the columnar store when it is loaded."""
+    if session_columns is not None:
+        session_columns.apply(removed, added)
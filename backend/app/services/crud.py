@@ -0,0 +1,62 @@
+"""
+Single round-trip document writes shared by the routers.
+
+Creates return the inserted document as built locally (insert_one fills in
+its _id), and updates use find_one_and_update so the existence check, the
+write and the read-back are one atomic command.
+"""
+from typing import Optional, Union
+
+import bson
+from bson import ObjectId
+from bson.errors import InvalidId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pymongo import ReturnDocument
+
+
+def parse_object_id(value: str, label: str) -> ObjectId:
+    """ObjectId from a path parameter; 400 "Invalid <label> ID format" when malformed."""
+    try:
+        return ObjectId(value)
+    except (InvalidId, TypeError):
+        raise HTTPException(status_code=400, detail=f"Invalid {label} ID format")
+
+
+def as_stored(document: dict) -> dict:
+    """
+    `document` as MongoDB would return it after storing it: datetimes become
+    naive UTC with millisecond precision. Runs locally, no round trip.
+    """
+    return bson.decode(bson.encode(document))
+
+
+async def insert_document(collection: AsyncIOMotorCollection, document: dict) -> dict:
+    """Insert `document` and return it as stored, without reading it back."""
+    await collection.insert_one(document)
+    return as_stored(document)
+
+
+async def update_document(
+    collection: AsyncIOMotorCollection,
+    query: Union[ObjectId, dict],
+    update: dict,
+    not_found: str,
+    return_document: ReturnDocument = ReturnDocument.AFTER,
+    projection: Optional[dict] = None
+) -> dict:
+    """
+    Apply `update` to the document matching `query` (an _id or a filter) and
+    return it as of `return_document`; 404 with `not_found` when nothing matches.
+    """
+    if isinstance(query, ObjectId):
+        query = {"_id": query}
+    document = await collection.find_one_and_update(
+        query,
+        update,
+        projection=projection,
+        return_document=return_document
+    )
+    if document is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    return document
@@ -0,0 +1,74 @@
+"""
+In-process change notifications.
+
+Write routes call `notify_write` after a write has completed. It bumps the
+analytics cache epoch of the collection and publishes a change event to every
+connected /events stream, so clients refresh exactly the data that changed
+instead of polling. Like the analytics cache, subscribers live in this
+process; run a single worker (or add a shared broker) when serving several.
+"""
+import asyncio
+from datetime import datetime
+from typing import Optional, Set
+
+from app.services.cache import mark_written
+
+# Events buffered per client before it is considered too slow and told to resync
+SUBSCRIBER_QUEUE_SIZE = 100
+
+
+class EventBroker:
+    """Fan-out of events to per-subscriber queues."""
+
+    def __init__(self, queue_size: int = SUBSCRIBER_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Set[asyncio.Queue] = set()
+
+    def subscribe(self) -> asyncio.Queue:
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> None:
+        self._subscribers.discard(queue)
+
+    @property
+    def subscriber_count(self) -> int:
+        return len(self._subscribers)
+
+    def publish(self, event: dict) -> None:
+        event = {**event, "at": datetime.utcnow().isoformat()}
+        for queue in list(self._subscribers):
+            try:
+                queue.put_nowait(event)
+            except asyncio.QueueFull:
+                # The client fell behind; replace its backlog with a single resync
+                while not queue.empty():
+                    queue.get_nowait()
+                queue.put_nowait({"type": "resync", "at": event["at"]})
+
+
+event_broker = EventBroker()
+
+
+def notify_write(collection: str, action: str, document_id: Optional[str] = None) -> None:
+    """
+    Record a completed write to `collection` (created/updated/deleted/imported):
+    invalidate dependent cached analytics and tell connected clients.
+    """
+    mark_written(collection)
+    event_broker.publish({
+        "type": "change",
+        "collection": collection,
+        "action": action,
+        "id": document_id,
+    })
+
+
+def notify_active_session(action: str, session: Optional[dict]) -> None:
+    """Tell connected clients a timer session started or stopped."""
+    event_broker.publish({
+        "type": "active-session",
+        "action": action,
+        "session": session,
+    })
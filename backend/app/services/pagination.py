@@ -0,0 +1,130 @@
+"""
+Cursor pagination and field selection for list endpoints.
+
+Lists are sorted newest first on (sort field, _id), and each page is read with
+one extra document to tell whether another page follows. The cursor is opaque:
+the sort value and _id of the last document on the page. A page is therefore
+one index range whatever its offset, unlike skip/limit.
+
+`ListView` turns a list endpoint's `?fields=` and `?include=` parameters into a
+MongoDB projection. By default a list returns a summary, meaning every model field
+except the heavy sections the router names (subtopic trees, notes, GitHub
+payloads). `?include=` adds sections back (`all` for whole documents), and
+`?fields=` selects top-level fields explicitly.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple, Type
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorCollection
+from pydantic import BaseModel
+
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+INCLUDE_ALL = "all"
+
+
+def encode_cursor(document: dict, sort_field: str = "createdAt") -> str:
+    """
+    Opaque cursor pointing just past `document` in (sort_field, _id) descending
+    order. Documents without the sort field (written before it existed) encode
+    it as null.
+    """
+    value = document.get(sort_field)
+    payload = json.dumps({"t": value.isoformat() if value is not None else None, "id": str(document["_id"])})
+    return base64.urlsafe_b64encode(payload.encode()).decode()
+
+
+def decode_cursor(cursor: str, sort_field: str = "createdAt") -> dict:
+    """
+    Query clause selecting the documents after `cursor`. Missing and null sort
+    values sort after every date in descending order, so they follow the dated
+    documents and are paged by _id alone.
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        value = datetime.fromisoformat(payload["t"]) if payload["t"] is not None else None
+        oid = ObjectId(payload["id"])
+    except (binascii.Error, ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if value is None:
+        return {sort_field: None, "_id": {"$lt": oid}}
+    return {"$or": [
+        {sort_field: {"$lt": value}},
+        {sort_field: value, "_id": {"$lt": oid}},
+        {sort_field: None}
+    ]}
+
+
+async def find_page(
+    collection: AsyncIOMotorCollection,
+    query: dict,
+    limit: int,
+    cursor: Optional[str] = None,
+    projection: Optional[dict] = None,
+    sort_field: str = "createdAt"
+) -> Tuple[List[dict], Optional[str]]:
+    """One page of `query`, newest first, and the cursor of the next page (None on the last page)."""
+    if cursor:
+        query = {"$and": [query, decode_cursor(cursor, sort_field)]}
+    if projection is not None and next(iter(projection.values()), 0):
+        # Inclusion projections must keep the sort key for the next cursor
+        projection = {**projection, sort_field: 1}
+
+    documents = await collection.find(query, projection).sort([(sort_field, -1), ("_id", -1)]).limit(limit + 1).to_list(limit + 1)
+    if len(documents) > limit:
+        documents = documents[:limit]
+        return documents, encode_cursor(documents[-1], sort_field)
+    return documents, None
+
+
+def _names(value: Optional[str]) -> List[str]:
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+class ListView:
+    """
+    Field selection for the list endpoint of `model`. `sections` maps each
+    heavy section name to the (possibly nested) fields it covers; they are left
+    out of the default summary.
+    """
+
+    def __init__(self, model: Type[BaseModel], sections: Dict[str, List[str]]):
+        self.fields = [name for name in model.model_fields if name != "id"]
+        self.sections = sections
+
+    def select(self, fields: Optional[str], include: Optional[str]) -> Tuple[Optional[dict], Optional[List[str]]]:
+        """
+        The projection for `?fields=`/`?include=` and the top-level fields to
+        return, or (None, None) for whole documents. 400 on unknown names.
+        """
+        requested = _names(fields)
+        included = _names(include)
+        if requested and included:
+            raise HTTPException(status_code=400, detail="Use either fields or include, not both")
+
+        if requested:
+            unknown = [name for name in requested if name != "id" and name not in self.fields]
+            if unknown:
+                raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+            selected = [name for name in self.fields if name in requested]
+            return {"_id": 1, **{name: 1 for name in selected}}, selected
+
+        if INCLUDE_ALL in included:
+            return None, None
+        unknown = [name for name in included if name not in self.sections]
+        if unknown:
+            raise HTTPException(
+                status_code=400,
+                detail=f"Unknown sections: {', '.join(unknown)} (available: {', '.join([*self.sections, INCLUDE_ALL])})"
+            )
+
+        excluded = [path for name, paths in self.sections.items() if name not in included for path in paths]
+        if not excluded:
+            return None, None
+        return {path: 0 for path in excluded}, [name for name in self.fields if name not in excluded]
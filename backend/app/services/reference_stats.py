@@ -0,0 +1,185 @@
+"""
+Per-reference session aggregates.
+
+Each subject and project carries its own session totals (sessionCount,
+totalMinutes, timeSpent hours, lastStudied) and a small window of its most
+recent sessions. Session writes keep them current with $inc/$max/$push, so
+the documents stay a fixed size no matter how many sessions are logged.
+"""
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+
+from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.rollups import session_reference_type
+
+logger = logging.getLogger(__name__)
+
+# Reference type -> collection holding the aggregates
+REFERENCE_COLLECTIONS = {"subject": "subjects", "project": "projects"}
+
+RECENT_SESSIONS_LIMIT = 10
+
+# Fields owned by session writes; subject/project updates must not overwrite them
+SESSION_AGGREGATE_FIELDS = {"sessionCount", "totalMinutes", "timeSpent", "lastStudied", "recentSessions", "sessions"}
+
+ReferenceKey = Tuple[str, str]
+
+
+def recent_session_entry(session_doc: dict) -> dict:
+    """The summary of a session kept in recentSessions."""
+    return {
+        "id": str(session_doc["_id"]),
+        "startTime": session_doc.get("startTime"),
+        "endTime": session_doc.get("endTime"),
+        "duration": session_doc.get("duration") or 0,
+        "sessionType": session_doc.get("sessionType", "study"),
+    }
+
+
+def _reference_oid(reference_id: Optional[str]) -> Optional[ObjectId]:
+    try:
+        return ObjectId(reference_id)
+    except (InvalidId, TypeError):
+        return None
+
+
+def collect_reference_deltas(
+    removed: Iterable[dict],
+    added: Iterable[dict]
+) -> Dict[ReferenceKey, dict]:
+    """Fold removed/added session documents into per-reference deltas."""
+    deltas: Dict[ReferenceKey, dict] = {}
+
+    for sign, docs in ((-1, removed), (1, added)):
+        for doc in docs:
+            ref_type = session_reference_type(doc)
+            if ref_type not in REFERENCE_COLLECTIONS or not doc.get("referenceId"):
+                continue
+            delta = deltas.setdefault((ref_type, doc["referenceId"]), {
+                "sessionCount": 0,
+                "totalMinutes": 0,
+                "lastStudied": None,
+                "removedIds": [],
+                "recent": [],
+            })
+            delta["sessionCount"] += sign
+            delta["totalMinutes"] += sign * (doc.get("duration") or 0)
+            if sign < 0:
+                delta["removedIds"].append(str(doc["_id"]))
+            else:
+                delta["recent"].append(recent_session_entry(doc))
+                studied = doc.get("endTime") or doc.get("startTime")
+                if studied and (delta["lastStudied"] is None or studied > delta["lastStudied"]):
+                    delta["lastStudied"] = studied
+
+    return deltas
+
+
+# Pipeline update run after deletions: a deleted session may have been the
+# latest one, so lastStudied falls back to the newest session left in the window
+# (running sessions by their startTime), or null once the window is empty
+LAST_STUDIED_FROM_WINDOW = [{"$set": {"lastStudied": {"$max": {"$map": {
+    "input": {"$ifNull": ["$recentSessions", []]},
+    "as": "session",
+    "in": {"$ifNull": ["$$session.endTime", "$$session.startTime"]}
+}}}}}]
+
+
+async def apply_reference_deltas(db: AsyncIOMotorDatabase, deltas: Dict[ReferenceKey, dict]) -> None:
+    """Apply per-reference deltas with one ordered bulk write per collection."""
+    operations: Dict[str, List[UpdateOne]] = {}
+
+    for (ref_type, ref_id), delta in deltas.items():
+        oid = _reference_oid(ref_id)
+        if oid is None:
+            continue
+        ops = operations.setdefault(REFERENCE_COLLECTIONS[ref_type], [])
+        selector = {"_id": oid}
+
+        # $pull and $push cannot touch the same field in one update, so removals go first
+        if delta["removedIds"]:
+            ops.append(UpdateOne(selector, {"$pull": {"recentSessions": {"id": {"$in": delta["removedIds"]}}}}))
+
+        update = {"$inc": {
+            "sessionCount": delta["sessionCount"],
+            "totalMinutes": delta["totalMinutes"],
+            "timeSpent": delta["totalMinutes"] / 60
+        }}
+        if delta["lastStudied"]:
+            update["$max"] = {"lastStudied": delta["lastStudied"]}
+        if delta["recent"]:
+            update["$push"] = {"recentSessions": {
+                "$each": delta["recent"],
+                "$sort": {"startTime": -1},
+                "$slice": RECENT_SESSIONS_LIMIT
+            }}
+        ops.append(UpdateOne(selector, update))
+        # Updated sessions are removed and re-added under the same id; only
+        # sessions that are gone can take lastStudied back
+        re_added = {entry["id"] for entry in delta["recent"]}
+        if any(session_id not in re_added for session_id in delta["removedIds"]):
+            ops.append(UpdateOne(selector, LAST_STUDIED_FROM_WINDOW))
+
+    for collection, ops in operations.items():
+        await db[collection].bulk_write(ops, ordered=True)
+
+
+async def rebuild_reference_stats(db: AsyncIOMotorDatabase) -> int:
+    """
+    Recompute every subject's and project's aggregates from the sessions collection.
+    Returns the number of subjects and projects updated.
+    """
+    pipeline = [
+        {"$match": {"referenceId": {"$type": "string"}}},
+        {"$group": {
+            "_id": {
+                "referenceType": {"$ifNull": ["$referenceType", "unknown"]},
+                "referenceId": "$referenceId"
+            },
+            "sessionCount": {"$sum": 1},
+            "totalMinutes": {"$sum": {"$ifNull": ["$duration", 0]}},
+            "lastStudied": {"$max": {"$ifNull": ["$endTime", "$startTime"]}}
+        }}
+    ]
+
+    totals: Dict[ReferenceKey, dict] = {}
+    async for row in db.sessions.aggregate(pipeline, allowDiskUse=True):
+        ref_type = row["_id"]["referenceType"]
+        if ref_type not in REFERENCE_COLLECTIONS:
+            continue
+        totals[(ref_type, row["_id"]["referenceId"])] = {
+            "sessionCount": row["sessionCount"],
+            "totalMinutes": row["totalMinutes"],
+            "lastStudied": row["lastStudied"],
+        }
+
+    updated = 0
+    for ref_type, collection in REFERENCE_COLLECTIONS.items():
+        operations = []
+        async for doc in db[collection].find({}, {"_id": 1}):
+            ref_id = str(doc["_id"])
+            total = totals.get((ref_type, ref_id), {"sessionCount": 0, "totalMinutes": 0, "lastStudied": None})
+            recent = await db.sessions.find(
+                {"referenceId": ref_id, "referenceType": ref_type}
+            ).sort("startTime", -1).limit(RECENT_SESSIONS_LIMIT).to_list(RECENT_SESSIONS_LIMIT)
+
+            fields = {
+                "sessionCount": total["sessionCount"],
+                "totalMinutes": total["totalMinutes"],
+                "timeSpent": total["totalMinutes"] / 60,
+                "recentSessions": [recent_session_entry(session) for session in recent],
+            }
+            if total["lastStudied"]:
+                fields["lastStudied"] = total["lastStudied"]
+            operations.append(UpdateOne({"_id": doc["_id"]}, {"$set": fields}))
+
+        if operations:
+            await db[collection].bulk_write(operations, ordered=False)
+        updated += len(operations)
+        logger.info(f"Rebuilt session aggregates for {len(operations)} {collection}")
+
+    return updated
@@ -0,0 +1,197 @@
+"""
+Daily session rollups.
+
+One document per (day, referenceType, referenceId) holding the summed duration
+(minutes) and session count for that day. Session write paths keep it current
+with $inc, so analytics can read a handful of small documents instead of
+re-aggregating the raw sessions collection.
+"""
+from datetime import datetime, date
+from typing import Dict, Iterable, List, Optional, Sequence, Set, Tuple
+import logging
+
+from bson import ObjectId
+from pymongo import UpdateOne
+from motor.motor_asyncio import AsyncIOMotorCollection, AsyncIOMotorDatabase
+
+logger = logging.getLogger(__name__)
+
+ROLLUPS_COLLECTION = "session_daily_rollups"
+DAY_FORMAT = "%Y-%m-%d"
+
+RollupKey = Tuple[str, str, str]
+
+
+def day_key(value) -> str:
+    """Format a datetime/date as the rollup day key (UTC, YYYY-MM-DD)."""
+    return value.strftime(DAY_FORMAT)
+
+
+def parse_day(value: str) -> date:
+    """Parse a rollup day key back into a date."""
+    return datetime.strptime(value, DAY_FORMAT).date()
+
+
+def session_reference_type(session_doc: dict) -> str:
+    """Resolve the reference type of a session."""
+    return session_doc.get("referenceType") or "unknown"
+
+
+def session_rollup_key(session_doc: dict) -> Optional[RollupKey]:
+    """Return the rollup key for a session, or None if it has no startTime."""
+    start_time = session_doc.get("startTime")
+    if not start_time:
+        return None
+    return (
+        day_key(start_time),
+        session_reference_type(session_doc),
+        session_doc.get("referenceId") or "unknown",
+    )
+
+
+def collect_rollup_deltas(
+    removed: Iterable[dict],
+    added: Iterable[dict]
+) -> Dict[RollupKey, dict]:
+    """
+    Fold removed/added session documents into per-key deltas.
+    Removed sessions subtract their duration and count, added sessions add them.
+    """
+    deltas: Dict[RollupKey, dict] = {}
+
+    for sign, docs in ((-1, removed), (1, added)):
+        for doc in docs:
+            key = session_rollup_key(doc)
+            if key is None:
+                continue
+            delta = deltas.setdefault(key, {"duration": 0, "sessionCount": 0, "name": None})
+            delta["duration"] += sign * (doc.get("duration") or 0)
+            delta["sessionCount"] += sign
+            if sign > 0 and doc.get("name"):
+                delta["name"] = doc["name"]
+
+    return deltas
+
+
+async def apply_rollup_deltas(db: AsyncIOMotorDatabase, deltas: Dict[RollupKey, dict]) -> None:
+    """Apply per-key deltas to the rollup collection in a single bulk write."""
+    operations = []
+    empty_keys = []
+
+    for (day, ref_type, ref_id), delta in deltas.items():
+        if delta["duration"] == 0 and delta["sessionCount"] == 0 and not delta["name"]:
+            continue
+
+        update = {"$inc": {"duration": delta["duration"], "sessionCount": delta["sessionCount"]}}
+        if delta["name"]:
+            update["$set"] = {"name": delta["name"]}
+        else:
+            update["$setOnInsert"] = {"name": "Unknown"}
+
+        operations.append(UpdateOne(
+            {"day": day, "referenceType": ref_type, "referenceId": ref_id},
+            update,
+            upsert=True
+        ))
+        if delta["sessionCount"] < 0:
+            empty_keys.append({"day": day, "referenceType": ref_type, "referenceId": ref_id})
+
+    if not operations:
+        return
+
+    await db[ROLLUPS_COLLECTION].bulk_write(operations, ordered=False)
+
+    # Drop rows whose last session went away so days without activity disappear
+    if empty_keys:
+        await db[ROLLUPS_COLLECTION].delete_many({"$or": empty_keys, "sessionCount": {"$lte": 0}})
+
+
+async def rebuild_rollups(db: AsyncIOMotorDatabase) -> int:
+    """
+    Regenerate the rollup collection from the raw sessions collection.
+    Returns the number of rollup documents written.
+    """
+    pipeline = [
+        {"$match": {"startTime": {"$type": "date"}}},
+        # $last then takes the name of each group's latest session, as incremental writes do
+        {"$sort": {"startTime": 1}},
+        {
+            "$group": {
+                "_id": {
+                    "day": {"$dateToString": {"format": DAY_FORMAT, "date": "$startTime"}},
+                    "referenceType": {"$ifNull": ["$referenceType", "unknown"]},
+                    "referenceId": {"$ifNull": ["$referenceId", "unknown"]}
+                },
+                "name": {"$last": {"$ifNull": ["$name", "Unknown"]}},
+                "duration": {"$sum": {"$ifNull": ["$duration", 0]}},
+                "sessionCount": {"$sum": 1}
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "day": "$_id.day",
+                "referenceType": "$_id.referenceType",
+                "referenceId": "$_id.referenceId",
+                "name": 1,
+                "duration": 1,
+                "sessionCount": 1
+            }
+        }
+    ]
+
+    # Rows are overwritten in place and stale ones deleted afterwards, so
+    # analytics keep reading complete data while the rebuild runs
+    written: Set[RollupKey] = set()
+    batch: List[dict] = []
+    async for row in db.sessions.aggregate(pipeline, allowDiskUse=True):
+        batch.append(row)
+        if len(batch) >= 1000:
+            await _flush_rebuild_batch(db, batch)
+            written.update(_row_key(row) for row in batch)
+            batch = []
+    if batch:
+        await _flush_rebuild_batch(db, batch)
+        written.update(_row_key(row) for row in batch)
+
+    await delete_documents_except(db[ROLLUPS_COLLECTION], ("day", "referenceType", "referenceId"), written)
+
+    logger.info(f"Rebuilt {len(written)} session rollup documents")
+    return len(written)
+
+
+def _row_key(row: dict) -> RollupKey:
+    return row["day"], row["referenceType"], row["referenceId"]
+
+
+async def _flush_rebuild_batch(db: AsyncIOMotorDatabase, batch: List[dict]) -> None:
+    """Overwrite a batch of regenerated rollups."""
+    operations = [
+        UpdateOne(
+            {"day": row["day"], "referenceType": row["referenceType"], "referenceId": row["referenceId"]},
+            {"$set": {"duration": row["duration"], "sessionCount": row["sessionCount"], "name": row["name"]}},
+            upsert=True
+        )
+        for row in batch
+    ]
+    await db[ROLLUPS_COLLECTION].bulk_write(operations, ordered=False)
+
+
+async def delete_documents_except(collection: AsyncIOMotorCollection, key_fields: Sequence[str], keep: Set[tuple]) -> int:
+    """
+    Delete the documents of a derived collection whose key (the values of
+    `key_fields`) is not in `keep`, i.e. the ones a rebuild did not write.
+    Returns the number deleted.
+    """
+    projection = {field: 1 for field in key_fields}
+    stale: List[ObjectId] = []
+    deleted = 0
+    async for doc in collection.find({}, projection).batch_size(10000):
+        if tuple(doc.get(field) for field in key_fields) not in keep:
+            stale.append(doc["_id"])
+        if len(stale) >= 1000:
+            deleted += (await collection.delete_many({"_id": {"$in": stale}})).deleted_count
+            stale = []
+    if stale:
+        deleted += (await collection.delete_many({"_id": {"$in": stale}})).deleted_count
+    return deleted
@@ -0,0 +1,127 @@
+"""
+Trusted-read responses for documents loaded from MongoDB.
+
+Documents only reach the database through request bodies that were validated
+by their Pydantic model, so reading them back does not need the response_model
+round trip (validate the whole tree, including recursive subtopics, dump it back
+to Python, then encode it). Instead each document is trimmed to the model's
+top-level fields, missing fields get the model default, _id becomes id, and the
+result is encoded in one pass - with orjson when it is installed
+(requirements-optional.txt). Nested values (subtopic trees, GitHub issues) are
+written as stored.
+
+FAST_SERIALIZATION=False returns the plain documents for FastAPI to validate as
+before. Partial documents (a list's selected fields) are always encoded directly,
+since they cannot pass response_model validation. VALIDATE_READS=True keeps the trusted path but validates every document
+against its model first, so tests fail loudly on stored data that has drifted.
+"""
+import json
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Mapping, Optional, Type, Union
+
+from bson import ObjectId
+from fastapi import Response
+from fastapi.responses import JSONResponse, ORJSONResponse
+from pydantic import BaseModel
+from pydantic_core import to_jsonable_python
+
+from app.core.config import settings
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional dependency
+    orjson = None
+
+
+def default_response_class() -> Type[JSONResponse]:
+    """ORJSONResponse when orjson is installed, the stock JSONResponse otherwise."""
+    return ORJSONResponse if orjson is not None else JSONResponse
+
+
+def trusted_reads_enabled() -> bool:
+    return settings.FAST_SERIALIZATION
+
+
+def _encode_bson(value: Any) -> Any:
+    """JSON fallback for BSON types the encoder does not know."""
+    if isinstance(value, ObjectId):
+        return str(value)
+    if orjson is None and isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def dump_json(content: Any) -> bytes:
+    if orjson is not None:
+        return orjson.dumps(content, default=_encode_bson)
+    return json.dumps(content, default=_encode_bson, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+class DocumentSerializer:
+    """
+    Responses for stored documents of one model. `serialize` is the route's
+    _id -> id conversion, used when the document is left to response_model.
+    """
+
+    def __init__(self, model: Type[BaseModel], serialize: Callable[[dict], dict]):
+        self.model = model
+        self.serialize = serialize
+        self.fields: List[str] = [name for name in model.model_fields if name != "id"]
+        self.defaults: Dict[str, Any] = {}
+        self.factories: Dict[str, Callable[[], Any]] = {}
+
+        for name in self.fields:
+            field = model.model_fields[name]
+            if field.is_required():
+                continue
+            if field.default_factory is not None:
+                self.factories[name] = field.default_factory
+            else:
+                self.defaults[name] = to_jsonable_python(field.default)
+
+    def prepare(self, document: dict, fields: Optional[List[str]] = None) -> dict:
+        """
+        `document` shaped like the model's JSON: id first, model fields only
+        (only `fields` when given, for partial documents).
+        """
+        prepared = {"id": str(document["_id"])} if "_id" in document else {}
+        for name in self.fields if fields is None else fields:
+            if name in document:
+                prepared[name] = document[name]
+            elif name in self.defaults:
+                prepared[name] = self.defaults[name]
+            elif name in self.factories:
+                prepared[name] = to_jsonable_python(self.factories[name]())
+
+        if settings.VALIDATE_READS and fields is None:
+            self.model.model_validate(prepared)
+        return prepared
+
+    def render(self, documents: Iterable[dict], fields: Optional[List[str]] = None) -> bytes:
+        return dump_json([self.prepare(document, fields) for document in documents])
+
+    def response(
+        self,
+        document: dict,
+        status_code: int = 200,
+        headers: Optional[Mapping[str, str]] = None
+    ) -> Union[Response, dict]:
+        if not trusted_reads_enabled():
+            return self.serialize(document)
+        return Response(
+            content=dump_json(self.prepare(document)),
+            status_code=status_code,
+            media_type="application/json",
+            headers=headers
+        )
+
+    def list_response(
+        self,
+        documents: List[dict],
+        headers: Optional[Mapping[str, str]] = None,
+        fields: Optional[List[str]] = None
+    ) -> Union[Response, List[dict]]:
+        """Whole documents, or only `fields` of each (see ListView.select)."""
+        if fields is None and not trusted_reads_enabled():
+            return [self.serialize(document) for document in documents]
+        return Response(content=self.render(documents, fields), media_type="application/json", headers=headers)
@@ -0,0 +1,195 @@
+"""
+Bulk session import.
+
+Parses CSV, JSON lines or iCalendar exports from other time trackers into
+session documents ready for insert_many. Every row is normalised in a single
+pre-pass (times to naive UTC, duration, date, uniqueId) and rows that cannot
+become a valid session are reported by row number instead of failing the
+whole import.
+"""
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterator, List, Optional, Tuple
+import csv
+import io
+import json
+
+from dateutil import parser as date_parser
+from pydantic import ValidationError
+
+from app.models.session import Session, generate_session_id
+
+IMPORT_FORMATS = ("csv", "jsonl", "ics")
+
+# Columns holding several values in CSV files
+CSV_LIST_SEPARATOR = ";"
+
+# iCalendar property -> session field
+ICS_FIELDS = {
+    "SUMMARY": "name",
+    "DTSTART": "startTime",
+    "DTEND": "endTime",
+    "DESCRIPTION": "notes",
+    "CATEGORIES": "tags",
+    "X-REFERENCE-TYPE": "referenceType",
+    "X-REFERENCE-ID": "referenceId",
+    "X-SESSION-TYPE": "sessionType",
+}
+
+
+def detect_format(filename: Optional[str], content_type: Optional[str]) -> Optional[str]:
+    """Guess the import format from the upload's filename or content type."""
+    name = (filename or "").lower()
+    content_type = (content_type or "").lower()
+    if name.endswith(".csv") or "csv" in content_type:
+        return "csv"
+    if name.endswith((".jsonl", ".ndjson", ".json")) or "json" in content_type:
+        return "jsonl"
+    if name.endswith((".ics", ".ical")) or "calendar" in content_type:
+        return "ics"
+    return None
+
+
+def parse_rows(text: str, file_format: str) -> Iterator[Tuple[int, dict]]:
+    """Yield (row number, raw field dict) for each record; row numbers start at 1."""
+    if file_format == "csv":
+        for number, row in enumerate(csv.DictReader(io.StringIO(text)), start=1):
+            yield number, {key.strip(): value for key, value in row.items() if key and value not in (None, "")}
+    elif file_format == "jsonl":
+        for number, line in enumerate((line for line in text.splitlines() if line.strip()), start=1):
+            try:
+                row = json.loads(line)
+            except ValueError as e:
+                row = {"__error__": f"Invalid JSON: {e}"}
+            yield number, row if isinstance(row, dict) else {"__error__": "Expected a JSON object"}
+    else:
+        yield from enumerate(_parse_ics_events(text), start=1)
+
+
+def _unfold_ics_lines(text: str) -> Iterator[str]:
+    """Join RFC 5545 folded lines (continuations start with a space or tab)."""
+    current = None
+    for line in text.splitlines():
+        if line[:1] in (" ", "\t") and current is not None:
+            current += line[1:]
+            continue
+        if current is not None:
+            yield current
+        current = line
+    if current is not None:
+        yield current
+
+
+def _unescape_ics(value: str) -> str:
+    return value.replace("\\n", "\n").replace("\\N", "\n").replace("\\,", ",").replace("\\;", ";").replace("\\\\", "\\")
+
+
+def _parse_ics_events(text: str) -> Iterator[dict]:
+    event = None
+    for line in _unfold_ics_lines(text):
+        if line == "BEGIN:VEVENT":
+            event = {}
+        elif line == "END:VEVENT":
+            if event is not None:
+                yield event
+            event = None
+        elif event is not None and ":" in line:
+            head, value = line.split(":", 1)
+            # Property parameters (VALUE=DATE, TZID=...) are ignored; TZID times are taken as UTC
+            field = ICS_FIELDS.get(head.split(";")[0].upper())
+            if not field:
+                continue
+            if field == "tags":
+                event[field] = [_unescape_ics(tag) for tag in value.split(",") if tag]
+            elif field in ("startTime", "endTime"):
+                event[field] = value
+            else:
+                event[field] = _unescape_ics(value)
+
+
+def _parse_datetime(value) -> Optional[datetime]:
+    """Parse a timestamp into a naive UTC datetime (how sessions are stored)."""
+    if value in (None, ""):
+        return None
+    if isinstance(value, datetime):
+        parsed = value
+    else:
+        value = str(value).strip()
+        try:
+            parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            parsed = date_parser.parse(value)
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def prepare_session(row: dict, defaults: Dict[str, str]) -> dict:
+    """
+    Turn one raw import row into a session document, as create_session would store it.
+    Raises ValueError/ValidationError for rows that cannot become a session.
+    """
+    if "__error__" in row:
+        raise ValueError(row["__error__"])
+
+    data = {**defaults, **{key: value for key, value in row.items() if key not in ("id", "_id")}}
+
+    start = _parse_datetime(data.get("startTime"))
+    if start is None:
+        raise ValueError("startTime is required")
+    end = _parse_datetime(data.get("endTime"))
+
+    duration = data.get("duration")
+    if end is not None:
+        duration = int((end - start).total_seconds() / 60)
+    elif duration not in (None, ""):
+        # Imported sessions are finished; rebuild the end time from the duration
+        duration = int(float(duration))
+        end = start + timedelta(minutes=duration)
+    else:
+        raise ValueError("endTime or duration is required")
+    if duration < 0:
+        raise ValueError("endTime is before startTime")
+
+    tags = data.get("tags") or []
+    if isinstance(tags, str):
+        tags = [tag.strip() for tag in tags.split(CSV_LIST_SEPARATOR) if tag.strip()]
+
+    reference_type = data.get("referenceType")
+    data.update({
+        "startTime": start,
+        "endTime": end,
+        "duration": duration,
+        "date": _parse_datetime(data.get("date")) or start.replace(hour=0, minute=0, second=0, microsecond=0),
+        "tags": tags,
+        "sessionType": data.get("sessionType") or ("practice" if reference_type == "practice_platform" else "study"),
+        "manualEntry": str(data.get("manualEntry", True)).lower() not in ("false", "0", "no"),
+    })
+
+    session_dict = Session.model_validate(data).model_dump(exclude={"id"})
+    # model_dump keeps enums; store their values like the JSON API does
+    for field in ("referenceType", "sessionType"):
+        session_dict[field] = getattr(session_dict[field], "value", session_dict[field])
+    session_dict["createdAt"] = datetime.utcnow()
+    if not session_dict.get("uniqueId"):
+        session_dict["uniqueId"] = generate_session_id(session_dict["referenceType"], session_dict["name"])
+    return session_dict
+
+
+def prepare_sessions(
+    rows: Iterator[Tuple[int, dict]],
+    defaults: Dict[str, str]
+) -> Tuple[List[Tuple[int, dict]], List[dict]]:
+    """Normalise every row; returns ([(row number, session document)], [row errors])."""
+    documents = []
+    errors = []
+    for number, row in rows:
+        try:
+            documents.append((number, prepare_session(row, defaults)))
+        except ValidationError as e:
+            details = "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()
+            )
+            errors.append({"row": number, "error": details})
+        except (ValueError, TypeError, OverflowError) as e:
+            errors.append({"row": number, "error": str(e)})
+    return documents, errors
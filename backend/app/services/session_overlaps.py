@@ -0,0 +1,183 @@
+"""
+Overlap detection and merging for sessions.
+
+Session [s, e) overlaps [start, end) when s < end and e > start. The startTime
+index answers s < end, and a lower bound of start minus the longest finished
+session ever stored (kept in analytics_state) turns that into a bounded range,
+so a lookup reads O(log n + k) index entries instead of every earlier session.
+Running sessions have no endTime and are found through the active_session index.
+
+The longest span only ever grows on writes, so deletes leave it a valid upper
+bound; it is computed from the sessions on first use and by
+`python -m migrations.rebuild_analytics spans`.
+"""
+from datetime import datetime, timedelta
+import math
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.core.database import ACTIVE_SESSION_FILTER
+from app.services.streaks import STATE_COLLECTION
+
+SPAN_STATE_ID = "session_span"
+
+OVERLAP_PROJECTION = {"startTime": 1, "endTime": 1, "referenceType": 1, "referenceId": 1, "name": 1}
+
+# The exact reverse of the (referenceId 1, startTime -1) index, so merge scans need no in-memory sort
+MERGE_SORT = [("referenceId", -1), ("startTime", 1)]
+
+
+def session_span(session_doc: dict) -> Optional[timedelta]:
+    """endTime - startTime for a finished session, None for a running one."""
+    start = session_doc.get("startTime")
+    end = session_doc.get("endTime")
+    if isinstance(start, datetime) and isinstance(end, datetime):
+        return end - start
+    return None
+
+
+async def rebuild_longest_span(db: AsyncIOMotorDatabase) -> int:
+    """Recompute the longest finished session (in whole seconds, rounded up) from the sessions."""
+    result = await db.sessions.aggregate([
+        {"$match": {"startTime": {"$type": "date"}, "endTime": {"$type": "date"}}},
+        {"$group": {"_id": None, "maxMillis": {"$max": {"$subtract": ["$endTime", "$startTime"]}}}}
+    ]).to_list(1)
+    max_seconds = math.ceil(result[0]["maxMillis"] / 1000) if result and result[0]["maxMillis"] else 0
+
+    await db[STATE_COLLECTION].replace_one(
+        {"_id": SPAN_STATE_ID},
+        {"_id": SPAN_STATE_ID, "maxSeconds": max_seconds},
+        upsert=True
+    )
+    return max_seconds
+
+
+async def longest_span(db: AsyncIOMotorDatabase) -> timedelta:
+    state = await db[STATE_COLLECTION].find_one({"_id": SPAN_STATE_ID})
+    if state is None:
+        return timedelta(seconds=await rebuild_longest_span(db))
+    return timedelta(seconds=state["maxSeconds"])
+
+
+async def note_session_spans(db: AsyncIOMotorDatabase, added: Iterable[dict]) -> None:
+    """Grow the stored longest span to cover `added`."""
+    spans = [span for span in (session_span(doc) for doc in added) if span is not None]
+    if not spans:
+        return
+    max_seconds = math.ceil(max(spans).total_seconds())
+    # No upsert: without state the first lookup rebuilds it from the sessions, these included
+    await db[STATE_COLLECTION].update_one({"_id": SPAN_STATE_ID}, {"$max": {"maxSeconds": max_seconds}})
+
+
+async def find_overlapping_sessions(
+    db: AsyncIOMotorDatabase,
+    start: datetime,
+    end: Optional[datetime] = None,
+    exclude: Optional[ObjectId] = None,
+    limit: int = 20
+) -> List[dict]:
+    """
+    Sessions overlapping [start, end), oldest first. A running interval
+    (`end` None) extends to now. Touching sessions do not overlap.
+    """
+    end = end or max(start, datetime.utcnow())
+    span = await longest_span(db)
+
+    query = {"$or": [
+        {"startTime": {"$gte": start - span, "$lt": end}, "endTime": {"$gt": start}},
+        {**ACTIVE_SESSION_FILTER, "startTime": {"$lt": end}},
+    ]}
+    if exclude is not None:
+        query["_id"] = {"$ne": exclude}
+
+    return await db.sessions.find(query, OVERLAP_PROJECTION).sort("startTime", 1).to_list(limit)
+
+
+def merge_group(group: List[dict]) -> dict:
+    """
+    One session covering every session in `group` (same reference, sorted by
+    startTime). It keeps the first session's _id and fields; notes and tags are combined.
+    """
+    merged = dict(group[0])
+    end = max(doc["endTime"] for doc in group)
+    merged["endTime"] = end
+    merged["duration"] = int((end - merged["startTime"]).total_seconds() / 60)
+
+    notes = []
+    tags = []
+    for doc in group:
+        if doc.get("notes") and doc["notes"] not in notes:
+            notes.append(doc["notes"])
+        for tag in doc.get("tags") or []:
+            if tag not in tags:
+                tags.append(tag)
+    merged["notes"] = "\n".join(notes)
+    merged["tags"] = tags
+    merged["manualEntry"] = all(doc.get("manualEntry", False) for doc in group)
+    return merged
+
+
+def overlap_runs(docs: Iterable[dict], gap: timedelta = timedelta(0)) -> List[List[dict]]:
+    """
+    Runs of two or more finished sessions in `docs` (sorted by startTime) for the
+    same reference whose intervals overlap or are separated by at most `gap`.
+    """
+    runs = []
+    run: List[dict] = []
+    run_key: Tuple[str, str] = ("", "")
+    run_end: Optional[datetime] = None
+
+    for doc in docs:
+        key = (doc.get("referenceType"), doc.get("referenceId"))
+        if run and key == run_key and doc["startTime"] <= run_end + gap:
+            run.append(doc)
+            run_end = max(run_end, doc["endTime"])
+            continue
+
+        if len(run) > 1:
+            runs.append(run)
+        run, run_key, run_end = [doc], key, doc["endTime"]
+
+    if len(run) > 1:
+        runs.append(run)
+    return runs
+
+
+async def find_mergeable_groups(
+    db: AsyncIOMotorDatabase,
+    query: dict,
+    gap: timedelta = timedelta(0)
+) -> List[List[dict]]:
+    """
+    Runs of finished sessions matching `query` for the same reference whose
+    intervals overlap or are separated by at most `gap`. Sessions are streamed
+    by referenceId descending and startTime ascending, the reverse of the
+    (referenceId 1, startTime -1) index, so each reference's sessions arrive
+    oldest first; only one reference is held in memory at a time.
+    """
+    query = {**query, "startTime": {**query.get("startTime", {}), "$type": "date"}, "endTime": {"$type": "date"}}
+    cursor = db.sessions.find(query).sort(MERGE_SORT).batch_size(1000)
+
+    groups = []
+    reference: List[dict] = []
+    async for doc in cursor:
+        if reference and doc.get("referenceId") != reference[-1].get("referenceId"):
+            groups.extend(overlap_runs(reference, gap))
+            reference = []
+        reference.append(doc)
+
+    groups.extend(overlap_runs(reference, gap))
+    return groups
+
+
+def merge_summary(group: List[dict], merged: dict) -> Dict:
+    return {
+        "id": str(merged["_id"]),
+        "mergedIds": [str(doc["_id"]) for doc in group[1:]],
+        "referenceId": merged.get("referenceId"),
+        "startTime": merged["startTime"].isoformat(),
+        "endTime": merged["endTime"].isoformat(),
+        "duration": merged["duration"],
+    }
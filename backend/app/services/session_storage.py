@@ -0,0 +1,137 @@
+"""
+Session writes for both storage backends (SESSION_STORAGE).
+
+"collection" keeps sessions in a regular collection and writes them with single
+atomic commands. "timeseries" keeps them in a MongoDB time-series collection
+(see SESSIONS_TIMESERIES in app/core/database.py), which stores a reference's
+sessions in compressed time buckets. Documents keep the same shape, so reads and
+aggregations do not change, but time-series collections have no findAndModify,
+no unique indexes and no in-place updates of non-meta fields, so there:
+- updates read the session, insert the new version with the same _id, then
+  delete the old version, matched by the old values of the fields that changed;
+  a failure in between leaves both versions rather than losing the session;
+- deletes read the session, then delete it (every version of it);
+- the one-running-session rule is checked before the write instead of by the
+  unique active_session index, and reported the same way (DuplicateKeyError).
+Time-series writes are therefore not atomic; a single user does not race itself.
+
+Convert an existing database with `python -m migrations.sessions_to_timeseries`.
+"""
+from typing import Dict, List, Optional
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import DeleteMany, ReplaceOne, ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+from app.core.config import settings
+from app.core.database import ACTIVE_SESSION_FILTER
+from app.services.crud import as_stored, insert_document, update_document
+
+
+def timeseries_enabled() -> bool:
+    return settings.SESSION_STORAGE == "timeseries"
+
+
+_MISSING = object()
+
+
+def _old_version_filter(before: dict, after: dict) -> Optional[Dict]:
+    """
+    Filter matching `before` but not `after`, two versions of one session: the
+    _id and the old values of every field that differs. None when none does.
+    """
+    changed = {}
+    for field in before.keys() | after.keys():
+        old = before.get(field, _MISSING)
+        if field != "_id" and old != after.get(field, _MISSING):
+            changed[field] = {"$exists": False} if old is _MISSING else old
+    return {"_id": before["_id"], **changed} if changed else None
+
+
+async def _check_not_running(db: AsyncIOMotorDatabase, session_doc: dict, exclude: Optional[ObjectId] = None) -> None:
+    """DuplicateKeyError, like the active_session index, when `session_doc` would be a second running session."""
+    if session_doc.get("endTime"):
+        return
+    query = dict(ACTIVE_SESSION_FILTER)
+    if exclude is not None:
+        query["_id"] = {"$ne": exclude}
+    if await db.sessions.find_one(query, {"_id": 1}):
+        raise DuplicateKeyError("Another session is already running", code=11000)
+
+
+async def insert_session_document(db: AsyncIOMotorDatabase, session_doc: dict) -> dict:
+    """Insert a session and return it as stored."""
+    if timeseries_enabled():
+        await _check_not_running(db, session_doc)
+    return await insert_document(db.sessions, session_doc)
+
+
+async def update_session_document(db: AsyncIOMotorDatabase, oid: ObjectId, fields: dict, not_found: str) -> dict:
+    """Set `fields` on a session and return the session as it was before; 404 with `not_found`."""
+    if not timeseries_enabled():
+        return await update_document(
+            db.sessions, oid, {"$set": fields}, not_found,
+            return_document=ReturnDocument.BEFORE
+        )
+
+    before = await db.sessions.find_one({"_id": oid})
+    if before is None:
+        raise HTTPException(status_code=404, detail=not_found)
+    after = as_stored({**before, **fields})
+    if before.get("endTime"):
+        await _check_not_running(db, after, exclude=oid)
+
+    old_version = _old_version_filter(before, after)
+    if old_version is not None:
+        # Time-series collections accept a second document with the same _id,
+        # so the new version is stored before the old one is removed
+        await db.sessions.insert_one(after)
+        await db.sessions.delete_many(old_version)
+    return before
+
+
+async def delete_session_document(db: AsyncIOMotorDatabase, oid: ObjectId) -> Optional[dict]:
+    """Delete a session and return it, or None when there is no such session."""
+    if not timeseries_enabled():
+        return await db.sessions.find_one_and_delete({"_id": oid})
+
+    session_doc = await db.sessions.find_one({"_id": oid})
+    if session_doc is not None:
+        await db.sessions.delete_many({"_id": oid})
+    return session_doc
+
+
+async def merge_session_documents(
+    db: AsyncIOMotorDatabase,
+    originals: List[dict],
+    replacements: List[dict],
+    removed_ids: List[ObjectId]
+) -> None:
+    """
+    Store each of `replacements` over the session with its _id (`originals`,
+    in the same order, as they were read) and delete `removed_ids`.
+    """
+    if not timeseries_enabled():
+        operations = [ReplaceOne({"_id": doc["_id"]}, doc) for doc in replacements]
+        if removed_ids:
+            operations.append(DeleteMany({"_id": {"$in": removed_ids}}))
+        if operations:
+            await db.sessions.bulk_write(operations, ordered=False)
+        return
+
+    # As for updates: new versions first, then the old versions and the merged-away sessions
+    changed = [
+        (replacement, old_version)
+        for original, replacement in zip(originals, replacements)
+        for old_version in [_old_version_filter(original, as_stored(replacement))]
+        if old_version is not None
+    ]
+    if changed:
+        await db.sessions.insert_many([replacement for replacement, _ in changed], ordered=False)
+    stale = [old_version for _, old_version in changed]
+    if removed_ids:
+        stale.append({"_id": {"$in": removed_ids}})
+    if stale:
+        await db.sessions.delete_many({"$or": stale})
@@ -0,0 +1,77 @@
+"""
+Derived-data maintenance for session writes.
+
+Session routes call into here after every insert, update or delete so that
+the collections derived from sessions stay in step with the raw data.
+"""
+from datetime import datetime
+from typing import Iterable, Optional
+
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.columnar import apply_session_columns
+from app.services.reference_stats import collect_reference_deltas, apply_reference_deltas
+from app.services.events import notify_active_session, notify_write
+from app.services.rollups import collect_rollup_deltas, apply_rollup_deltas
+from app.services.session_overlaps import note_session_spans
+from app.services.sketches import collect_sketch_deltas, apply_sketch_deltas
+from app.services.streaks import apply_activity_changes
+
+
+async def sync_session_changes(
+    db: AsyncIOMotorDatabase,
+    removed: Iterable[dict] = (),
+    added: Iterable[dict] = ()
+) -> None:
+    """Propagate a batch of removed/added session documents to derived data."""
+    removed = list(removed)
+    added = list(added)
+
+    deltas = collect_rollup_deltas(removed, added)
+    await apply_rollup_deltas(db, deltas)
+    await apply_activity_changes(db, {day for day, _, _ in deltas})
+    await apply_sketch_deltas(db, collect_sketch_deltas(removed, added))
+    await apply_reference_deltas(db, collect_reference_deltas(removed, added))
+    await note_session_spans(db, added)
+    apply_session_columns(removed, added)
+
+    # Derived data is current again, so cached analytics built on it can go
+    if removed and added:
+        action = "updated"
+    else:
+        action = "created" if added else "deleted"
+    changed = added or removed
+    notify_write("sessions", action, str(changed[0]["_id"]) if len(changed) == 1 else None)
+
+
+def active_session_event(session_doc: dict) -> dict:
+    """A session as the API returns it, with datetimes as ISO strings for the event stream."""
+    event = {"id": str(session_doc["_id"])}
+    for key, value in session_doc.items():
+        if key != "_id":
+            event[key] = value.isoformat() if isinstance(value, datetime) else value
+    return event
+
+
+async def sync_session_write(
+    db: AsyncIOMotorDatabase,
+    before: Optional[dict] = None,
+    after: Optional[dict] = None
+) -> None:
+    """
+    Propagate a single session write.
+    Create passes only `after`, delete only `before`, update passes both.
+    """
+    await sync_session_changes(
+        db,
+        removed=[before] if before else [],
+        added=[after] if after else []
+    )
+
+    # Sessions without an endTime are running timers
+    was_active = bool(before) and not before.get("endTime")
+    is_active = bool(after) and not after.get("endTime")
+    if is_active and not was_active:
+        notify_active_session("started", active_session_event(after))
+    elif was_active and not is_active:
+        notify_active_session("stopped", active_session_event(before))
@@ -0,0 +1,254 @@
+"""
+Session-length sketches.
+
+Session durations (minutes) are counted into fixed logarithmic buckets, one
+histogram per (month, scope) where the scope is every session, a
+referenceType, or a single reference. Because the buckets are fixed, sketches
+can be updated with $inc on every session write (including removals) and
+merged by adding counts, and any quantile read back from them is within
+SKETCH_RELATIVE_ACCURACY of the true value.
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional, Tuple
+import logging
+import math
+
+from pymongo import ReplaceOne, UpdateOne
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.rollups import delete_documents_except, session_reference_type
+
+logger = logging.getLogger(__name__)
+
+SKETCHES_COLLECTION = "session_length_sketches"
+MONTH_FORMAT = "%Y-%m"
+
+# Bucket i holds durations in (GAMMA^(i-1), GAMMA^i]; bucket 0 holds durations <= 1 minute
+SKETCH_GAMMA = 1.1
+SKETCH_RELATIVE_ACCURACY = (SKETCH_GAMMA - 1) / (SKETCH_GAMMA + 1)
+_LOG_GAMMA = math.log(SKETCH_GAMMA)
+
+# Display histogram bins (minutes); the last bin is open-ended
+HISTOGRAM_EDGES = [0, 15, 30, 45, 60, 90, 120, 180, 240]
+
+QUANTILES = {"p50": 0.5, "p90": 0.9, "p99": 0.99}
+
+# (month, referenceType or None, referenceId or None)
+SketchKey = Tuple[str, Optional[str], Optional[str]]
+
+
+def month_key(value) -> str:
+    """Format a datetime/date as the sketch month key (UTC, YYYY-MM)."""
+    return value.strftime(MONTH_FORMAT)
+
+
+def bucket_index(duration: float) -> int:
+    """Sketch bucket for a duration in minutes."""
+    if duration <= 1:
+        return 0
+    return int(math.ceil(math.log(duration) / _LOG_GAMMA))
+
+
+def bucket_value(index: int) -> float:
+    """Representative duration of a bucket (relative error <= SKETCH_RELATIVE_ACCURACY)."""
+    if index <= 0:
+        return 1.0
+    return 2 * SKETCH_GAMMA ** index / (SKETCH_GAMMA + 1)
+
+
+def session_sketch_keys(session_doc: dict) -> List[SketchKey]:
+    """Every sketch a session counts towards, or [] if it has no startTime."""
+    start_time = session_doc.get("startTime")
+    if not start_time:
+        return []
+    month = month_key(start_time)
+    ref_type = session_reference_type(session_doc)
+    return [
+        (month, None, None),
+        (month, ref_type, None),
+        (month, ref_type, session_doc.get("referenceId") or "unknown"),
+    ]
+
+
+def collect_sketch_deltas(
+    removed: Iterable[dict],
+    added: Iterable[dict]
+) -> Dict[SketchKey, dict]:
+    """Fold removed/added session documents into per-sketch count deltas."""
+    deltas: Dict[SketchKey, dict] = {}
+
+    for sign, docs in ((-1, removed), (1, added)):
+        for doc in docs:
+            duration = doc.get("duration") or 0
+            bucket = str(bucket_index(duration))
+            for key in session_sketch_keys(doc):
+                delta = deltas.setdefault(
+                    key, {"count": 0, "totalDuration": 0, "buckets": Counter(), "name": None}
+                )
+                delta["count"] += sign
+                delta["totalDuration"] += sign * duration
+                delta["buckets"][bucket] += sign
+                if sign > 0 and key[2] is not None and doc.get("name"):
+                    delta["name"] = doc["name"]
+
+    return deltas
+
+
+def _sketch_filter(key: SketchKey) -> dict:
+    month, ref_type, ref_id = key
+    return {"month": month, "referenceType": ref_type, "referenceId": ref_id}
+
+
+async def apply_sketch_deltas(db: AsyncIOMotorDatabase, deltas: Dict[SketchKey, dict]) -> None:
+    """Apply per-sketch deltas in a single bulk write."""
+    operations = []
+    empty_keys = []
+
+    for key, delta in deltas.items():
+        increments = {f"buckets.{bucket}": count for bucket, count in delta["buckets"].items() if count}
+        if delta["count"]:
+            increments["count"] = delta["count"]
+        if delta["totalDuration"]:
+            increments["totalDuration"] = delta["totalDuration"]
+        if not increments and not delta["name"]:
+            continue
+
+        update = {"$inc": increments} if increments else {}
+        if delta["name"]:
+            update["$set"] = {"name": delta["name"]}
+
+        operations.append(UpdateOne(_sketch_filter(key), update, upsert=True))
+        if delta["count"] < 0:
+            empty_keys.append(_sketch_filter(key))
+
+    if not operations:
+        return
+
+    await db[SKETCHES_COLLECTION].bulk_write(operations, ordered=False)
+
+    if empty_keys:
+        await db[SKETCHES_COLLECTION].delete_many({"$or": empty_keys, "count": {"$lte": 0}})
+
+
+async def rebuild_sketches(db: AsyncIOMotorDatabase) -> int:
+    """
+    Regenerate the sketch collection from the raw sessions collection.
+    Returns the number of sketch documents written.
+    """
+    projection = {"startTime": 1, "duration": 1, "referenceType": 1, "referenceId": 1, "name": 1}
+    deltas: Dict[SketchKey, dict] = {}
+
+    batch: List[dict] = []
+    async for doc in db.sessions.find({"startTime": {"$type": "date"}}, projection).batch_size(10000):
+        batch.append(doc)
+        if len(batch) >= 10000:
+            _merge_deltas(deltas, collect_sketch_deltas((), batch))
+            batch = []
+    _merge_deltas(deltas, collect_sketch_deltas((), batch))
+
+    # Sketches are overwritten in place and stale ones deleted afterwards, so
+    # analytics keep reading complete data while the rebuild runs
+    items = list(deltas.items())
+    for offset in range(0, len(items), 1000):
+        operations = [
+            ReplaceOne(_sketch_filter(key), _sketch_document(key, sketch), upsert=True)
+            for key, sketch in items[offset:offset + 1000]
+        ]
+        await db[SKETCHES_COLLECTION].bulk_write(operations, ordered=False)
+
+    await delete_documents_except(db[SKETCHES_COLLECTION], ("month", "referenceType", "referenceId"), set(deltas))
+
+    logger.info(f"Rebuilt {len(items)} session-length sketch documents")
+    return len(items)
+
+
+def _sketch_document(key: SketchKey, sketch: dict) -> dict:
+    """A whole sketch document from the totals collected by a rebuild."""
+    document = {
+        **_sketch_filter(key),
+        "count": sketch["count"],
+        "totalDuration": sketch["totalDuration"],
+        "buckets": {bucket: count for bucket, count in sketch["buckets"].items() if count},
+    }
+    if sketch["name"]:
+        document["name"] = sketch["name"]
+    return document
+
+
+def _merge_deltas(target: Dict[SketchKey, dict], source: Dict[SketchKey, dict]) -> None:
+    for key, delta in source.items():
+        existing = target.get(key)
+        if existing is None:
+            target[key] = delta
+            continue
+        existing["count"] += delta["count"]
+        existing["totalDuration"] += delta["totalDuration"]
+        existing["buckets"].update(delta["buckets"])
+        existing["name"] = delta["name"] or existing["name"]
+
+
+def merge_sketches(docs: Iterable[dict]) -> dict:
+    """Add sketch documents (e.g. several months of one scope) into one."""
+    merged = {"count": 0, "totalDuration": 0, "buckets": Counter()}
+    for doc in docs:
+        merged["count"] += doc.get("count", 0)
+        merged["totalDuration"] += doc.get("totalDuration", 0)
+        merged["buckets"].update({
+            bucket: count for bucket, count in doc.get("buckets", {}).items() if count > 0
+        })
+    return merged
+
+
+def sketch_quantile(buckets: Dict[str, int], count: int, q: float) -> Optional[float]:
+    """Approximate q-quantile (minutes) of a sketch."""
+    if count <= 0:
+        return None
+    rank = q * (count - 1)
+    seen = 0
+    for bucket in sorted(buckets, key=int):
+        seen += buckets[bucket]
+        if seen > rank:
+            return round(bucket_value(int(bucket)), 1)
+    return round(bucket_value(max(int(bucket) for bucket in buckets)), 1)
+
+
+def sketch_histogram(buckets: Dict[str, int]) -> List[dict]:
+    """Re-bin a sketch into the display histogram (by each bucket's representative value)."""
+    counts = [0] * len(HISTOGRAM_EDGES)
+    for bucket, count in buckets.items():
+        value = bucket_value(int(bucket))
+        position = len(HISTOGRAM_EDGES) - 1
+        while position > 0 and value < HISTOGRAM_EDGES[position]:
+            position -= 1
+        counts[position] += count
+
+    return [
+        {
+            "minMinutes": low,
+            "maxMinutes": HISTOGRAM_EDGES[i + 1] if i + 1 < len(HISTOGRAM_EDGES) else None,
+            "count": counts[i]
+        }
+        for i, low in enumerate(HISTOGRAM_EDGES)
+    ]
+
+
+def sketch_summary(sketch: dict, histogram: bool = True) -> dict:
+    """Count, mean, quantiles and (optionally) display histogram of a merged sketch."""
+    count = sketch["count"]
+    summary = {
+        "count": count,
+        "totalDuration": sketch["totalDuration"],
+        "mean": round(sketch["totalDuration"] / count, 1) if count > 0 else None,
+        **{name: sketch_quantile(sketch["buckets"], count, q) for name, q in QUANTILES.items()}
+    }
+    if histogram:
+        summary["histogram"] = sketch_histogram(sketch["buckets"])
+    return summary
+
+
+def months_ago(months: int, now: Optional[datetime] = None) -> str:
+    """Month key `months - 1` months before the current one (so 1 = this month)."""
+    now = now or datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - (months - 1)
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
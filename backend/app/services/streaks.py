@@ -0,0 +1,247 @@
+"""
+Persisted activity streak state.
+
+A single document tracks the current run, the longest run, the last active day
+and a bitmap with one bit per calendar day since the first recorded activity.
+Appending activity for today/tomorrow is O(1); removals and back-dated entries
+fall back to a scan of the bitmap, which stays tiny (one byte per 8 days).
+
+Every write bumps the document's `version`, and incremental updates only replace
+the version they read, so concurrent session writes retry instead of dropping
+each other's bits.
+"""
+from datetime import date, datetime, timedelta
+from typing import Iterable, List, Optional, Set
+
+from bson import Binary
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import ReturnDocument
+
+from app.services.rollups import ROLLUPS_COLLECTION, day_key, parse_day
+
+STATE_COLLECTION = "analytics_state"
+STREAK_STATE_ID = "streaks"
+
+# Conflicting incremental updates before falling back to a full rebuild
+STREAK_WRITE_ATTEMPTS = 5
+
+
+class ActivityBitmap:
+    """One bit per day, starting at `origin`."""
+
+    def __init__(self, origin: Optional[date] = None, data: bytes = b""):
+        self.origin = origin
+        self.data = bytearray(data)
+
+    def _index(self, day: date) -> int:
+        return (day - self.origin).days
+
+    def _ensure(self, day: date) -> None:
+        """Grow the bitmap so that `day` is addressable."""
+        if self.origin is None:
+            self.origin = day
+        if day < self.origin:
+            # Prepend whole bytes so existing bit positions shift by a multiple of 8
+            shift_bytes = -(-(self.origin - day).days // 8)
+            self.data[0:0] = bytes(shift_bytes)
+            self.origin -= timedelta(days=shift_bytes * 8)
+        index = self._index(day)
+        if index // 8 >= len(self.data):
+            self.data.extend(bytes(index // 8 + 1 - len(self.data)))
+
+    def get(self, day: date) -> bool:
+        if self.origin is None or day < self.origin:
+            return False
+        index = self._index(day)
+        if index // 8 >= len(self.data):
+            return False
+        return bool(self.data[index // 8] & (1 << (index % 8)))
+
+    def set(self, day: date, active: bool) -> None:
+        if active:
+            self._ensure(day)
+            index = self._index(day)
+            self.data[index // 8] |= 1 << (index % 8)
+        elif self.get(day):
+            index = self._index(day)
+            self.data[index // 8] &= ~(1 << (index % 8)) & 0xFF
+
+    def last_active(self) -> Optional[date]:
+        for byte_index in range(len(self.data) - 1, -1, -1):
+            byte = self.data[byte_index]
+            if byte:
+                return self.origin + timedelta(days=byte_index * 8 + byte.bit_length() - 1)
+        return None
+
+    def run_ending_at(self, day: date) -> int:
+        """Length of the run of active days ending at `day`."""
+        length = 0
+        while self.get(day):
+            length += 1
+            day -= timedelta(days=1)
+        return length
+
+    def longest_run(self) -> int:
+        longest = 0
+        current = 0
+        for byte in self.data:
+            if byte == 0:
+                current = 0
+                continue
+            if byte == 0xFF:
+                current += 8
+                longest = max(longest, current)
+                continue
+            for bit in range(8):
+                if byte & (1 << bit):
+                    current += 1
+                    longest = max(longest, current)
+                else:
+                    current = 0
+        return longest
+
+
+def bitmap_from_state(state: dict) -> ActivityBitmap:
+    origin = parse_day(state["origin"]) if state.get("origin") else None
+    return ActivityBitmap(origin, bytes(state.get("bitmap") or b""))
+
+
+def state_from_bitmap(bitmap: ActivityBitmap, run_length: int, longest: int, version: int = 0) -> dict:
+    last_active = bitmap.last_active()
+    return {
+        "_id": STREAK_STATE_ID,
+        "version": version,
+        "origin": day_key(bitmap.origin) if bitmap.origin else None,
+        "bitmap": Binary(bytes(bitmap.data)),
+        "lastActiveDay": day_key(last_active) if last_active else None,
+        "runLength": run_length,
+        "longestStreak": longest,
+        "updatedAt": datetime.utcnow(),
+    }
+
+
+def streaks_response(state: Optional[dict], today: Optional[date] = None) -> dict:
+    """Format a streak state document as the /analytics/streaks payload."""
+    if not state or not state.get("lastActiveDay"):
+        return {
+            "currentStreak": 0,
+            "longestStreak": 0,
+            "lastActivityDate": None
+        }
+
+    today = today or datetime.utcnow().date()
+    last_active = parse_day(state["lastActiveDay"])
+
+    # A run only counts as current while it reaches today or yesterday
+    current = state["runLength"] if (today - last_active).days <= 1 else 0
+
+    return {
+        "currentStreak": current,
+        "longestStreak": state["longestStreak"],
+        "lastActivityDate": last_active.isoformat()
+    }
+
+
+async def get_streak_state(db: AsyncIOMotorDatabase) -> Optional[dict]:
+    return await db[STATE_COLLECTION].find_one({"_id": STREAK_STATE_ID})
+
+
+async def apply_activity_changes(db: AsyncIOMotorDatabase, days: Iterable[str]) -> None:
+    """
+    Refresh the streak state for days whose rollups just changed.
+    Whether a day is active is read back from the rollups, so creates,
+    deletes and moved sessions are all handled the same way.
+    """
+    days = sorted(set(days))
+    if not days:
+        return
+
+    for _ in range(STREAK_WRITE_ATTEMPTS):
+        state = await get_streak_state(db)
+        if state is None:
+            # No state yet (e.g. first run against existing history): derive it from scratch
+            await rebuild_streaks(db)
+            return
+
+        # Read after the state, so a retry also sees rollups written by the conflicting writer
+        active_days: Set[str] = set(
+            await db[ROLLUPS_COLLECTION].distinct("day", {"day": {"$in": days}, "sessionCount": {"$gt": 0}})
+        )
+
+        updated = updated_streak_state(state, days, active_days)
+        if updated is None:
+            return
+
+        # Documents written before versioning have no version field, which {"version": None} matches
+        result = await db[STATE_COLLECTION].replace_one(
+            {"_id": STREAK_STATE_ID, "version": state.get("version")},
+            updated
+        )
+        if result.matched_count:
+            return
+
+    # Still contended: the rollups are already current, so derive the state from them
+    await rebuild_streaks(db)
+
+
+def updated_streak_state(state: dict, days: List[str], active_days: Set[str]) -> Optional[dict]:
+    """
+    The streak state after `days` became active (those in `active_days`) or
+    inactive, or None if none of them changed.
+    """
+    bitmap = bitmap_from_state(state)
+
+    changed: List[date] = []
+    for key in days:
+        day = parse_day(key)
+        active = key in active_days
+        if bitmap.get(day) != active:
+            bitmap.set(day, active)
+            changed.append(day)
+
+    if not changed:
+        return None
+
+    last_active = parse_day(state["lastActiveDay"]) if state.get("lastActiveDay") else None
+    appended = all(bitmap.get(day) for day in changed) and (
+        last_active is None or min(changed) > last_active
+    )
+
+    if appended and len(changed) == 1:
+        # Common case: first session of a new day
+        day = changed[0]
+        if last_active is not None and (day - last_active).days == 1:
+            run_length = state["runLength"] + 1
+        else:
+            run_length = 1
+        longest = max(state["longestStreak"], run_length)
+    else:
+        # Back-dated or removed activity can split or join runs anywhere
+        new_last = bitmap.last_active()
+        run_length = bitmap.run_ending_at(new_last) if new_last else 0
+        longest = bitmap.longest_run()
+
+    return state_from_bitmap(bitmap, run_length, longest, (state.get("version") or 0) + 1)
+
+
+async def rebuild_streaks(db: AsyncIOMotorDatabase) -> dict:
+    """Rebuild the streak state from the full history of active days."""
+    bitmap = ActivityBitmap()
+    for key in await db[ROLLUPS_COLLECTION].distinct("day", {"sessionCount": {"$gt": 0}}):
+        bitmap.set(parse_day(key), True)
+
+    last_active = bitmap.last_active()
+    state = state_from_bitmap(
+        bitmap,
+        bitmap.run_ending_at(last_active) if last_active else 0,
+        bitmap.longest_run()
+    )
+
+    # Bump the version atomically so in-flight incremental updates of the old state fail
+    fields = {key: value for key, value in state.items() if key not in ("_id", "version")}
+    return await db[STATE_COLLECTION].find_one_and_update(
+        {"_id": STREAK_STATE_ID},
+        {"$set": fields, "$inc": {"version": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
@@ -0,0 +1,410 @@
+"""
+Subtopic storage for both backends (SUBTOPIC_STORAGE).
+
+"embedded" keeps a subject's syllabus as the nested `subtopics` array of the
+subject document. "collection" keeps one document per subtopic in the
+`subtopics` collection, so subject documents stay far below the document size
+limit and subject lists no longer carry the trees:
+
+    {subjectId, id, parentId, path, depth, position, childCount,
+     name, status, completedDate, cachedCompletion, order}
+
+`path` is the materialized path: the ids from the root down to the node, each
+followed by PATH_SEPARATOR. A node's subtree is every node whose path starts
+with its own, which is one range on the (subjectId, path) index. Single nodes
+are read and written by (subjectId, id) through a unique index, children by
+(subjectId, parentId). `position` keeps the sibling order of the array.
+
+Subject documents keep `subtopics: []` and their counters; routes returning a
+single subject reassemble its tree with `with_subtopics`. Subtopic writes
+recompute cachedCompletion along the changed node's ancestors and return the
+subject update (completion and counters) for the route to apply. Writes span
+several documents and are not atomic; a single user does not race itself.
+
+Convert a database with `python -m migrations.subtopics_to_collection`
+(`--reverse` embeds the trees again).
+"""
+from collections import Counter
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from fastapi import HTTPException
+from motor.motor_asyncio import AsyncIOMotorDatabase
+from pymongo import UpdateOne
+
+from app.core.config import settings
+from app.services.subtopic_tree import stored_counts_usable, subtopic_progress_fields, subtopic_tree_stats
+
+PATH_SEPARATOR = "/"
+# The character after PATH_SEPARATOR: "a/b/" <= any path in a/b's subtree < "a/b0"
+_SUBTREE_END = chr(ord(PATH_SEPARATOR) + 1)
+
+# Subtopic fields as in the embedded array, with the model defaults
+SUBTOPIC_DEFAULTS = {"status": "active", "completedDate": None, "cachedCompletion": 0.0, "order": 0}
+SUBTOPIC_FIELDS = ("id", "name", *SUBTOPIC_DEFAULTS)
+
+NODE_PROJECTION = {"_id": 0, "parentId": 1, "position": 1, **{field: 1 for field in SUBTOPIC_FIELDS}}
+
+
+def subtopic_collection_enabled() -> bool:
+    return settings.SUBTOPIC_STORAGE == "collection"
+
+
+def subtree_filter(subject_oid: ObjectId, path: str) -> dict:
+    """The node at `path` and all its descendants."""
+    return {"subjectId": subject_oid, "path": {"$gte": path, "$lt": path[:-1] + _SUBTREE_END}}
+
+
+def _iter_subtopics(subtopics: List[dict]):
+    stack = list(subtopics)
+    while stack:
+        subtopic = stack.pop()
+        yield subtopic
+        stack.extend(subtopic.get("subtopics") or [])
+
+
+def invalid_subtopic_ids(subtopics: List[dict]) -> List[str]:
+    """Ids in a nested tree that cannot be stored as nodes: duplicates and ids containing PATH_SEPARATOR."""
+    counts = Counter(subtopic.get("id") for subtopic in _iter_subtopics(subtopics))
+    return [
+        str(subtopic_id) for subtopic_id, count in counts.items()
+        if count > 1 or not isinstance(subtopic_id, str) or not subtopic_id or PATH_SEPARATOR in subtopic_id
+    ]
+
+
+def check_subtopic_ids(subtopics: List[dict]) -> None:
+    """400 when `subtopics` cannot be stored in the subtopics collection."""
+    invalid = invalid_subtopic_ids(subtopics)
+    if invalid:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Subtopic IDs must be unique and must not contain '{PATH_SEPARATOR}': {', '.join(invalid[:10])}"
+        )
+
+
+def flatten_subtopics(
+    subject_oid: ObjectId,
+    subtopics: List[dict],
+    parent: Optional[dict] = None,
+    first_position: int = 0
+) -> List[dict]:
+    """
+    Node documents for nested `subtopics` placed under `parent` (a node with
+    id, path and depth; None for roots), parents before their children.
+    """
+    nodes = []
+    stack = [(subtopic, parent, position) for position, subtopic in enumerate(subtopics, first_position)]
+    stack.reverse()
+    while stack:
+        subtopic, parent_node, position = stack.pop()
+        children = subtopic.get("subtopics") or []
+        node = {
+            "subjectId": subject_oid,
+            "id": subtopic["id"],
+            "name": subtopic.get("name", ""),
+            **{field: subtopic.get(field, default) for field, default in SUBTOPIC_DEFAULTS.items()},
+            "parentId": parent_node["id"] if parent_node else None,
+            "path": f"{parent_node['path'] if parent_node else ''}{subtopic['id']}{PATH_SEPARATOR}",
+            "depth": parent_node["depth"] + 1 if parent_node else 0,
+            "position": position,
+            "childCount": len(children),
+        }
+        nodes.append(node)
+        stack.extend((child, node, child_position) for child_position, child in reversed(list(enumerate(children))))
+    return nodes
+
+
+def build_subtopic_tree(nodes: List[dict]) -> List[dict]:
+    """Nested subtopics, shaped like the embedded array, from a subject's node documents."""
+    subtopics = {
+        node["id"]: {**{field: node.get(field) for field in SUBTOPIC_FIELDS}, "subtopics": []}
+        for node in nodes
+    }
+    roots = []
+    for node in sorted(nodes, key=lambda node: node.get("position", 0)):
+        if node.get("parentId") is None:
+            roots.append(subtopics[node["id"]])
+        elif node["parentId"] in subtopics:
+            subtopics[node["parentId"]]["subtopics"].append(subtopics[node["id"]])
+    return roots
+
+
+async def load_subtopic_tree(db: AsyncIOMotorDatabase, subject_oid: ObjectId) -> List[dict]:
+    nodes = await db.subtopics.find({"subjectId": subject_oid}, NODE_PROJECTION).to_list(None)
+    return build_subtopic_tree(nodes)
+
+
+async def load_subtopic_levels(
+    db: AsyncIOMotorDatabase,
+    subject_oid: ObjectId,
+    parent_id: Optional[str],
+    depth: int
+) -> Optional[List[dict]]:
+    """
+    The children of `parent_id` (None for the roots) down to `depth` levels, as
+    subtopic_levels returns them, with one children query per level. None when
+    the subject has no subtopic `parent_id`.
+    """
+    if parent_id is not None and not await db.subtopics.find_one({"subjectId": subject_oid, "id": parent_id}, {"_id": 1}):
+        return None
+
+    levels: List[dict] = []
+    targets: Dict[Optional[str], List[dict]] = {parent_id: levels}
+    for _ in range(depth):
+        nodes = await db.subtopics.find(
+            {"subjectId": subject_oid, "parentId": {"$in": list(targets)}},
+            {**NODE_PROJECTION, "childCount": 1}
+        ).sort([("parentId", 1), ("position", 1)]).to_list(None)
+
+        next_targets: Dict[Optional[str], List[dict]] = {}
+        for node in nodes:
+            subtopic = {field: node.get(field) for field in SUBTOPIC_FIELDS}
+            subtopic["cachedCompletion"] = _node_completion(node)
+            subtopic["childCount"] = node.get("childCount", 0)
+            subtopic["subtopics"] = []
+            targets[node["parentId"]].append(subtopic)
+            if subtopic["childCount"]:
+                next_targets[node["id"]] = subtopic["subtopics"]
+        if not next_targets:
+            break
+        targets = next_targets
+    return levels
+
+
+async def attach_subtopic_trees(db: AsyncIOMotorDatabase, subjects: List[dict]) -> None:
+    """Set each subject's subtopic tree from the subtopics collection, with one query for all of them."""
+    nodes = await db.subtopics.find(
+        {"subjectId": {"$in": [subject["_id"] for subject in subjects]}},
+        {**NODE_PROJECTION, "subjectId": 1}
+    ).to_list(None)
+    by_subject: Dict[ObjectId, List[dict]] = {}
+    for node in nodes:
+        by_subject.setdefault(node["subjectId"], []).append(node)
+    for subject in subjects:
+        subject["subtopics"] = build_subtopic_tree(by_subject.get(subject["_id"], []))
+
+
+async def with_subtopics(db: AsyncIOMotorDatabase, subject: dict) -> dict:
+    """`subject` with its subtopic tree, loaded from the subtopics collection when it lives there."""
+    if subtopic_collection_enabled():
+        subject["subtopics"] = await load_subtopic_tree(db, subject["_id"])
+    return subject
+
+
+async def replace_subtopic_tree(db: AsyncIOMotorDatabase, subject_oid: ObjectId, subtopics: List[dict]) -> None:
+    """Store `subtopics` (nested, ids checked) as the subject's whole tree."""
+    await db.subtopics.delete_many({"subjectId": subject_oid})
+    nodes = flatten_subtopics(subject_oid, subtopics)
+    if nodes:
+        await db.subtopics.insert_many(nodes)
+
+
+async def _check_ids_free(
+    db: AsyncIOMotorDatabase,
+    subject_oid: ObjectId,
+    nodes: List[dict],
+    replaced_path: Optional[str] = None
+) -> None:
+    """409 when a node id is already used in the subject outside the subtree being replaced."""
+    existing = await db.subtopics.find(
+        {"subjectId": subject_oid, "id": {"$in": [node["id"] for node in nodes]}},
+        {"_id": 0, "id": 1, "path": 1}
+    ).to_list(None)
+    taken = [doc["id"] for doc in existing if not (replaced_path and doc["path"].startswith(replaced_path))]
+    if taken:
+        raise HTTPException(status_code=409, detail=f"Subtopic ID already exists: {', '.join(taken[:10])}")
+
+
+def _node_completion(node: dict) -> float:
+    """Completion of a stored node: leaves by status, parents by cachedCompletion."""
+    if not node.get("childCount"):
+        return 100.0 if node.get("status") == "completed" else 0.0
+    return node.get("cachedCompletion", 0.0)
+
+
+def _ancestor_ids(path: str) -> List[str]:
+    """Ids of the nodes above the node at `path`, root first."""
+    return path.split(PATH_SEPARATOR)[:-2]
+
+
+async def _path_nodes(db: AsyncIOMotorDatabase, subject_oid: ObjectId, path_ids: List[str]) -> List[dict]:
+    """The roots and the children of every node in `path_ids`: all that recomputing the path reads."""
+    return await db.subtopics.find(
+        {"subjectId": subject_oid, "parentId": {"$in": [None, *path_ids]}},
+        {"_id": 0, "id": 1, "parentId": 1, "position": 1, "status": 1, "cachedCompletion": 1, "childCount": 1}
+    ).to_list(None)
+
+
+def _recompute_path(subject_oid: ObjectId, nodes: List[dict], path_ids: List[str]) -> Tuple[List[UpdateOne], float]:
+    """
+    cachedCompletion of each node in `path_ids`, bottom-up, from the nodes
+    _path_nodes read, as writes; and the subject's completion from the roots.
+    """
+    by_id = {node["id"]: node for node in nodes}
+    children: Dict[Optional[str], List[dict]] = {}
+    for node in sorted(nodes, key=lambda node: node.get("position", 0)):
+        children.setdefault(node["parentId"], []).append(node)
+
+    writes = []
+    for node_id in reversed(path_ids):
+        node = by_id[node_id]
+        node_children = children.get(node_id, [])
+        if node_children:
+            node["cachedCompletion"] = round(
+                sum(_node_completion(child) for child in node_children) / len(node_children), 2
+            )
+        else:
+            node["cachedCompletion"] = _node_completion(node)
+        writes.append(UpdateOne({"subjectId": subject_oid, "id": node_id}, {"$set": {"cachedCompletion": node["cachedCompletion"]}}))
+
+    roots = children.get(None, [])
+    overall = round(sum(_node_completion(root) for root in roots) / len(roots), 2) if roots else 0.0
+    return writes, overall
+
+
+async def _refresh_path(db: AsyncIOMotorDatabase, subject_oid: ObjectId, path_ids: List[str]) -> float:
+    """Rewrite cachedCompletion along `path_ids` after a subtree changed; returns the subject's completion."""
+    writes, overall = _recompute_path(subject_oid, await _path_nodes(db, subject_oid, path_ids), path_ids)
+    if writes:
+        await db.subtopics.bulk_write(writes, ordered=False)
+    return overall
+
+
+async def _subtree_counts(db: AsyncIOMotorDatabase, subject_oid: ObjectId, path: str) -> Tuple[int, int]:
+    """Total and completed nodes in the subtree at `path`."""
+    nodes = await db.subtopics.find(subtree_filter(subject_oid, path), {"_id": 0, "status": 1}).to_list(None)
+    return len(nodes), sum(node.get("status") == "completed" for node in nodes)
+
+
+async def _subject_update(
+    db: AsyncIOMotorDatabase,
+    subject: dict,
+    overall: float,
+    total_delta: int = 0,
+    completed_delta: int = 0
+) -> dict:
+    """
+    The subject update after a subtopic write: its completion, and its counters
+    moved by the deltas, or recounted when the stored ones are missing or inconsistent.
+    """
+    updates = {"completionPercentage": overall, "progress": overall, "updatedAt": datetime.utcnow()}
+    update = {"$set": updates}
+    if stored_counts_usable(subject, total_delta, completed_delta):
+        increments = {"totalSubtopicsCount": total_delta, "completedSubtopicsCount": completed_delta}
+        increments = {field: delta for field, delta in increments.items() if delta}
+        if increments:
+            update["$inc"] = increments
+    else:
+        stats = subtopic_tree_stats(await load_subtopic_tree(db, subject["_id"]))
+        updates["totalSubtopicsCount"] = stats["totalSubtopicsCount"]
+        updates["completedSubtopicsCount"] = stats["completedSubtopicsCount"]
+    return update
+
+
+async def insert_subtopic(db: AsyncIOMotorDatabase, subject: dict, subtopic: dict) -> dict:
+    """
+    Append `subtopic` (with its nested subtopics, ids checked) as the subject's
+    last root. Returns the update for the subject document (completion and counters).
+    """
+    subject_oid = subject["_id"]
+    last = await db.subtopics.find_one(
+        {"subjectId": subject_oid, "parentId": None},
+        {"position": 1},
+        sort=[("position", -1)]
+    )
+    added = subtopic_progress_fields([subtopic])
+    nodes = flatten_subtopics(subject_oid, [subtopic], first_position=last["position"] + 1 if last else 0)
+    await _check_ids_free(db, subject_oid, nodes)
+    await db.subtopics.insert_many(nodes)
+
+    overall = await _refresh_path(db, subject_oid, [])
+    return await _subject_update(
+        db, subject, overall, added["totalSubtopicsCount"], added["completedSubtopicsCount"]
+    )
+
+
+async def replace_subtopic(
+    db: AsyncIOMotorDatabase,
+    subject: dict,
+    subtopic_id: str,
+    subtopic: dict
+) -> Optional[dict]:
+    """
+    Replace the subtopic `subtopic_id`, at any depth, and its subtree with
+    `subtopic` (ids checked) in the same place. Returns the update for the
+    subject document, or None when there is no such subtopic.
+    """
+    subject_oid = subject["_id"]
+    node = await db.subtopics.find_one({"subjectId": subject_oid, "id": subtopic_id})
+    if node is None:
+        return None
+
+    parent = None
+    if node["parentId"] is not None:
+        parent = {"id": node["parentId"], "path": node["path"][:-len(node["id"]) - 1], "depth": node["depth"] - 1}
+    added = subtopic_progress_fields([subtopic])
+    nodes = flatten_subtopics(subject_oid, [subtopic], parent, first_position=node["position"])
+    await _check_ids_free(db, subject_oid, nodes, replaced_path=node["path"])
+
+    removed_total, removed_completed = await _subtree_counts(db, subject_oid, node["path"])
+    await db.subtopics.delete_many(subtree_filter(subject_oid, node["path"]))
+    await db.subtopics.insert_many(nodes)
+
+    overall = await _refresh_path(db, subject_oid, _ancestor_ids(node["path"]))
+    return await _subject_update(
+        db,
+        subject,
+        overall,
+        added["totalSubtopicsCount"] - removed_total,
+        added["completedSubtopicsCount"] - removed_completed
+    )
+
+
+async def delete_subtopic_subtree(db: AsyncIOMotorDatabase, subject: dict, subtopic_id: str) -> Optional[dict]:
+    """
+    Delete the subtopic `subtopic_id`, at any depth, and its subtree. Returns
+    the update for the subject document, or None when there is no such subtopic.
+    """
+    subject_oid = subject["_id"]
+    node = await db.subtopics.find_one({"subjectId": subject_oid, "id": subtopic_id}, {"path": 1, "parentId": 1})
+    if node is None:
+        return None
+
+    removed_total, removed_completed = await _subtree_counts(db, subject_oid, node["path"])
+    await db.subtopics.delete_many(subtree_filter(subject_oid, node["path"]))
+    if node["parentId"] is not None:
+        await db.subtopics.update_one({"subjectId": subject_oid, "id": node["parentId"]}, {"$inc": {"childCount": -1}})
+
+    overall = await _refresh_path(db, subject_oid, _ancestor_ids(node["path"]))
+    return await _subject_update(db, subject, overall, -removed_total, -removed_completed)
+
+
+async def toggle_stored_subtopic(db: AsyncIOMotorDatabase, subject: dict, subtopic_id: str) -> Optional[dict]:
+    """
+    Toggle a subtopic in the subtopics collection and recompute cachedCompletion
+    along its path, reading only the children of the path's nodes and the roots.
+    Returns the update for the subject document (completion and counters), or
+    None when the subject has no such subtopic.
+    """
+    subject_oid = subject["_id"]
+    target = await db.subtopics.find_one({"subjectId": subject_oid, "id": subtopic_id}, {"path": 1})
+    if target is None:
+        return None
+
+    path_ids = target["path"].split(PATH_SEPARATOR)[:-1]
+    nodes = await _path_nodes(db, subject_oid, path_ids)
+
+    toggled = next(node for node in nodes if node["id"] == subtopic_id)
+    completed = toggled.get("status", "active") != "completed"
+    toggled["status"] = "completed" if completed else "active"
+    completed_date = datetime.utcnow() if completed else None
+
+    writes, overall = _recompute_path(subject_oid, nodes, path_ids)
+    writes.insert(0, UpdateOne(
+        {"subjectId": subject_oid, "id": subtopic_id},
+        {"$set": {"status": toggled["status"], "completedDate": completed_date}}
+    ))
+    await db.subtopics.bulk_write(writes, ordered=False)
+
+    return await _subject_update(db, subject, overall, completed_delta=1 if completed else -1)
@@ -0,0 +1,184 @@
+"""
+Subtopic tree statistics and path helpers.
+
+Subjects store their syllabus as nested `subtopics` lists. `subtopic_tree_stats`
+computes everything the progress endpoints need - per-node completion, counts,
+per-level stats and the next uncompleted leaf - in one iterative traversal, so
+deep trees neither take several passes nor hit the Python recursion limit.
+
+Completion follows the original definition: a leaf is 100 when completed and 0
+otherwise; a parent is the average of its children, rounded to 2 decimals; the
+subject is the average of its roots.
+"""
+from typing import Any, Dict, List, Optional, Tuple
+
+
+def _children(subtopic: dict) -> List[dict]:
+    return subtopic.get("subtopics") or []
+
+
+def _in_order(subtopics: List[dict]) -> List[Tuple[int, dict]]:
+    """(stored index, subtopic) pairs of `subtopics` in `order` order."""
+    return sorted(enumerate(subtopics), key=lambda item: item[1].get("order", 0))
+
+
+def subtopic_tree_stats(subtopics: List[dict], cache_completions: bool = False) -> Dict[str, Any]:
+    """
+    Completion percentage, total/completed counts, level stats and the next
+    recommended subtopic (the first uncompleted leaf in `order` order) of a
+    subtopic tree. With `cache_completions`, every node's cachedCompletion is
+    set to its computed completion as well.
+
+    Nodes are visited depth-first in `order` order. Each node is entered once
+    (counted, and checked as the next leaf) and, if it has children, exited
+    once after them to average their completions. Completions are averaged in
+    stored order, as the recursive definition does, so float sums round the same.
+    """
+    total = 0
+    completed = 0
+    levels: Dict[int, List[int]] = {}
+    next_subtopic = None
+    root_completions: List[float] = [0.0] * len(subtopics)
+
+    # (node, level, list its completion goes into, its slot there, its children's completions once entered)
+    stack = [(root, 0, root_completions, index, None) for index, root in reversed(_in_order(subtopics))]
+    while stack:
+        node, level, sink, slot, child_completions = stack.pop()
+
+        if child_completions is not None:
+            sink[slot] = round(sum(child_completions) / len(child_completions), 2)
+            if cache_completions:
+                node["cachedCompletion"] = sink[slot]
+            continue
+
+        is_completed = node.get("status") == "completed"
+        total += 1
+        level_counts = levels.setdefault(level, [0, 0])
+        level_counts[0] += 1
+        if is_completed:
+            completed += 1
+            level_counts[1] += 1
+
+        children = _children(node)
+        if not children:
+            sink[slot] = 100.0 if is_completed else 0.0
+            if cache_completions:
+                node["cachedCompletion"] = sink[slot]
+            if next_subtopic is None and not is_completed:
+                next_subtopic = {"id": node["id"], "name": node["name"], "level": level}
+            continue
+
+        results: List[float] = [0.0] * len(children)
+        stack.append((node, level, sink, slot, results))
+        stack.extend((child, level + 1, results, index, None) for index, child in reversed(_in_order(children)))
+
+    overall = round(sum(root_completions) / len(root_completions), 2) if root_completions else 0.0
+    return {
+        "completionPercentage": overall,
+        "completedSubtopicsCount": completed,
+        "totalSubtopicsCount": total,
+        "levelStats": [
+            {
+                "level": level,
+                "total": level_total,
+                "completed": level_completed,
+                "percentage": round((level_completed / level_total) * 100, 2) if level_total > 0 else 0.0
+            }
+            for level, (level_total, level_completed) in sorted(levels.items())
+        ],
+        "nextRecommendedSubtopic": next_subtopic
+    }
+
+
+def subtopic_progress_fields(subtopics: List[dict]) -> Dict[str, Any]:
+    """
+    Refresh the cachedCompletion of every node of `subtopics` in place and
+    return the subject fields derived from the tree: completion and counters.
+    """
+    stats = subtopic_tree_stats(subtopics, cache_completions=True)
+    return {
+        "completionPercentage": stats["completionPercentage"],
+        "progress": stats["completionPercentage"],  # Keep in sync
+        "completedSubtopicsCount": stats["completedSubtopicsCount"],
+        "totalSubtopicsCount": stats["totalSubtopicsCount"],
+    }
+
+
+def stored_counts_usable(subject: dict, total_delta: int = 0, completed_delta: int = 0) -> bool:
+    """
+    Whether the subject's stored subtopic counters can be moved by the given
+    deltas: both are set, consistent, and stay consistent afterwards. Otherwise
+    (e.g. subjects written before the counters were kept) count the tree instead.
+    """
+    total = subject.get("totalSubtopicsCount")
+    completed = subject.get("completedSubtopicsCount")
+    if not isinstance(total, int) or not isinstance(completed, int):
+        return False
+    if total <= 0 or not 0 <= completed <= total:
+        return False
+    return 0 <= completed + completed_delta <= total + total_delta
+
+
+def subtopic_levels(subtopics: List[dict], depth: int) -> List[dict]:
+    """
+    `subtopics` down to `depth` levels (1 = these subtopics only) as SubtopicNode
+    dicts: each node gets its childCount and completion, and nodes on the last
+    level are returned without their children.
+    """
+    levels: List[dict] = []
+    pending = [(subtopics, levels, 1)]
+    while pending:
+        source, target, level = pending.pop()
+        for subtopic in source:
+            children = _children(subtopic)
+            node = {key: value for key, value in subtopic.items() if key != "subtopics"}
+            node["cachedCompletion"] = cached_subtopic_completion(subtopic)
+            node["childCount"] = len(children)
+            node["subtopics"] = []
+            target.append(node)
+            if children and level < depth:
+                pending.append((children, node["subtopics"], level + 1))
+    return levels
+
+
+def find_subtopic_path(subtopics: List[dict], subtopic_id: str) -> Optional[List[dict]]:
+    """
+    Nodes from a root subtopic down to the one with `subtopic_id`, or None.
+    Iterative, so very deep trees do not hit the recursion limit. Visited nodes
+    only record their parent; the path is rebuilt once the target is found.
+    """
+    parents: Dict[int, Optional[dict]] = {id(root): None for root in subtopics}
+    stack = list(reversed(subtopics))
+    while stack:
+        node = stack.pop()
+        if node.get("id") == subtopic_id:
+            path = []
+            while node is not None:
+                path.append(node)
+                node = parents[id(node)]
+            path.reverse()
+            return path
+        for child in reversed(_children(node)):
+            parents[id(child)] = node
+            stack.append(child)
+    return None
+
+
+def cached_subtopic_completion(subtopic: dict) -> float:
+    """Completion of a subtopic as stored: leaves by status, parents by cachedCompletion."""
+    if not _children(subtopic):
+        return 100.0 if subtopic.get("status") == "completed" else 0.0
+    return subtopic.get("cachedCompletion", 0.0)
+
+
+def completion_from_children(subtopic: dict) -> float:
+    """Completion of one node computed from its children's cached completions."""
+    children = _children(subtopic)
+    if not children:
+        return 100.0 if subtopic.get("status") == "completed" else 0.0
+    return round(sum(cached_subtopic_completion(child) for child in children) / len(children), 2)
+
+
+def subtopic_array_path(depth: int) -> str:
+    """Update path of the node `depth` levels down, e.g. subtopics.$[l0].subtopics.$[l1]."""
+    return ".".join(f"subtopics.$[l{level}]" for level in range(depth))
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""
+Benchmark the columnar analytics engine against MongoDB.
+
+Generates synthetic sessions, loads them into the in-memory columnar store and
+times distribution, daily-activity and breakdown queries. With --mongo the same
+sessions are written to a scratch database on a local mongod and the rollup
+aggregations used by the default engine are timed too.
+
+Usage (from the backend directory):
+    python -m benchmarks.columnar --sessions 1000000
+    python -m benchmarks.columnar --sessions 1000000 --mongo
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.columnar import ColumnarSessionStore
+from app.services.rollups import ROLLUPS_COLLECTION, day_key, rebuild_rollups
+from benchmarks.generator import generate_sessions, synthetic_references
+
+
+def time_call(func, repeat: int) -> dict:
+    """Run `func` `repeat` times and return latency stats in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"p50": statistics.median(samples), "min": min(samples)}
+
+
+async def time_async(func, repeat: int) -> dict:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - started) * 1000)
+    return {"p50": statistics.median(samples), "min": min(samples)}
+
+
+def print_row(label: str, stats: dict) -> None:
+    print(f"  {label:<40} p50 {stats['p50']:9.2f} ms   min {stats['min']:9.2f} ms")
+
+
+async def benchmark(args):
+    print(f"Generating {args.sessions:,} sessions...")
+    sessions = generate_sessions(args.sessions, synthetic_references(60))
+
+    now = datetime.utcnow()
+    month_start = day_key(now - timedelta(days=30))
+    year_start = day_key(now - timedelta(days=365))
+    today = day_key(now)
+
+    started = time.perf_counter()
+    store = ColumnarSessionStore(capacity=len(sessions))
+    store.add(sessions)
+    print(f"Columnar load: {(time.perf_counter() - started):.2f} s\n")
+
+    print("Columnar engine")
+    print_row("distribution (30 days)", time_call(lambda: store.by_reference_type(month_start), args.repeat))
+    print_row("daily-activity (365 days)", time_call(lambda: store.daily_rows(year_start), args.repeat))
+    print_row("breakdown (30 days)", time_call(lambda: store.by_reference(month_start, today), args.repeat))
+
+    if not args.mongo:
+        return
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[args.database]
+    try:
+        await db.sessions.drop()
+        for offset in range(0, len(sessions), 10000):
+            await db.sessions.insert_many(sessions[offset:offset + 10000], ordered=False)
+        await db.sessions.create_index("startTime")
+        await db[ROLLUPS_COLLECTION].create_index(
+            [("day", 1), ("referenceType", 1), ("referenceId", 1)], unique=True
+        )
+        await rebuild_rollups(db)
+
+        async def distribution_rollups():
+            await db[ROLLUPS_COLLECTION].aggregate([
+                {"$match": {"day": {"$gte": month_start}}},
+                {"$group": {"_id": "$referenceType", "d": {"$sum": "$duration"}, "c": {"$sum": "$sessionCount"}}}
+            ]).to_list(None)
+
+        async def daily_rollups():
+            await db[ROLLUPS_COLLECTION].find({"day": {"$gte": year_start}}).sort(
+                [("day", 1), ("referenceType", 1), ("referenceId", 1)]
+            ).to_list(None)
+
+        async def breakdown_rollups():
+            await db[ROLLUPS_COLLECTION].aggregate([
+                {"$match": {"day": {"$gte": month_start, "$lte": today}}},
+                {"$group": {"_id": {"t": "$referenceType", "i": "$referenceId"}, "d": {"$sum": "$duration"}}},
+                {"$sort": {"d": -1}}
+            ]).to_list(None)
+
+        async def daily_raw_sessions():
+            await db.sessions.aggregate([
+                {"$match": {"startTime": {"$gte": now - timedelta(days=365)}}},
+                {"$group": {
+                    "_id": {
+                        "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$startTime"}},
+                        "referenceType": "$referenceType",
+                        "referenceId": "$referenceId"
+                    },
+                    "duration": {"$sum": "$duration"}
+                }}
+            ]).to_list(None)
+
+        print("\nMongoDB rollups")
+        print_row("distribution (30 days)", await time_async(distribution_rollups, args.repeat))
+        print_row("daily-activity (365 days)", await time_async(daily_rollups, args.repeat))
+        print_row("breakdown (30 days)", await time_async(breakdown_rollups, args.repeat))
+
+        print("\nMongoDB raw sessions")
+        print_row("daily-activity (365 days)", await time_async(daily_raw_sessions, args.repeat))
+    finally:
+        if not args.keep:
+            await client.drop_database(args.database)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the columnar analytics engine.")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--mongo", action="store_true", help="Also time MongoDB aggregations on a local mongod")
+    parser.add_argument("--database", default="time_tracker_benchmark")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark database afterwards")
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,200 @@
+"""
+Synthetic data for benchmarks.
+
+Generates subjects (with nested subtopic trees), projects, practices and the
+sessions logged against them, shaped like the documents the API writes, and
+seeds them into a scratch database together with the derived analytics data.
+"""
+
+import random
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from typing import Dict, List, Tuple
+
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorDatabase
+
+from app.services.rollups import rebuild_rollups
+from app.services.sketches import rebuild_sketches
+from app.services.streaks import rebuild_streaks
+
+
+@dataclass
+class Scale:
+    sessions: int
+    subjects: int
+    projects: int
+    practices: int
+    years: int = 5
+    # Subtopic tree shape per subject
+    subtopic_depth: int = 3
+    subtopic_branching: Tuple[int, int] = (2, 5)
+
+
+SCALES: Dict[str, Scale] = {
+    "10k": Scale(sessions=10_000, subjects=40, projects=20, practices=4, years=2),
+    "100k": Scale(sessions=100_000, subjects=150, projects=60, practices=5, years=4),
+    "1m": Scale(sessions=1_000_000, subjects=500, projects=200, practices=5, years=8),
+}
+
+SUBJECT_STATUSES = ["not_started", "in_progress", "completed", "on_hold", "reviewing"]
+PROJECT_STATUSES = ["active", "completed", "hibernation", "archived"]
+PRACTICE_PLATFORMS = ["leetcode", "codeforces", "hackerrank", "codewars", "other"]
+
+# Reference (type, id, name) a session is logged against
+Reference = Tuple[str, str, str]
+
+
+def generate_subtopics(rng: random.Random, depth: int, branching: Tuple[int, int], prefix: str = "") -> List[dict]:
+    """A random subtopic tree `depth` levels deep."""
+    if depth <= 0:
+        return []
+
+    subtopics = []
+    for order in range(rng.randint(*branching)):
+        name = f"{prefix}{order + 1}"
+        children = generate_subtopics(rng, depth - 1, branching, f"{name}.") if rng.random() < 0.6 else []
+        completed = all(child["status"] == "completed" for child in children) if children else rng.random() < 0.4
+        subtopics.append({
+            "id": str(uuid.uuid4()),
+            "name": f"Topic {name}",
+            "status": "completed" if completed else "active",
+            "completedDate": datetime.utcnow() if completed else None,
+            "cachedCompletion": 100.0 if completed else 0.0,
+            "order": order,
+            "subtopics": children,
+        })
+    return subtopics
+
+
+def generate_subjects(rng: random.Random, scale: Scale) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Subject {i}",
+            "priority": rng.choice(["high", "medium", "low"]),
+            "status": rng.choice(SUBJECT_STATUSES),
+            "category": "programming",
+            "tags": rng.sample(["python", "web", "math", "ml", "systems", "design"], 2),
+            "subtopics": generate_subtopics(rng, scale.subtopic_depth, scale.subtopic_branching),
+            "createdAt": now - timedelta(days=rng.randrange(scale.years * 365)),
+            "updatedAt": now,
+        }
+        for i in range(scale.subjects)
+    ]
+
+
+def generate_projects(rng: random.Random, scale: Scale) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "name": f"Project {i}",
+            "priority": rng.choice(["high", "medium", "low"]),
+            "status": rng.choice(PROJECT_STATUSES),
+            "projectType": ["personal"],
+            "tags": rng.sample(["api", "frontend", "cli", "data", "infra"], 2),
+            "createdAt": now - timedelta(days=rng.randrange(scale.years * 365)),
+            "updatedAt": now,
+        }
+        for i in range(scale.projects)
+    ]
+
+
+def generate_practices(rng: random.Random, scale: Scale) -> List[dict]:
+    now = datetime.utcnow()
+    return [
+        {
+            "_id": ObjectId(),
+            "platform": PRACTICE_PLATFORMS[i % len(PRACTICE_PLATFORMS)],
+            "problemsSolved": rng.randrange(500),
+            "createdAt": now,
+            "updatedAt": now,
+        }
+        for i in range(scale.practices)
+    ]
+
+
+def synthetic_references(count: int, seed: int = 42) -> List[Reference]:
+    """References that do not correspond to stored subjects/projects."""
+    rng = random.Random(seed)
+    return [
+        (rng.choice(["subject", "project", "practice_platform"]), f"ref{i}", f"Reference {i}")
+        for i in range(count)
+    ]
+
+
+def generate_sessions(
+    count: int,
+    references: List[Reference],
+    years: int = 5,
+    seed: int = 42
+) -> List[dict]:
+    """
+    Completed sessions spread over the last `years` years.
+    A few references get most of the time, as in real usage.
+    """
+    rng = random.Random(seed)
+    now = datetime.utcnow()
+    span = years * 365 * 86400
+    weights = [1 / (rank + 1) for rank in range(len(references))]
+
+    sessions = []
+    for ref_type, ref_id, name in rng.choices(references, weights=weights, k=count):
+        start = now - timedelta(seconds=rng.randrange(span))
+        duration = max(5, int(rng.lognormvariate(3.6, 0.6)))  # minutes, median ~37
+        sessions.append({
+            "_id": ObjectId(),
+            "name": name,
+            "referenceType": ref_type,
+            "referenceId": ref_id,
+            "sessionType": "practice" if ref_type == "practice_platform" else "study",
+            "date": start.replace(hour=0, minute=0, second=0, microsecond=0),
+            "startTime": start,
+            "endTime": start + timedelta(minutes=duration),
+            "duration": duration,
+            "createdAt": start,
+        })
+    return sessions
+
+
+def generate_dataset(scale: Scale, seed: int = 42) -> Dict[str, List[dict]]:
+    """Every collection for one scale, keyed by collection name."""
+    rng = random.Random(seed)
+    subjects = generate_subjects(rng, scale)
+    projects = generate_projects(rng, scale)
+    practices = generate_practices(rng, scale)
+
+    references = (
+        [("subject", str(doc["_id"]), doc["name"]) for doc in subjects]
+        + [("project", str(doc["_id"]), doc["name"]) for doc in projects]
+        + [("practice_platform", str(doc["_id"]), doc["platform"]) for doc in practices]
+    )
+    rng.shuffle(references)
+
+    return {
+        "subjects": subjects,
+        "projects": projects,
+        "practices": practices,
+        "sessions": generate_sessions(scale.sessions, references, scale.years, seed),
+    }
+
+
+async def seed_database(db: AsyncIOMotorDatabase, dataset: Dict[str, List[dict]], batch_size: int = 10000) -> Dict[str, int]:
+    """
+    Replace the dataset's collections in `db` and rebuild the derived analytics data.
+    Returns the number of documents written per collection.
+    """
+    counts = {}
+    for name, docs in dataset.items():
+        await db[name].drop()
+        for offset in range(0, len(docs), batch_size):
+            await db[name].insert_many(docs[offset:offset + batch_size], ordered=False)
+        counts[name] = len(docs)
+
+    await rebuild_rollups(db)
+    await rebuild_streaks(db)
+    await rebuild_sketches(db)
+    return counts
@@ -0,0 +1,231 @@
+#!/usr/bin/env python3
+"""
+Benchmark the analytics and list endpoints at a given data scale.
+
+Seeds a scratch database on a local mongod with synthetic data, calls every
+endpoint through the FastAPI app in-process, and records p50/p95 latency and
+the number of MongoDB commands (round trips) each request issues. The report
+is written as JSON so runs from different commits can be compared.
+
+Usage (from the backend directory):
+    python -m benchmarks.run --scale 10k
+    python -m benchmarks.run --scale 100k --output report-100k.json
+    python -m benchmarks.run --scale 100k --reuse --compare report-100k.json
+"""
+
+import argparse
+import asyncio
+import json
+import platform
+import statistics
+import subprocess
+import time
+from datetime import date, datetime, timedelta
+
+import httpx
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+
+from app.core import database
+from app.core.config import settings
+from app.main import app
+from app.services.columnar import load_session_columns
+from benchmarks.generator import SCALES, generate_dataset, seed_database
+
+API = settings.API_V1_PREFIX
+
+
+def endpoints() -> dict:
+    """Name -> (path, params) for every benchmarked GET endpoint."""
+    today = date.today()
+    return {
+        "analytics.time-summary": ("/analytics/time-summary", {"period": "month"}),
+        "analytics.distribution": ("/analytics/distribution", {"days": 30}),
+        "analytics.streaks": ("/analytics/streaks", {}),
+        "analytics.progress": ("/analytics/progress", {}),
+        "analytics.daily-activity": ("/analytics/daily-activity", {"days": 365}),
+        "analytics.heatmap": ("/analytics/heatmap", {}),
+        "analytics.heatmap-breakdown": ("/analytics/heatmap", {"breakdown": "true"}),
+        "analytics.breakdown": ("/analytics/breakdown", {"period": "month"}),
+        "analytics.breakdown-year": (
+            "/analytics/breakdown",
+            {"start": (today - timedelta(days=365)).isoformat(), "end": today.isoformat()}
+        ),
+        "analytics.session-lengths": ("/analytics/session-lengths", {}),
+        "analytics.snapshot": ("/analytics/snapshot", {}),
+        "sessions.list": ("/sessions/", {"limit": 100}),
+        "sessions.list-subject": ("/sessions/", {"type_filter": "subject", "limit": 100}),
+        "sessions.stats-summary": ("/sessions/stats/summary", {}),
+        "subjects.list": ("/subjects/", {}),
+        "subjects.list-full": ("/subjects/", {"include": "all"}),
+        "projects.list": ("/projects/", {}),
+        "projects.list-full": ("/projects/", {"include": "all"}),
+        "practices.list": ("/practices/", {}),
+    }
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts commands sent to MongoDB (excluding cursor getMore batches)."""
+
+    def __init__(self):
+        self.commands = 0
+        self.get_mores = 0
+
+    def started(self, event):
+        if event.command_name == "getMore":
+            self.get_mores += 1
+        else:
+            self.commands += 1
+
+    def succeeded(self, event):
+        pass
+
+    def failed(self, event):
+        pass
+
+    def reset(self):
+        self.commands = 0
+        self.get_mores = 0
+
+
+def percentile(samples: list, q: float) -> float:
+    ordered = sorted(samples)
+    index = min(len(ordered) - 1, max(0, round(q * (len(ordered) - 1))))
+    return ordered[index]
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+async def time_endpoint(client: httpx.AsyncClient, counter: CommandCounter, path: str, params: dict, args) -> dict:
+    """Latency and round-trip stats for one endpoint."""
+    for _ in range(args.warmup):
+        await client.get(f"{API}{path}", params=params)
+
+    samples = []
+    counter.reset()
+    status_code = None
+    size = 0
+    for _ in range(args.repeat):
+        started = time.perf_counter()
+        response = await client.get(f"{API}{path}", params=params)
+        samples.append((time.perf_counter() - started) * 1000)
+        status_code = response.status_code
+        size = len(response.content)
+
+    return {
+        "status": status_code,
+        "p50": round(percentile(samples, 0.5), 3),
+        "p95": round(percentile(samples, 0.95), 3),
+        "mean": round(statistics.fmean(samples), 3),
+        "roundTrips": round(counter.commands / args.repeat, 2),
+        "getMores": round(counter.get_mores / args.repeat, 2),
+        "responseBytes": size,
+    }
+
+
+def print_comparison(report: dict, baseline: dict) -> None:
+    print(f"\nCompared with {baseline.get('commit', '?')} ({baseline.get('scale', '?')}):")
+    for name, result in report["endpoints"].items():
+        before = baseline.get("endpoints", {}).get(name)
+        if not before:
+            print(f"  {name:<32} (new)")
+            continue
+        change = (result["p50"] - before["p50"]) / before["p50"] * 100 if before["p50"] else 0.0
+        print(
+            f"  {name:<32} p50 {before['p50']:9.2f} -> {result['p50']:9.2f} ms ({change:+6.1f}%)"
+            f"   round trips {before['roundTrips']} -> {result['roundTrips']}"
+        )
+
+
+async def benchmark(args) -> dict:
+    scale = SCALES[args.scale]
+    counter = CommandCounter()
+
+    # Point the app's shared database handle at the scratch database
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    database.db.client = client
+    database.db.db = client[args.database]
+    settings.ANALYTICS_CACHE_ENABLED = args.cache
+    settings.FAST_SERIALIZATION = not args.slow_serialization
+
+    try:
+        await client.admin.command("ping")
+        await database.create_indexes()
+
+        counts = None
+        if not args.reuse:
+            print(f"Seeding {args.database} at scale {args.scale}...")
+            started = time.perf_counter()
+            counts = await seed_database(database.db.db, generate_dataset(scale, args.seed))
+            print(f"Seeded {counts} in {time.perf_counter() - started:.1f} s\n")
+
+        if settings.ANALYTICS_ENGINE == "columnar":
+            await load_session_columns(database.db.db)
+
+        results = {}
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://benchmark") as http:
+            for name, (path, params) in endpoints().items():
+                results[name] = await time_endpoint(http, counter, path, params, args)
+                result = results[name]
+                print(
+                    f"  {name:<32} p50 {result['p50']:9.2f} ms   p95 {result['p95']:9.2f} ms"
+                    f"   round trips {result['roundTrips']:5}   [{result['status']}]"
+                )
+
+        return {
+            "generatedAt": datetime.utcnow().isoformat(),
+            "commit": git_commit(),
+            "scale": args.scale,
+            "documents": counts,
+            "python": platform.python_version(),
+            "analyticsEngine": settings.ANALYTICS_ENGINE,
+            "cacheEnabled": args.cache,
+            "fastSerialization": settings.FAST_SERIALIZATION,
+            "repeat": args.repeat,
+            "endpoints": results,
+        }
+    finally:
+        if not args.keep and not args.reuse:
+            await client.drop_database(args.database)
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark analytics and list endpoints.")
+    parser.add_argument("--scale", choices=sorted(SCALES), default="10k")
+    parser.add_argument("--repeat", type=int, default=30)
+    parser.add_argument("--warmup", type=int, default=3)
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--database", default="time_tracker_benchmark")
+    parser.add_argument("--output", help="Write the JSON report here (default: benchmark-<scale>.json)")
+    parser.add_argument("--compare", help="Print p50 changes against an earlier JSON report")
+    parser.add_argument("--cache", action="store_true", help="Leave the analytics response cache enabled")
+    parser.add_argument("--slow-serialization", action="store_true", help="Validate list responses through response_model")
+    parser.add_argument("--keep", action="store_true", help="Keep the seeded database afterwards")
+    parser.add_argument("--reuse", action="store_true", help="Benchmark an already seeded (--keep) database")
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare) as handle:
+            baseline = json.load(handle)
+
+    report = asyncio.run(benchmark(args))
+
+    output = args.output or f"benchmark-{args.scale}.json"
+    with open(output, "w") as handle:
+        json.dump(report, handle, indent=2)
+    print(f"\nReport written to {output}")
+
+    if baseline:
+        print_comparison(report, baseline)
+
+
+if __name__ == "__main__":
+    main()
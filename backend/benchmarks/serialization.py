@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Benchmark list-response serialization: response_model validation against trusted reads.
+
+Builds large synthetic subject, project and session lists and times, per list,
+the path FastAPI takes with response_model (rename _id, validate every document,
+dump it back to JSON-able Python, json.dumps) against the DocumentSerializer
+trusted-read path (orjson when installed). No database is needed.
+
+Usage (from the backend directory):
+    python -m benchmarks.serialization
+    python -m benchmarks.serialization --subjects 500 --depth 4 --issues 500
+"""
+
+import argparse
+import json
+import random
+from datetime import datetime, timedelta
+from typing import List, Type
+
+from pydantic import BaseModel, TypeAdapter
+
+from app.models.project import Project
+from app.models.session import Session
+from app.models.subject import Subject
+from app.services.serialization import DocumentSerializer, orjson
+from benchmarks.columnar import print_row, time_call
+from benchmarks.generator import Scale, generate_projects, generate_sessions, generate_subjects, synthetic_references
+
+
+def with_github_issues(rng: random.Random, projects: List[dict], issues: int) -> List[dict]:
+    """Give every project a synced GitHub issue list `issues` long."""
+    now = datetime.utcnow()
+    for project in projects:
+        project["githubData"] = {
+            "stars": rng.randrange(1000),
+            "fetched": True,
+            "lastFetched": now,
+            "issues": [
+                {
+                    "number": number,
+                    "title": f"Issue {number}",
+                    "state": rng.choice(["open", "closed"]),
+                    "labels": [{"name": "bug", "color": "d73a4a"}],
+                    "createdAt": (now - timedelta(days=number)).isoformat(),
+                    "url": f"https://github.com/example/repo/issues/{number}",
+                }
+                for number in range(issues)
+            ],
+        }
+    return projects
+
+
+def response_model_path(model: Type[BaseModel]):
+    """What FastAPI does for a List[model] response_model."""
+    adapter = TypeAdapter(List[model])
+
+    def render(documents: List[dict]) -> bytes:
+        renamed = []
+        for document in documents:
+            document = dict(document)
+            document["id"] = str(document.pop("_id"))
+            renamed.append(document)
+        value = adapter.dump_python(adapter.validate_python(renamed), mode="json")
+        return json.dumps(value, ensure_ascii=False, allow_nan=False, separators=(",", ":")).encode()
+
+    return render
+
+
+def compare(label: str, model: Type[BaseModel], documents: List[dict], repeat: int) -> None:
+    slow = response_model_path(model)
+    fast = DocumentSerializer(model, dict)
+    size = len(fast.render(documents))
+
+    print(f"{label} ({len(documents):,} documents, {size / 1024:,.0f} KiB)")
+    slow_stats = time_call(lambda: slow(documents), repeat)
+    fast_stats = time_call(lambda: fast.render(documents), repeat)
+    print_row("response_model", slow_stats)
+    print_row(f"trusted ({'orjson' if orjson is not None else 'json'})", fast_stats)
+    print(f"  speedup {slow_stats['p50'] / fast_stats['p50']:.1f}x\n")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark list-response serialization.")
+    parser.add_argument("--subjects", type=int, default=100)
+    parser.add_argument("--depth", type=int, default=4, help="Subtopic tree depth per subject")
+    parser.add_argument("--projects", type=int, default=100)
+    parser.add_argument("--issues", type=int, default=200, help="GitHub issues per project")
+    parser.add_argument("--sessions", type=int, default=1000)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    scale = Scale(
+        sessions=args.sessions, subjects=args.subjects, projects=args.projects, practices=0,
+        subtopic_depth=args.depth
+    )
+    sessions = generate_sessions(args.sessions, synthetic_references(20, args.seed), seed=args.seed)
+
+    compare("subjects", Subject, generate_subjects(rng, scale), args.repeat)
+    compare("projects", Project, with_github_issues(rng, generate_projects(rng, scale), args.issues), args.repeat)
+    compare("sessions", Session, sessions, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,157 @@
+#!/usr/bin/env python3
+"""
+Benchmark subtopic tree statistics: the single-pass engine against the previous
+recursive passes (completion per root, counts, level stats, next leaf).
+
+Builds wide and deep synthetic trees, checks that both implementations agree,
+and times them. The recursive version cannot handle trees deeper than the
+Python recursion limit; those rows are reported as such.
+
+Usage (from the backend directory):
+    python -m benchmarks.subtopic_tree
+    python -m benchmarks.subtopic_tree --repeat 50
+"""
+
+import argparse
+import random
+import uuid
+from typing import List
+
+from app.services.subtopic_tree import subtopic_tree_stats
+from benchmarks.columnar import print_row, time_call
+
+
+def wide_tree(rng: random.Random, depth: int, branching: int) -> List[dict]:
+    """Every node has `branching` children, `depth` levels deep, stored out of `order` order."""
+    if depth <= 0:
+        return []
+    return [
+        {
+            "id": str(uuid.uuid4()),
+            "name": f"Topic {depth}.{order}",
+            "status": "completed" if rng.random() < 0.4 else "active",
+            "order": order,
+            "subtopics": wide_tree(rng, depth - 1, branching),
+        }
+        for order in rng.sample(range(branching), branching)
+    ]
+
+
+def deep_tree(rng: random.Random, depth: int, siblings: int) -> List[dict]:
+    """A chain `depth` levels deep with `siblings` leaves hanging off each level."""
+    roots: List[dict] = []
+    level = roots
+    for d in range(depth):
+        leaves = [
+            {"id": str(uuid.uuid4()), "name": f"Leaf {d}.{i}", "order": i + 1,
+             "status": "completed" if rng.random() < 0.5 else "active", "subtopics": []}
+            for i in range(siblings)
+        ]
+        node = {"id": str(uuid.uuid4()), "name": f"Level {d}", "order": 0, "status": "active", "subtopics": []}
+        level.extend([node] + leaves)
+        level = node["subtopics"]
+    return roots
+
+
+def count_nodes(subtopics: List[dict]) -> int:
+    total = 0
+    stack = list(subtopics)
+    while stack:
+        node = stack.pop()
+        total += 1
+        stack.extend(node.get("subtopics") or [])
+    return total
+
+
+# The recursive passes subtopic_tree_stats replaced, kept as the baseline
+
+def _completion(subtopic: dict) -> float:
+    if not subtopic.get("subtopics"):
+        return 100.0 if subtopic.get("status") == "completed" else 0.0
+    completions = [_completion(child) for child in subtopic["subtopics"]]
+    return round(sum(completions) / len(completions), 2)
+
+
+def _counts(subtopics: List[dict]) -> tuple:
+    total = completed = 0
+    for subtopic in subtopics:
+        total += 1
+        completed += subtopic.get("status") == "completed"
+        if subtopic.get("subtopics"):
+            nested_total, nested_completed = _counts(subtopic["subtopics"])
+            total += nested_total
+            completed += nested_completed
+    return total, completed
+
+
+def _levels(subtopics: List[dict], level: int = 0, stats: dict = None) -> dict:
+    stats = {} if stats is None else stats
+    for subtopic in subtopics:
+        counts = stats.setdefault(level, {"total": 0, "completed": 0})
+        counts["total"] += 1
+        counts["completed"] += subtopic.get("status") == "completed"
+        if subtopic.get("subtopics"):
+            _levels(subtopic["subtopics"], level + 1, stats)
+    return stats
+
+
+def _next_leaf(subtopics: List[dict], level: int = 0):
+    for subtopic in sorted(subtopics, key=lambda x: x.get("order", 0)):
+        if not subtopic.get("subtopics"):
+            if subtopic.get("status") != "completed":
+                return {"id": subtopic["id"], "name": subtopic["name"], "level": level}
+        else:
+            found = _next_leaf(subtopic["subtopics"], level + 1)
+            if found:
+                return found
+    return None
+
+
+def recursive_stats(subtopics: List[dict]) -> dict:
+    roots = [_completion(root) for root in subtopics]
+    total, completed = _counts(subtopics)
+    return {
+        "completionPercentage": round(sum(roots) / len(roots), 2) if roots else 0.0,
+        "completedSubtopicsCount": completed,
+        "totalSubtopicsCount": total,
+        "levelStats": [
+            {
+                "level": level,
+                "total": counts["total"],
+                "completed": counts["completed"],
+                "percentage": round((counts["completed"] / counts["total"]) * 100, 2) if counts["total"] > 0 else 0.0
+            }
+            for level, counts in sorted(_levels(subtopics).items())
+        ],
+        "nextRecommendedSubtopic": _next_leaf(subtopics),
+    }
+
+
+def compare(label: str, subtopics: List[dict], repeat: int) -> None:
+    print(f"{label} ({count_nodes(subtopics):,} nodes)")
+    try:
+        expected = recursive_stats(subtopics)
+    except RecursionError:
+        print(f"  {'recursive':<40} RecursionError")
+    else:
+        assert subtopic_tree_stats(subtopics) == expected, f"{label}: results differ"
+        print_row("recursive", time_call(lambda: recursive_stats(subtopics), repeat))
+    print_row("single pass", time_call(lambda: subtopic_tree_stats(subtopics), repeat))
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark subtopic tree statistics.")
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+
+    rng = random.Random(args.seed)
+    compare("wide: 10 children x 4 levels", wide_tree(rng, 4, 10), args.repeat)
+    compare("wide: 4 children x 7 levels", wide_tree(rng, 7, 4), args.repeat)
+    compare("deep: 200 levels, 5 leaves each", deep_tree(rng, 200, 5), args.repeat)
+    compare("deep: 5,000 levels, 1 leaf each", deep_tree(rng, 5000, 1), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Benchmark time-series session storage against the regular sessions collection.
+
+Writes the same synthetic sessions to two scratch databases on a local mongod
+(MongoDB 7.0+), one per SESSION_STORAGE mode, each with the indexes the API
+creates for that mode. Reports insert time, data/storage/index size, and the
+latency of the queries that read raw sessions: the session list, per-reference
+filters, the active session lookup and the aggregations the rollup, sketch and
+reference-stat rebuilds run.
+
+Usage (from the backend directory):
+    python -m benchmarks.timeseries --sessions 1000000
+    python -m benchmarks.timeseries --sessions 100000 --keep
+"""
+
+import argparse
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import ACTIVE_SESSION_FILTER
+from benchmarks.columnar import print_row, time_async
+from benchmarks.generator import generate_sessions, synthetic_references
+
+MODES = ["collection", "timeseries"]
+
+
+async def storage_stats(db) -> dict:
+    stats = await db.sessions.aggregate([{"$collStats": {"storageStats": {}}}]).to_list(1)
+    storage = stats[0]["storageStats"] if stats else {}
+    return {
+        "size": storage.get("size", 0),
+        "storageSize": storage.get("storageSize", 0),
+        "totalIndexSize": storage.get("totalIndexSize", 0),
+    }
+
+
+def queries(db, now: datetime) -> dict:
+    """Name -> coroutine function for each benchmarked read."""
+    month_ago = now - timedelta(days=30)
+    year_ago = now - timedelta(days=365)
+
+    async def list_newest():
+        await db.sessions.find({}).sort([("startTime", -1), ("_id", -1)]).limit(100).to_list(100)
+
+    async def list_reference():
+        await db.sessions.find({"referenceId": "ref3"}).sort([("startTime", -1), ("_id", -1)]).limit(100).to_list(100)
+
+    async def active_session():
+        await db.sessions.find_one(ACTIVE_SESSION_FILTER)
+
+    async def distribution():
+        await db.sessions.aggregate([
+            {"$match": {"startTime": {"$gte": month_ago}}},
+            {"$group": {"_id": "$referenceType", "d": {"$sum": "$duration"}, "c": {"$sum": 1}}}
+        ]).to_list(None)
+
+    async def daily_year():
+        await db.sessions.aggregate([
+            {"$match": {"startTime": {"$gte": year_ago}}},
+            {"$group": {
+                "_id": {
+                    "date": {"$dateToString": {"format": "%Y-%m-%d", "date": "$startTime"}},
+                    "referenceId": "$referenceId"
+                },
+                "duration": {"$sum": "$duration"}
+            }}
+        ]).to_list(None)
+
+    async def reference_totals():
+        await db.sessions.aggregate([
+            {"$group": {"_id": "$referenceId", "d": {"$sum": "$duration"}, "c": {"$sum": 1}, "last": {"$max": "$startTime"}}}
+        ], allowDiskUse=True).to_list(None)
+
+    return {
+        "list newest 100": list_newest,
+        "list one reference": list_reference,
+        "active session": active_session,
+        "distribution (30 days)": distribution,
+        "daily by reference (365 days)": daily_year,
+        "totals per reference (all time)": reference_totals,
+    }
+
+
+async def benchmark(args):
+    print(f"Generating {args.sessions:,} sessions...")
+    sessions = generate_sessions(args.sessions, synthetic_references(60), years=args.years)
+    now = datetime.utcnow()
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    storage_mode = settings.SESSION_STORAGE
+    try:
+        for mode in MODES:
+            db = client[f"{args.database}_{mode}"]
+            await client.drop_database(db.name)
+
+            # Create the collection and indexes exactly as the API would in this mode
+            settings.SESSION_STORAGE = mode
+            database.db.db = db
+            await database.create_indexes()
+
+            started = time.perf_counter()
+            for offset in range(0, len(sessions), 10000):
+                await db.sessions.insert_many([dict(doc) for doc in sessions[offset:offset + 10000]], ordered=False)
+            insert_seconds = time.perf_counter() - started
+
+            stats = await storage_stats(db)
+            print(f"\n{mode}")
+            print(f"  insert {insert_seconds:.1f} s   data {stats['size'] / 2**20:,.1f} MiB   "
+                  f"on disk {stats['storageSize'] / 2**20:,.1f} MiB   indexes {stats['totalIndexSize'] / 2**20:,.1f} MiB")
+            for label, query in queries(db, now).items():
+                print_row(label, await time_async(query, args.repeat))
+
+            if not args.keep:
+                await client.drop_database(db.name)
+    finally:
+        settings.SESSION_STORAGE = storage_mode
+        client.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark time-series session storage.")
+    parser.add_argument("--sessions", type=int, default=1_000_000)
+    parser.add_argument("--years", type=int, default=5)
+    parser.add_argument("--repeat", type=int, default=20)
+    parser.add_argument("--database", default="time_tracker_benchmark")
+    parser.add_argument("--keep", action="store_true", help="Keep the benchmark databases afterwards")
+    asyncio.run(benchmark(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
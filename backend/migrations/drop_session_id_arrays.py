@@ -0,0 +1,60 @@
+#!/usr/bin/env python3
+"""
+Migration: replace the `sessions` ID arrays on subjects and projects with
+maintained session aggregates.
+
+This script:
+1. Computes sessionCount, totalMinutes, timeSpent, lastStudied and the
+   recentSessions window for every subject and project from the sessions
+   collection
+2. Removes the unbounded `sessions` arrays
+
+Usage (from the backend directory):
+    python -m migrations.drop_session_id_arrays
+
+The script is idempotent and safe to run multiple times.
+
+IMPORTANT: Backup your database before running this migration!
+"""
+
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.reference_stats import REFERENCE_COLLECTIONS, rebuild_reference_stats
+
+
+async def migrate():
+    """Perform the migration."""
+    print("=" * 60)
+    print("MIGRATION: session ID arrays → session aggregates")
+    print("=" * 60)
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.DATABASE_NAME]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected to database: {settings.DATABASE_NAME}\n")
+
+        # Aggregates first, so nothing is lost if the script stops half way
+        print("🔄 Computing session aggregates...")
+        updated = await rebuild_reference_stats(db)
+        print(f"✓ Updated {updated} subjects and projects")
+
+        print("\n🗑  Removing session ID arrays...")
+        for collection in REFERENCE_COLLECTIONS.values():
+            result = await db[collection].update_many(
+                {"sessions": {"$exists": True}},
+                {"$unset": {"sessions": ""}}
+            )
+            print(f"✓ {collection}: removed from {result.modified_count} documents")
+
+        print("\n✅ Migration completed successfully!")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate())
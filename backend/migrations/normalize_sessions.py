@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Migration: rewrite legacy session documents to the current Session shape.
+
+This script:
+1. Moves the old `type` field to `referenceType` (with "course" → "subject")
+2. Fills in missing sessionType, date and name the way create_session does
+3. Stores a missing endTime as null, so running sessions match the
+   active_session index filter (endTime of type null)
+4. Drops the indexes replaced by the query-shaped compound indexes
+
+Documents are processed in _id order in batches, and the last finished _id is
+checkpointed in the `migrations` collection, so an interrupted run resumes
+where it stopped (a run after a completed one scans from the start again).
+Run it before starting the upgraded API: session reads and filters no longer
+patch legacy documents on the fly.
+
+Usage (from the backend directory):
+    python -m migrations.normalize_sessions
+    python -m migrations.normalize_sessions --batch-size 5000 --restart
+
+The script is idempotent and safe to run multiple times.
+
+IMPORTANT: Backup your database before running this migration!
+"""
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import UpdateOne
+from pymongo.errors import OperationFailure
+
+from app.core.config import settings
+
+CHECKPOINT_ID = "normalize_sessions"
+
+# Sessions still in a legacy shape
+LEGACY_SESSION_FILTER = {"$or": [
+    {"type": {"$exists": True}},
+    {"referenceType": {"$exists": False}},
+    {"referenceType": "course"},
+    {"sessionType": {"$exists": False}},
+    {"date": {"$exists": False}},
+    {"name": {"$exists": False}},
+    {"endTime": {"$exists": False}},
+]}
+
+# Superseded by (referenceType, startTime) and (referenceId, startTime)
+OBSOLETE_INDEXES = ["type_1_startTime_-1", "referenceId_1"]
+
+
+def normalize_session(session_doc: dict) -> dict:
+    """The update that brings one legacy session document to the current shape."""
+    updates = {}
+
+    reference_type = session_doc.get("referenceType") or session_doc.get("type") or "subject"
+    if reference_type == "course":
+        reference_type = "subject"
+    if session_doc.get("referenceType") != reference_type:
+        updates["referenceType"] = reference_type
+
+    if "sessionType" not in session_doc:
+        updates["sessionType"] = "study"
+    if "date" not in session_doc and session_doc.get("startTime"):
+        updates["date"] = session_doc["startTime"].replace(hour=0, minute=0, second=0, microsecond=0)
+    if "name" not in session_doc:
+        updates["name"] = "Unknown"
+    if "endTime" not in session_doc:
+        updates["endTime"] = None
+
+    update = {}
+    if updates:
+        update["$set"] = updates
+    if "type" in session_doc:
+        update["$unset"] = {"type": ""}
+    return update
+
+
+async def migrate(batch_size: int, restart: bool):
+    """Perform the migration."""
+    print("=" * 60)
+    print("MIGRATION: normalize legacy session documents")
+    print("=" * 60)
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.DATABASE_NAME]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected to database: {settings.DATABASE_NAME}\n")
+
+        if restart:
+            await db.migrations.delete_one({"_id": CHECKPOINT_ID})
+        checkpoint = await db.migrations.find_one({"_id": CHECKPOINT_ID})
+        # Only an interrupted run resumes; later runs pick up fields added to the filter since
+        last_id = checkpoint.get("lastId") if checkpoint and not checkpoint.get("completed") else None
+        if last_id:
+            print(f"↻ Resuming after session {last_id}")
+
+        total = 0
+        while True:
+            query = dict(LEGACY_SESSION_FILTER)
+            if last_id:
+                query["_id"] = {"$gt": last_id}
+            batch = await db.sessions.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+
+            operations = [UpdateOne({"_id": doc["_id"]}, normalize_session(doc)) for doc in batch]
+            await db.sessions.bulk_write(operations, ordered=False)
+
+            last_id = batch[-1]["_id"]
+            await db.migrations.update_one(
+                {"_id": CHECKPOINT_ID},
+                {"$set": {"lastId": last_id, "completed": False}},
+                upsert=True
+            )
+            total += len(batch)
+            print(f"  … {total} sessions normalized")
+
+        print(f"✓ Normalized {total} sessions")
+
+        print("\n🗑  Dropping superseded indexes...")
+        existing = await db.sessions.index_information()
+        for name in OBSOLETE_INDEXES:
+            if name in existing:
+                try:
+                    await db.sessions.drop_index(name)
+                    print(f"✓ Dropped {name}")
+                except OperationFailure as e:
+                    print(f"⚠ Could not drop {name}: {e}")
+
+        await db.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"completed": True}},
+            upsert=True
+        )
+        print("\n✅ Migration completed successfully!")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rewrite legacy sessions to the current shape.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--restart", action="store_true", help="Ignore the checkpoint and scan from the start")
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size, args.restart))
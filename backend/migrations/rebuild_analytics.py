@@ -0,0 +1,87 @@
+#!/usr/bin/env python3
+"""
+Rebuild derived analytics collections from the raw sessions collection.
+
+Session writes keep these collections current incrementally; this script
+regenerates them from scratch, e.g. after importing data directly into
+MongoDB or if the derived data has drifted.
+
+Usage (from the backend directory):
+    python -m migrations.rebuild_analytics            # rebuild everything
+    python -m migrations.rebuild_analytics rollups    # only the daily rollups
+
+The script is idempotent and safe to run multiple times.
+"""
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.services.reference_stats import rebuild_reference_stats
+from app.services.rollups import rebuild_rollups
+from app.services.session_overlaps import rebuild_longest_span
+from app.services.sketches import rebuild_sketches
+from app.services.streaks import rebuild_streaks
+
+
+async def rebuild(targets):
+    """Rebuild the requested derived collections."""
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.DATABASE_NAME]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected to database: {settings.DATABASE_NAME}\n")
+
+        if "rollups" in targets:
+            print("🔄 Rebuilding session_daily_rollups...")
+            written = await rebuild_rollups(db)
+            print(f"✓ Wrote {written} rollup documents")
+
+        if "streaks" in targets:
+            # Streaks are derived from the rollups, so rebuild those first when both are requested
+            print("🔄 Rebuilding streak state...")
+            state = await rebuild_streaks(db)
+            print(f"✓ Longest streak: {state['longestStreak']} days, last active: {state['lastActiveDay']}")
+
+        if "sketches" in targets:
+            print("🔄 Rebuilding session_length_sketches...")
+            written = await rebuild_sketches(db)
+            print(f"✓ Wrote {written} sketch documents")
+
+        if "references" in targets:
+            print("🔄 Rebuilding subject/project session aggregates...")
+            updated = await rebuild_reference_stats(db)
+            print(f"✓ Updated {updated} subjects and projects")
+
+        if "spans" in targets:
+            print("🔄 Rebuilding the longest session span (overlap detection bound)...")
+            max_seconds = await rebuild_longest_span(db)
+            print(f"✓ Longest session: {max_seconds} s")
+
+        print("\n✅ Rebuild completed successfully!")
+    finally:
+        client.close()
+
+
+TARGETS = ["rollups", "streaks", "sketches", "references", "spans"]
+
+
+def main():
+    """Main entry point."""
+    parser = argparse.ArgumentParser(description="Rebuild derived analytics data from sessions.")
+    parser.add_argument(
+        "targets",
+        nargs="*",
+        choices=TARGETS,
+        help="What to rebuild (default: everything)"
+    )
+    args = parser.parse_args()
+
+    asyncio.run(rebuild(args.targets or TARGETS))
+
+
+if __name__ == "__main__":
+    main()
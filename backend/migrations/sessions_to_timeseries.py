@@ -0,0 +1,139 @@
+#!/usr/bin/env python3
+"""
+Migration: move sessions into a MongoDB time-series collection (SESSION_STORAGE=timeseries).
+
+This script:
+1. Renames the regular `sessions` collection to `sessions_regular`
+2. Creates `sessions` as a time-series collection (startTime as timeField,
+   referenceId as metaField, see SESSIONS_TIMESERIES)
+3. Copies every session across in _id order, keeping its _id
+
+The last copied _id is checkpointed in the `migrations` collection, so an
+interrupted run resumes where it stopped. Stop the API first, run
+`python -m migrations.normalize_sessions` before this script (time-series
+collections cannot be rewritten in bulk), then set SESSION_STORAGE=timeseries
+and start the API, which creates the indexes. `sessions_regular` is kept as a
+backup: drop it once the new collection is verified, or rename it back to
+`sessions` to return to SESSION_STORAGE=collection.
+
+Requires MongoDB 7.0 or newer.
+
+Usage (from the backend directory):
+    python -m migrations.sessions_to_timeseries
+    python -m migrations.sessions_to_timeseries --batch-size 5000
+
+IMPORTANT: Backup your database before running this migration!
+"""
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.database import SESSIONS_TIMESERIES
+
+CHECKPOINT_ID = "sessions_to_timeseries"
+BACKUP_COLLECTION = "sessions_regular"
+
+# Documents a time-series collection would reject or bucket wrongly
+UNFIT_SESSION_FILTER = {"$or": [
+    {"startTime": {"$not": {"$type": "date"}}},
+    {"referenceId": {"$exists": False}},
+]}
+
+
+async def collection_type(db, name: str):
+    """"collection", "timeseries" or None when `name` does not exist."""
+    cursor = await db.list_collections(filter={"name": name})
+    existing = await cursor.to_list(1)
+    return existing[0].get("type", "collection") if existing else None
+
+
+async def migrate(batch_size: int):
+    """Perform the migration."""
+    print("=" * 60)
+    print("MIGRATION: sessions → time-series collection")
+    print("=" * 60)
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.DATABASE_NAME]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected to database: {settings.DATABASE_NAME}\n")
+
+        sessions_type = await collection_type(db, "sessions")
+        backup_type = await collection_type(db, BACKUP_COLLECTION)
+
+        if sessions_type == "timeseries" and backup_type is None:
+            print("✓ sessions is already a time-series collection")
+            return
+
+        if sessions_type == "collection":
+            if backup_type is not None:
+                print(f"✗ Both sessions and {BACKUP_COLLECTION} exist as regular collections; resolve this by hand")
+                return
+            unfit = await db.sessions.count_documents(UNFIT_SESSION_FILTER)
+            if unfit:
+                print(f"✗ {unfit} sessions lack a startTime date or referenceId; run migrations.normalize_sessions first")
+                return
+
+            await db.sessions.rename(BACKUP_COLLECTION)
+            await db.migrations.delete_one({"_id": CHECKPOINT_ID})
+            print(f"✓ Renamed sessions → {BACKUP_COLLECTION}")
+
+        if await collection_type(db, "sessions") is None:
+            await db.create_collection("sessions", timeseries=SESSIONS_TIMESERIES)
+            print("✓ Created time-series sessions collection")
+
+        checkpoint = await db.migrations.find_one({"_id": CHECKPOINT_ID})
+        last_id = checkpoint.get("lastId") if checkpoint else None
+        if last_id:
+            # Time-series collections have no unique _id index, so drop whatever
+            # the interrupted batch managed to write before copying it again
+            await db.sessions.delete_many({"_id": {"$gt": last_id}})
+            print(f"↻ Resuming after session {last_id}")
+
+        backup = db[BACKUP_COLLECTION]
+        copied = 0
+        while True:
+            query = {"_id": {"$gt": last_id}} if last_id else {}
+            batch = await backup.find(query).sort("_id", 1).limit(batch_size).to_list(batch_size)
+            if not batch:
+                break
+
+            await db.sessions.insert_many(batch, ordered=False)
+
+            last_id = batch[-1]["_id"]
+            await db.migrations.update_one(
+                {"_id": CHECKPOINT_ID},
+                {"$set": {"lastId": last_id}},
+                upsert=True
+            )
+            copied += len(batch)
+            print(f"  … {copied} sessions copied")
+
+        source_count = await backup.count_documents({})
+        target_count = await db.sessions.count_documents({})
+        if source_count != target_count:
+            print(f"✗ {BACKUP_COLLECTION} has {source_count} sessions but sessions has {target_count}")
+            return
+
+        await db.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"completed": True}},
+            upsert=True
+        )
+        print(f"✓ {target_count} sessions in the time-series collection")
+        print("\n✅ Migration completed successfully!")
+        print(f"   Set SESSION_STORAGE=timeseries, start the API, then drop {BACKUP_COLLECTION} once verified.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move sessions into a time-series collection.")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.batch_size))
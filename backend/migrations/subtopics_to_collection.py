@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Migration: move subject subtopic trees into the subtopics collection (SUBTOPIC_STORAGE=collection).
+
+This script:
+1. Creates the subtopics indexes (see create_subtopic_indexes)
+2. Stores every embedded subtopic tree as one document per subtopic, with
+   parent pointers and materialized paths (see app/services/subtopic_storage.py)
+3. Empties each converted subject's `subtopics` array and stores its completion
+   and subtopic counters, which the collection mode keeps up to date from then on
+
+With --reverse it rebuilds each subject's `subtopics` array from the collection
+and deletes the subject's subtopic documents, for returning to
+SUBTOPIC_STORAGE=embedded.
+
+A subject is converted by replacing its documents on the target side before
+clearing the source side, so an interrupted run is simply run again. Subjects
+whose trees repeat a subtopic ID or use '/' in one are reported and left
+embedded; fix them and run the script again. Stop the API first, then set
+SUBTOPIC_STORAGE and start it.
+
+Usage (from the backend directory):
+    python -m migrations.subtopics_to_collection
+    python -m migrations.subtopics_to_collection --reverse
+
+The script is idempotent and safe to run multiple times.
+
+IMPORTANT: Backup your database before running this migration!
+"""
+
+import argparse
+import asyncio
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from app.core.config import settings
+from app.core.database import create_subtopic_indexes
+from app.services.subtopic_storage import build_subtopic_tree, flatten_subtopics, invalid_subtopic_ids
+from app.services.subtopic_tree import subtopic_progress_fields
+
+CHECKPOINT_ID = "subtopics_to_collection"
+
+
+async def to_collection(db, batch_size: int):
+    await create_subtopic_indexes(db)
+    print("✓ Subtopic indexes ready")
+
+    converted = nodes = 0
+    skipped = []
+    cursor = db.subjects.find({"subtopics.0": {"$exists": True}}, {"subtopics": 1, "name": 1}).batch_size(batch_size)
+    async for subject in cursor:
+        if invalid_subtopic_ids(subject["subtopics"]):
+            skipped.append(subject)
+            continue
+
+        # Refreshes every cachedCompletion before the nodes are flattened
+        progress = subtopic_progress_fields(subject["subtopics"])
+        documents = flatten_subtopics(subject["_id"], subject["subtopics"])
+        await db.subtopics.delete_many({"subjectId": subject["_id"]})
+        await db.subtopics.insert_many(documents)
+        await db.subjects.update_one({"_id": subject["_id"]}, {"$set": {"subtopics": [], **progress}})
+
+        converted += 1
+        nodes += len(documents)
+        if converted % 100 == 0:
+            print(f"  … {converted} subjects converted")
+
+    print(f"✓ {converted} subjects converted, {nodes} subtopics stored")
+    for subject in skipped:
+        print(f"✗ Skipped {subject['_id']} ({subject.get('name', '')}): "
+              f"invalid subtopic IDs {', '.join(invalid_subtopic_ids(subject['subtopics'])[:10])}")
+    return not skipped
+
+
+async def to_embedded(db, batch_size: int):
+    converted = 0
+    subject_ids = await db.subtopics.distinct("subjectId")
+    for offset in range(0, len(subject_ids), batch_size):
+        for subject_id in subject_ids[offset:offset + batch_size]:
+            documents = await db.subtopics.find({"subjectId": subject_id}).to_list(None)
+            result = await db.subjects.update_one(
+                {"_id": subject_id},
+                {"$set": {"subtopics": build_subtopic_tree(documents)}}
+            )
+            if result.matched_count == 0:
+                print(f"  ! Subject {subject_id} no longer exists; dropping its subtopics")
+            await db.subtopics.delete_many({"subjectId": subject_id})
+            converted += 1
+        print(f"  … {converted} subjects embedded")
+
+    print(f"✓ {converted} subjects embedded")
+    return True
+
+
+async def migrate(reverse: bool, batch_size: int):
+    """Perform the migration."""
+    print("=" * 60)
+    print("MIGRATION: subtopics collection → embedded subtopics" if reverse
+          else "MIGRATION: embedded subtopics → subtopics collection")
+    print("=" * 60)
+
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.DATABASE_NAME]
+
+    try:
+        await client.admin.command('ping')
+        print(f"✓ Connected to database: {settings.DATABASE_NAME}\n")
+
+        completed = await (to_embedded(db, batch_size) if reverse else to_collection(db, batch_size))
+        if not completed:
+            print("\n⚠ Migration incomplete; fix the subjects above and run it again")
+            return
+
+        await db.migrations.update_one(
+            {"_id": CHECKPOINT_ID},
+            {"$set": {"completed": True, "storage": "embedded" if reverse else "collection"}},
+            upsert=True
+        )
+        print("\n✅ Migration completed successfully!")
+        print(f"   Set SUBTOPIC_STORAGE={'embedded' if reverse else 'collection'} and start the API.")
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Move subject subtopics between embedded arrays and the subtopics collection.")
+    parser.add_argument("--reverse", action="store_true", help="Embed the trees back into the subject documents")
+    parser.add_argument("--batch-size", type=int, default=100)
+    args = parser.parse_args()
+    asyncio.run(migrate(args.reverse, args.batch_size))
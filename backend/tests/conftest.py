@@ -0,0 +1,127 @@
+"""
+Shared fixtures. Tests run against an in-memory mongomock database, so they
+need no mongod; `client` calls the app through ASGI with `get_database`
+pointed at that database.
+"""
+import pytest
+from httpx import ASGITransport, AsyncClient
+from mongomock import aggregate as mongomock_aggregate, collection as mongomock_collection, filtering
+from mongomock_motor import AsyncMongoMockClient
+
+from app.core import database
+from app.core.database import create_indexes, get_database
+from app.main import app
+from app.services import columnar
+from app.services.cache import analytics_cache
+
+# mongomock leaves {"$type": "null"} unimplemented; the active-session filter relies on it.
+# Missing fields are not null here either, as in MongoDB.
+filtering.TYPE_MAP["null"] = lambda value: value is None
+
+
+def _max_updater(doc, field_name, value):
+    # MongoDB orders null below every other value; mongomock compares with Python's max()
+    if isinstance(doc, dict):
+        current = doc.get(field_name)
+        doc[field_name] = value if current is None else max(current, value)
+
+
+mongomock_collection._updaters["$max"] = _max_updater
+
+
+_handle_project_operator = mongomock_aggregate._Parser._handle_project_operator
+
+
+def _handle_project_operator_on_expressions(self, operator, values):
+    # mongomock only accepts a field path or a list as the operand of $max and
+    # the other accumulators in $project; MongoDB also takes an array expression
+    if operator in mongomock_aggregate._GROUPING_OPERATOR_MAP and isinstance(values, dict):
+        return mongomock_aggregate._GROUPING_OPERATOR_MAP[operator](self.parse(values) or [])
+    return _handle_project_operator(self, operator, values)
+
+
+mongomock_aggregate._Parser._handle_project_operator = _handle_project_operator_on_expressions
+
+
+def _resolve_array_filters(document, update, array_filters):
+    """
+    `update` with each `$[name]` replaced by the index of the array element its
+    filter (`{"name.field": value}`, equality only) selects in `document`.
+    """
+    conditions = {}
+    for array_filter in array_filters:
+        ((key, value),) = array_filter.items()
+        name, field = key.split(".", 1)
+        conditions[name] = (field, value)
+
+    resolved = {}
+    for operator, fields in update.items():
+        resolved[operator] = {}
+        for path, value in fields.items():
+            node, parts = document, []
+            for part in path.split("."):
+                if part.startswith("$[") and part.endswith("]"):
+                    field, expected = conditions[part[2:-1]]
+                    index = next((i for i, item in enumerate(node or []) if item.get(field) == expected), None)
+                    if index is None:
+                        break
+                    part = str(index)
+                node = node[int(part)] if isinstance(node, list) else (node or {}).get(part)
+                parts.append(part)
+            else:
+                resolved[operator][".".join(parts)] = value
+    return resolved
+
+
+_find_one_and_update = mongomock_collection.Collection.find_one_and_update
+
+
+def _find_one_and_update_with_array_filters(self, filter, update, *args, array_filters=None, **kwargs):
+    # mongomock has no arrayFilters; apply the update to the concrete elements instead
+    if array_filters:
+        document = self.find_one(filter)
+        if document is None:
+            return None
+        filter = {**filter, "_id": document["_id"]}
+        update = _resolve_array_filters(document, update, array_filters)
+    return _find_one_and_update(self, filter, update, *args, **kwargs)
+
+
+mongomock_collection.Collection.find_one_and_update = _find_one_and_update_with_array_filters
+
+
+@pytest.fixture
+def mongo_client():
+    return AsyncMongoMockClient()
+
+
+@pytest.fixture
+def db(mongo_client):
+    return mongo_client["time_tracker_test"]
+
+
+@pytest.fixture
+async def indexes(db, monkeypatch):
+    """The app's indexes, created on the test database."""
+    monkeypatch.setattr(database.db, "db", db)
+    await create_indexes()
+    return db
+
+
+@pytest.fixture(autouse=True)
+def fresh_process_state():
+    """Analytics cache and columnar store are per process; start every test empty."""
+    analytics_cache.clear()
+    columnar.session_columns = None
+    yield
+    analytics_cache.clear()
+    columnar.session_columns = None
+
+
+@pytest.fixture
+async def client(db):
+    app.dependency_overrides[get_database] = lambda: db
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as http:
+        yield http
+    app.dependency_overrides.clear()
+
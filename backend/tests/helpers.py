@@ -0,0 +1,58 @@
+"""Request payloads shared by the tests."""
+from datetime import datetime, timedelta
+
+
+def session_payload(start: datetime, minutes: int = 30, reference_id: str = "ref-1", **fields) -> dict:
+    """A finished session for POST /api/sessions."""
+    payload = {
+        "name": "C Programming",
+        "referenceType": "subject",
+        "referenceId": reference_id,
+        "sessionType": "study",
+        "date": start.replace(hour=0, minute=0, second=0, microsecond=0).isoformat(),
+        "startTime": start.isoformat(),
+        "endTime": (start + timedelta(minutes=minutes)).isoformat(),
+    }
+    payload.update(fields)
+    return payload
+
+
+def subtopic(subtopic_id: str, *children: dict, completed: bool = False, order: int = 0) -> dict:
+    """A subtopic payload with a fixed ID."""
+    return {"id": subtopic_id, "name": subtopic_id.title(), "status": "completed" if completed else "active",
+            "order": order, "subtopics": list(children)}
+
+
+def syllabus() -> list:
+    """Three levels, mixed statuses: algebra > (groups > cosets*, lagrange), (rings*); geometry*."""
+    return [
+        subtopic("algebra",
+                 subtopic("groups", subtopic("cosets", completed=True), subtopic("lagrange", order=1)),
+                 subtopic("rings", completed=True, order=1)),
+        subtopic("geometry", completed=True, order=1),
+    ]
+
+
+def check_progress(subject: dict) -> None:
+    """
+    Assert the subject's completion, counters and every cachedCompletion match
+    the recursive definition over its subtopic tree.
+    """
+    counts = {"total": 0, "completed": 0}
+
+    def completion(node: dict) -> float:
+        counts["total"] += 1
+        counts["completed"] += node.get("status") == "completed"
+        children = node.get("subtopics") or []
+        if not children:
+            return 100.0 if node.get("status") == "completed" else 0.0
+        value = round(sum(completion(child) for child in children) / len(children), 2)
+        assert node["cachedCompletion"] == value, node["id"]
+        return value
+
+    roots = subject["subtopics"]
+    overall = round(sum(completion(root) for root in roots) / len(roots), 2) if roots else 0.0
+    assert subject["completionPercentage"] == overall
+    assert subject["progress"] == overall
+    assert subject["totalSubtopicsCount"] == counts["total"]
+    assert subject["completedSubtopicsCount"] == counts["completed"]
@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from migrations.normalize_sessions import normalize_session
+from tests.helpers import session_payload
+
+
+def running_payload(start):
+    payload = session_payload(start)
+    payload.pop("endTime")
+    return payload
+
+
+async def test_active_session_is_the_running_one(client, indexes):
+    assert (await client.get("/api/sessions/active")).json() is None
+
+    await client.post("/api/sessions/", json=session_payload(datetime(2024, 9, 1, 8)))
+    running = (await client.post("/api/sessions/", json=running_payload(datetime(2024, 9, 1, 10)))).json()
+
+    assert (await client.get("/api/sessions/active")).json()["id"] == running["id"]
+
+
+async def test_second_running_session_is_rejected(client, indexes):
+    first = (await client.post("/api/sessions/", json=running_payload(datetime(2024, 9, 1, 10)))).json()
+
+    response = await client.post("/api/sessions/", json=running_payload(datetime(2024, 9, 1, 11)))
+    assert response.status_code == 409
+
+    # Stopping the first frees the slot
+    stopped = {**running_payload(datetime(2024, 9, 1, 10)), "endTime": "2024-09-01T10:30:00"}
+    assert (await client.put(f"/api/sessions/{first['id']}", json=stopped)).status_code == 200
+    assert (await client.post("/api/sessions/", json=running_payload(datetime(2024, 9, 1, 11)))).status_code == 201
+
+
+async def test_legacy_running_session_is_found_after_backfill(client, db):
+    legacy = {"_id": ObjectId(), "type": "course", "referenceId": "c1", "startTime": datetime(2024, 9, 1, 9)}
+    await db.sessions.insert_one(legacy)
+    assert (await client.get("/api/sessions/active")).json() is None
+
+    update = normalize_session(legacy)
+    assert update["$set"]["endTime"] is None
+    await db.sessions.update_one({"_id": legacy["_id"]}, update)
+
+    active = (await client.get("/api/sessions/active")).json()
+    assert (active["id"], active["referenceType"], active["endTime"]) == (str(legacy["_id"]), "subject", None)
@@ -0,0 +1,28 @@
+from app.core.config import settings
+from benchmarks.generator import Scale, generate_dataset, seed_database
+from benchmarks.run import endpoints, percentile
+
+SMALL = Scale(sessions=300, subjects=4, projects=3, practices=2, years=1, subtopic_depth=2)
+
+
+def test_sessions_reference_generated_documents():
+    dataset = generate_dataset(SMALL, seed=1)
+
+    ids = {str(doc["_id"]) for name in ("subjects", "projects", "practices") for doc in dataset[name]}
+    assert len(dataset["sessions"]) == 300
+    assert {session["referenceId"] for session in dataset["sessions"]} <= ids
+    assert all(session["endTime"] > session["startTime"] for session in dataset["sessions"])
+
+
+def test_percentile_picks_the_nearest_rank():
+    assert percentile([5, 1, 4, 2, 3], 0.5) == 3
+    assert percentile([5, 1, 4, 2, 3], 0.95) == 5
+
+
+async def test_every_benchmarked_endpoint_serves_the_seeded_data(client, db):
+    counts = await seed_database(db, generate_dataset(SMALL, seed=1))
+    assert counts["sessions"] == 300
+
+    for name, (path, params) in endpoints().items():
+        response = await client.get(settings.API_V1_PREFIX + path, params=params)
+        assert response.status_code == 200, name
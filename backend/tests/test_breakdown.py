@@ -0,0 +1,36 @@
+from datetime import datetime
+
+from tests.helpers import session_payload
+
+
+async def test_breakdown_totals_each_reference_in_the_range(client):
+    for start, minutes, reference_type, reference_id, name in [
+        (datetime(2024, 5, 1, 9), 60, "subject", "s1", "Algebra"),
+        (datetime(2024, 5, 2, 9), 30, "subject", "s1", "Linear Algebra"),
+        (datetime(2024, 5, 2, 12), 90, "project", "p1", "Tracker"),
+        (datetime(2024, 5, 3, 9), 30, "practice_platform", "x1", "LeetCode"),
+        (datetime(2024, 5, 9, 9), 45, "subject", "s1", "Algebra"),
+    ]:
+        payload = session_payload(start, minutes, reference_id, referenceType=reference_type, name=name)
+        assert (await client.post("/api/sessions/", json=payload)).status_code == 201
+
+    response = await client.get("/api/analytics/breakdown?start=2024-05-01&end=2024-05-03")
+    assert response.status_code == 200
+    breakdown = response.json()
+
+    assert (breakdown["period"], breakdown["startDate"], breakdown["endDate"]) == (None, "2024-05-01", "2024-05-03")
+    assert breakdown["total"] == 210
+    assert [(item["id"], item["duration"], item["sessionCount"]) for item in breakdown["projects"]] == [("p1", 90, 1)]
+    # The most recent name in the range wins
+    assert breakdown["subjects"] == [{
+        "id": "s1", "name": "Linear Algebra", "duration": 90, "hours": 1.5, "sessionCount": 2,
+        "percentage": 42.9
+    }]
+    assert breakdown["practices"][0]["duration"] == 30
+    assert breakdown["byCategory"]["subjects"] == 90
+    assert breakdown["byCategory"]["projectsHours"] == 1.5
+
+
+async def test_breakdown_rejects_an_inverted_range(client):
+    response = await client.get("/api/analytics/breakdown?start=2024-05-03&end=2024-05-01")
+    assert response.status_code == 400
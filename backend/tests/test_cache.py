@@ -0,0 +1,47 @@
+from datetime import datetime
+
+from app.services.cache import AnalyticsCache
+from tests.helpers import session_payload
+
+
+def test_write_epochs_invalidate_dependent_entries_only():
+    cache = AnalyticsCache()
+    sessions_key = cache.make_key("summary", {"period": "week"}, ("sessions",))
+    subjects_key = cache.make_key("subjects", {}, ("subjects",))
+    cache.put(sessions_key, 1)
+    cache.put(subjects_key, 2)
+
+    cache.mark_written("sessions")
+
+    assert cache.get(cache.make_key("summary", {"period": "week"}, ("sessions",))) == (False, None)
+    assert cache.get(cache.make_key("subjects", {}, ("subjects",))) == (True, 2)
+
+
+def test_least_recently_used_entry_is_evicted():
+    cache = AnalyticsCache(max_entries=2)
+    cache.put("a", 1)
+    cache.put("b", 2)
+    cache.get("a")
+    cache.put("c", 3)
+
+    assert cache.get("b") == (False, None)
+    assert cache.get("a") == (True, 1)
+    assert cache.stats()["entries"] == 2
+
+
+async def test_cached_analytics_are_refreshed_after_writes(client):
+    start = datetime(2024, 5, 1, 9)
+    await client.post("/api/sessions/", json=session_payload(start, 30))
+
+    url = "/api/analytics/breakdown?start=2024-05-01&end=2024-05-01"
+    first = (await client.get(url)).json()
+    hits = (await client.get("/api/analytics/cache-stats")).json()["hits"]
+    assert (await client.get(url)).json() == first
+    assert (await client.get("/api/analytics/cache-stats")).json()["hits"] == hits + 1
+
+    await client.post("/api/sessions/", json=session_payload(start.replace(hour=12), 15))
+    assert (await client.get(url)).json()["total"] == 45
+
+    progress = (await client.get("/api/analytics/progress")).json()
+    await client.post("/api/subjects/", json={"name": "Algebra"})
+    assert (await client.get("/api/analytics/progress")).json() != progress
@@ -0,0 +1,64 @@
+from datetime import datetime, timezone, timedelta
+
+import pytest
+from bson import ObjectId
+from fastapi import HTTPException
+
+from app.services.crud import as_stored, parse_object_id, update_document
+
+
+def test_as_stored_matches_what_mongodb_returns():
+    local = datetime(2024, 5, 1, 12, 30, 15, 123456, tzinfo=timezone(timedelta(hours=2)))
+    assert as_stored({"at": local})["at"] == datetime(2024, 5, 1, 10, 30, 15, 123000)
+
+
+def test_malformed_ids_are_a_bad_request():
+    with pytest.raises(HTTPException) as error:
+        parse_object_id("nope", "board")
+    assert (error.value.status_code, error.value.detail) == (400, "Invalid board ID format")
+
+
+async def test_update_document_returns_the_new_version_or_404(db):
+    oid = (await db.boards.insert_one({"name": "Focus", "order": 1})).inserted_id
+
+    updated = await update_document(db.boards, oid, {"$set": {"order": 2}}, "Board not found")
+    assert updated["order"] == 2
+
+    with pytest.raises(HTTPException) as error:
+        await update_document(db.boards, ObjectId(), {"$set": {"order": 3}}, "Board not found")
+    assert error.value.status_code == 404
+
+
+@pytest.mark.parametrize("collection, payload", [
+    ("subjects", {"name": "Algebra", "subtopics": [{"name": "Groups"}]}),
+    ("projects", {"name": "Tracker"}),
+    ("practices", {"name": "Daily LeetCode", "platform": "leetcode"}),
+    ("boards", {"name": "Custom"}),
+])
+async def test_created_documents_match_a_read_back(client, collection, payload):
+    created = await client.post(f"/api/{collection}/", json=payload)
+    assert created.status_code == 201
+
+    fetched = await client.get(f"/api/{collection}/{created.json()['id']}")
+    assert fetched.json() == created.json()
+
+
+async def test_updates_of_missing_documents_are_404(client):
+    missing = str(ObjectId())
+    assert (await client.put(f"/api/projects/{missing}", json={"name": "x"})).status_code == 404
+    assert (await client.put(f"/api/boards/{missing}", json={"name": "x"})).status_code == 404
+    assert (await client.put("/api/boards/not-an-id", json={"name": "x"})).status_code == 400
+
+
+async def test_board_delete_and_reorder(client, db):
+    boards = (await client.get("/api/boards/")).json()
+    default = boards[0]
+    custom = (await client.post("/api/boards/", json={"name": "Custom", "order": 9})).json()
+
+    assert (await client.delete(f"/api/boards/{default['id']}")).status_code == 400
+    response = await client.put("/api/boards/reorder", json=[{"id": custom["id"], "order": 0}, {"id": "bad", "order": 1}])
+    assert response.status_code == 200
+    assert (await db.boards.find_one({"_id": ObjectId(custom["id"])}))["order"] == 0
+
+    assert (await client.delete(f"/api/boards/{custom['id']}")).status_code == 204
+    assert (await client.delete(f"/api/boards/{custom['id']}")).status_code == 404
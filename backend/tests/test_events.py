@@ -0,0 +1,69 @@
+import json
+from datetime import datetime
+
+import pytest
+
+from app.routes.events import format_event
+from app.services.events import EventBroker, event_broker
+from tests.helpers import session_payload
+
+
+def test_events_fan_out_to_every_subscriber():
+    broker = EventBroker()
+    first, second = broker.subscribe(), broker.subscribe()
+
+    broker.publish({"type": "change", "collection": "subjects"})
+    broker.unsubscribe(second)
+    broker.publish({"type": "change", "collection": "projects"})
+
+    assert [first.get_nowait()["collection"] for _ in range(2)] == ["subjects", "projects"]
+    assert second.qsize() == 1
+    assert broker.subscriber_count == 1
+
+
+def test_slow_subscriber_gets_a_single_resync():
+    broker = EventBroker(queue_size=2)
+    queue = broker.subscribe()
+
+    for _ in range(3):
+        broker.publish({"type": "change", "collection": "sessions"})
+
+    assert queue.qsize() == 1
+    assert queue.get_nowait()["type"] == "resync"
+
+
+def test_event_frames_are_named_after_the_type():
+    frame = format_event({"type": "change", "collection": "boards"})
+    assert frame.startswith("event: change\ndata: ")
+    assert json.loads(frame.split("data: ", 1)[1])["collection"] == "boards"
+
+
+@pytest.fixture
+def events():
+    queue = event_broker.subscribe()
+    yield queue
+    event_broker.unsubscribe(queue)
+
+
+def drain(queue):
+    received = []
+    while not queue.empty():
+        received.append(queue.get_nowait())
+    return received
+
+
+async def test_session_and_subject_writes_publish_events(client, events):
+    running = session_payload(datetime(2024, 8, 1, 9))
+    running.pop("endTime")
+    session = (await client.post("/api/sessions/", json=running)).json()
+
+    started = [(event["type"], event.get("collection"), event["action"]) for event in drain(events)]
+    assert started == [("change", "sessions", "created"), ("active-session", None, "started")]
+
+    stopped = {**running, "endTime": "2024-08-01T10:00:00"}
+    await client.put(f"/api/sessions/{session['id']}", json=stopped)
+    assert ("active-session", "stopped") in [(event["type"], event["action"]) for event in drain(events)]
+
+    subject = (await client.post("/api/subjects/", json={"name": "Algebra"})).json()
+    (change,) = drain(events)
+    assert (change["collection"], change["action"], change["id"]) == ("subjects", "created", subject["id"])
@@ -0,0 +1,55 @@
+from datetime import datetime, timedelta
+
+from tests.helpers import session_payload
+
+
+async def read_all_pages(client, query):
+    pages, cursor = [], None
+    while True:
+        url = f"/api/analytics/heatmap?{query}" + (f"&cursor={cursor}" if cursor else "")
+        response = await client.get(url)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        pages.append(page)
+        cursor = page["nextCursor"]
+        if cursor is None:
+            return pages
+
+
+async def test_heatmap_pages_cover_a_multi_year_range(client):
+    expected = {}
+    day = datetime(2022, 1, 3, 9)
+    while day.year < 2025:
+        reference = "s1" if day.day % 2 else "p1"
+        payload = session_payload(day, 30, reference, referenceType="subject" if reference == "s1" else "project")
+        assert (await client.post("/api/sessions/", json=payload)).status_code == 201
+        expected[day.strftime("%Y-%m-%d")] = 30
+        day += timedelta(days=11)
+
+    pages = await read_all_pages(client, "start=2022-01-01&end=2024-12-31&limit=90")
+
+    assert len(pages) == -(-1096 // 90)
+    assert [page["pageStart"] for page in pages[1:]] == [
+        (datetime.strptime(page["pageEnd"], "%Y-%m-%d") + timedelta(days=1)).strftime("%Y-%m-%d") for page in pages[:-1]
+    ]
+    assert pages[-1]["pageEnd"] == "2024-12-31"
+    assert {entry["date"]: entry["duration"] for page in pages for entry in page["activity"]} == expected
+
+
+async def test_heatmap_breakdown_lists_each_reference(client):
+    start = datetime(2024, 2, 1, 9)
+    for reference, reference_type in (("s1", "subject"), ("p1", "project")):
+        payload = session_payload(start, 20, reference, referenceType=reference_type)
+        await client.post("/api/sessions/", json=payload)
+        start += timedelta(hours=1)
+
+    (page,) = await read_all_pages(client, "start=2024-02-01&end=2024-02-01&breakdown=true")
+
+    (day,) = page["activity"]
+    assert (day["duration"], day["sessionCount"]) == (40, 2)
+    assert sorted(entry["referenceId"] for entry in day["breakdown"]) == ["p1", "s1"]
+
+
+async def test_heatmap_rejects_a_cursor_outside_the_range(client):
+    response = await client.get("/api/analytics/heatmap?start=2024-01-01&end=2024-01-31&cursor=2024-03-01")
+    assert response.status_code == 400
@@ -0,0 +1,79 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.pagination import find_page
+from tests.helpers import syllabus
+
+
+async def test_cursor_pages_cover_every_document_once(db):
+    start = datetime(2024, 1, 1)
+    documents = [{"_id": ObjectId(), "createdAt": start + timedelta(hours=i % 4)} for i in range(9)]
+    # Written before createdAt existed, or with it unset
+    documents += [{"_id": ObjectId()}, {"_id": ObjectId(), "createdAt": None}, {"_id": ObjectId()}]
+    await db.subjects.insert_many(documents)
+
+    seen, cursor, pages = [], None, 0
+    while True:
+        page, cursor = await find_page(db.subjects, {}, 5, cursor)
+        seen += [document["_id"] for document in page]
+        pages += 1
+        if cursor is None:
+            break
+
+    assert pages == 3
+    assert sorted(seen) == sorted(document["_id"] for document in documents)
+    # Newest first, ties by _id descending, undated documents last
+    dated = sorted((d for d in documents if d.get("createdAt")), key=lambda d: (d["createdAt"], d["_id"]), reverse=True)
+    undated = sorted((d["_id"] for d in documents if not d.get("createdAt")), reverse=True)
+    assert seen == [d["_id"] for d in dated] + undated
+
+
+async def test_inclusion_projections_keep_the_cursor_field(db):
+    await db.subjects.insert_many([{"name": f"s{i}", "createdAt": datetime(2024, 1, i + 1)} for i in range(3)])
+    page, cursor = await find_page(db.subjects, {}, 2, projection={"_id": 1, "name": 1})
+    assert [d["name"] for d in page] == ["s2", "s1"]
+    page, cursor = await find_page(db.subjects, {}, 2, cursor, projection={"_id": 1, "name": 1})
+    assert [d["name"] for d in page] == ["s0"] and cursor is None
+
+
+async def test_subject_list_pages_and_summaries(client):
+    for i in range(3):
+        response = await client.post("/api/subjects/", json={"name": f"Subject {i}", "subtopics": syllabus(), "notes": "long notes"})
+        assert response.status_code == 201
+
+    response = await client.get("/api/subjects/", params={"limit": 2})
+    assert [s["name"] for s in response.json()] == ["Subject 2", "Subject 1"]
+    summary = response.json()[0]
+    assert not summary.get("subtopics") and not summary.get("notes")
+    assert summary["completionPercentage"] == 87.5
+
+    response = await client.get("/api/subjects/", params={"limit": 2, "cursor": response.headers["X-Next-Cursor"]})
+    assert [s["name"] for s in response.json()] == ["Subject 0"]
+    assert "X-Next-Cursor" not in response.headers
+
+    full = (await client.get("/api/subjects/", params={"include": "all"})).json()[0]
+    assert len(full["subtopics"]) == 2 and full["notes"] == "long notes"
+    partial = (await client.get("/api/subjects/", params={"include": "subtopics"})).json()[0]
+    assert len(partial["subtopics"]) == 2 and not partial.get("notes")
+
+    selected = (await client.get("/api/subjects/", params={"fields": "name,completionPercentage"})).json()
+    assert [set(s) for s in selected] == [{"id", "name", "completionPercentage"}] * 3
+
+
+async def test_invalid_list_parameters_are_400(client):
+    for params in ({"fields": "name", "include": "notes"}, {"include": "nope"}, {"fields": "nope"}, {"cursor": "not-a-cursor"}):
+        assert (await client.get("/api/subjects/", params=params)).status_code == 400, params
+
+
+async def test_project_and_practice_summaries(client):
+    project = {"name": "Tracker", "readme": "# Tracker", "notes": [{"title": "Plan", "content": "..."}], "githubData": {"readme": "# Tracker", "issues": [], "commits": []}}
+    assert (await client.post("/api/projects/", json=project)).status_code == 201
+
+    summary = (await client.get("/api/projects/")).json()[0]
+    assert summary["name"] == "Tracker" and not summary.get("readme") and not summary.get("notes")
+    with_readme = (await client.get("/api/projects/", params={"include": "readme"})).json()[0]
+    assert with_readme["readme"] == "# Tracker" and not with_readme.get("notes")
+
+    assert (await client.get("/api/practices/", params={"include": "readme"})).status_code == 400
+    assert (await client.get("/api/practices/", params={"include": "notes"})).status_code == 200
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from migrations import normalize_sessions
+from migrations.normalize_sessions import CHECKPOINT_ID, LEGACY_SESSION_FILTER, normalize_session
+
+
+def test_normalize_session_fills_the_current_shape():
+    update = normalize_session({"type": "course", "startTime": datetime(2024, 2, 3, 14, 5)})
+
+    assert update == {
+        "$set": {
+            "referenceType": "subject",
+            "sessionType": "study",
+            "date": datetime(2024, 2, 3),
+            "name": "Unknown",
+            "endTime": None,
+        },
+        "$unset": {"type": ""},
+    }
+
+
+def test_current_sessions_need_no_update():
+    session = {"referenceType": "project", "sessionType": "practice", "date": datetime(2024, 2, 3),
+               "name": "Tracker", "startTime": datetime(2024, 2, 3, 9), "endTime": None}
+    assert normalize_session(session) == {}
+
+
+@pytest.fixture
+def migration_db(mongo_client, db, monkeypatch):
+    """Point the migration's client at the test database."""
+    monkeypatch.setattr(normalize_sessions, "AsyncIOMotorClient", lambda url: mongo_client)
+    monkeypatch.setattr(normalize_sessions.settings, "DATABASE_NAME", db.name)
+    return db
+
+
+async def test_migration_normalizes_every_legacy_session(migration_db):
+    db = migration_db
+    legacy = [{"_id": ObjectId(), "type": "project", "referenceId": f"p{i}", "startTime": datetime(2024, 1, i + 1)}
+              for i in range(7)]
+    await db.sessions.insert_many(legacy)
+    await db.sessions.create_index("referenceId", name="referenceId_1")
+
+    await normalize_sessions.migrate(batch_size=3, restart=False)
+
+    assert await db.sessions.count_documents(LEGACY_SESSION_FILTER) == 0
+    assert await db.sessions.count_documents({"referenceType": "project", "endTime": None}) == 7
+    assert "referenceId_1" not in await db.sessions.index_information()
+    assert (await db.migrations.find_one({"_id": CHECKPOINT_ID}))["completed"] is True
+
+
+async def test_interrupted_run_resumes_after_the_checkpoint(migration_db):
+    db = migration_db
+    ids = sorted(ObjectId() for _ in range(4))
+    await db.sessions.insert_many([{"_id": oid, "type": "subject", "startTime": datetime(2024, 1, 1)} for oid in ids])
+    await db.migrations.insert_one({"_id": CHECKPOINT_ID, "lastId": ids[1], "completed": False})
+
+    await normalize_sessions.migrate(batch_size=10, restart=False)
+
+    # Sessions before the checkpoint were already handled by the interrupted run
+    assert [doc["_id"] for doc in await db.sessions.find(LEGACY_SESSION_FILTER).to_list(None)] == ids[:2]
+
+    # A completed checkpoint does not skip anything
+    await normalize_sessions.migrate(batch_size=10, restart=False)
+    assert await db.sessions.count_documents(LEGACY_SESSION_FILTER) == 0
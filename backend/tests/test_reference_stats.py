@@ -0,0 +1,97 @@
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.reference_stats import (
+    RECENT_SESSIONS_LIMIT, apply_reference_deltas, collect_reference_deltas, rebuild_reference_stats
+)
+from tests.helpers import session_payload
+
+AGGREGATES = ("sessionCount", "totalMinutes", "timeSpent", "lastStudied", "recentSessions")
+
+
+async def create_project_sessions(client, count):
+    project_id = (await client.post("/api/projects/", json={"name": "Tracker"})).json()["id"]
+    sessions = []
+    for i in range(count):
+        payload = session_payload(datetime(2024, 7, 1, 9) + timedelta(days=i), 10 + i, project_id,
+                                  referenceType="project", name="Tracker")
+        sessions.append((await client.post("/api/sessions/", json=payload)).json())
+    return project_id, sessions
+
+
+async def test_aggregates_stay_bounded_and_match_a_rebuild(client, db):
+    project_id, sessions = await create_project_sessions(client, RECENT_SESSIONS_LIMIT + 3)
+    await client.delete(f"/api/sessions/{sessions[0]['id']}")
+
+    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert project["sessionCount"] == RECENT_SESSIONS_LIMIT + 2
+    assert project["totalMinutes"] == sum(10 + i for i in range(1, RECENT_SESSIONS_LIMIT + 3))
+    assert project["lastStudied"] == datetime(2024, 7, 13, 9, 22)
+    assert [entry["id"] for entry in project["recentSessions"]] == [s["id"] for s in reversed(sessions[-RECENT_SESSIONS_LIMIT:])]
+    assert "sessions" not in project
+
+    await rebuild_reference_stats(db)
+    rebuilt = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert {field: rebuilt[field] for field in AGGREGATES} == {field: project[field] for field in AGGREGATES}
+
+
+async def test_project_updates_leave_session_aggregates_alone(client, db):
+    project_id, _ = await create_project_sessions(client, 2)
+
+    response = await client.put(f"/api/projects/{project_id}", json={"name": "Tracker v2", "sessionCount": 0, "totalMinutes": 0})
+    assert response.status_code == 200
+
+    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert (project["name"], project["sessionCount"], project["totalMinutes"]) == ("Tracker v2", 2, 21)
+
+
+async def test_deleting_the_latest_session_moves_last_studied_back(client, db):
+    project_id, sessions = await create_project_sessions(client, 3)
+
+    await client.delete(f"/api/sessions/{sessions[-1]['id']}")
+
+    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert project["lastStudied"] == datetime(2024, 7, 2, 9, 11)
+    assert len(project["recentSessions"]) == 2
+
+
+async def test_last_studied_counts_running_sessions_and_clears_when_empty(client, db):
+    project_id, sessions = await create_project_sessions(client, 1)
+    running = session_payload(datetime(2024, 6, 1, 9), 0, project_id, referenceType="project", name="Tracker", endTime=None)
+    running = (await client.post("/api/sessions/", json=running)).json()
+
+    await client.delete(f"/api/sessions/{sessions[0]['id']}")
+    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert project["lastStudied"] == datetime(2024, 6, 1, 9)
+
+    await client.delete(f"/api/sessions/{running['id']}")
+    project = await db.projects.find_one({"_id": ObjectId(project_id)})
+    assert (project["sessionCount"], project["recentSessions"], project["lastStudied"]) == (0, [], None)
+
+
+class RecordingDatabase(dict):
+    """Collects the operations bulk-written to each collection."""
+
+    def __missing__(self, name):
+        operations = self[name] = []
+
+        class Collection:
+            async def bulk_write(self, ops, ordered=True):
+                operations.extend(ops)
+
+        return Collection()
+
+
+async def test_only_deleted_sessions_recompute_last_studied():
+    project_id = str(ObjectId())
+    session = {"_id": ObjectId(), "referenceType": "project", "referenceId": project_id,
+               "startTime": datetime(2024, 7, 1, 9), "endTime": datetime(2024, 7, 1, 10), "duration": 60}
+
+    updated = RecordingDatabase()
+    await apply_reference_deltas(updated, collect_reference_deltas([session], [{**session, "duration": 30}]))
+    deleted = RecordingDatabase()
+    await apply_reference_deltas(deleted, collect_reference_deltas([session], []))
+
+    assert len(updated["projects"]) == 2
+    assert len(deleted["projects"]) == 3
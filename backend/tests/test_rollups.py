@@ -0,0 +1,76 @@
+from datetime import datetime
+
+from app.services.rollups import ROLLUPS_COLLECTION, collect_rollup_deltas, rebuild_rollups
+from tests.helpers import session_payload
+
+
+async def stored_rollups(db):
+    rows = await db[ROLLUPS_COLLECTION].find({}, {"_id": 0}).to_list(None)
+    return sorted(rows, key=lambda row: (row["day"], row["referenceType"], row["referenceId"]))
+
+
+def test_collect_rollup_deltas_folds_removed_and_added():
+    before = {"startTime": datetime(2024, 3, 1, 9), "referenceType": "subject", "referenceId": "a", "duration": 30}
+    after = {**before, "startTime": datetime(2024, 3, 2, 9), "duration": 45, "name": "Algebra"}
+
+    deltas = collect_rollup_deltas([before], [after])
+
+    assert deltas[("2024-03-01", "subject", "a")] == {"duration": -30, "sessionCount": -1, "name": None}
+    assert deltas[("2024-03-02", "subject", "a")] == {"duration": 45, "sessionCount": 1, "name": "Algebra"}
+
+
+def test_sessions_without_start_time_have_no_rollup():
+    assert collect_rollup_deltas([], [{"referenceId": "a", "duration": 10}]) == {}
+
+
+async def test_session_writes_keep_rollups_equal_to_a_rebuild(client, db):
+    created = []
+    for start, minutes, reference in [
+        (datetime(2024, 3, 1, 9), 30, "a"),
+        (datetime(2024, 3, 1, 14), 45, "a"),
+        (datetime(2024, 3, 1, 16), 20, "b"),
+        (datetime(2024, 3, 4, 8), 60, "a"),
+    ]:
+        response = await client.post("/api/sessions/", json=session_payload(start, minutes, reference))
+        assert response.status_code == 201
+        created.append(response.json())
+
+    moved = session_payload(datetime(2024, 3, 5, 10), 90, "b")
+    assert (await client.put(f"/api/sessions/{created[1]['id']}", json=moved)).status_code == 200
+    assert (await client.delete(f"/api/sessions/{created[3]['id']}")).status_code == 204
+
+    incremental = await stored_rollups(db)
+    assert [(row["day"], row["referenceId"], row["duration"], row["sessionCount"]) for row in incremental] == [
+        ("2024-03-01", "a", 30, 1),
+        ("2024-03-01", "b", 20, 1),
+        ("2024-03-05", "b", 90, 1),
+    ]
+
+    await rebuild_rollups(db)
+    assert await stored_rollups(db) == incremental
+
+
+async def test_rebuild_overwrites_rows_in_place_and_drops_stale_ones(client, db):
+    await client.post("/api/sessions/", json=session_payload(datetime(2024, 3, 1, 9), 30, "a"))
+    await db[ROLLUPS_COLLECTION].update_one({"day": "2024-03-01"}, {"$set": {"duration": 999}})
+    await db[ROLLUPS_COLLECTION].insert_one({"day": "2024-02-01", "referenceType": "subject", "referenceId": "gone",
+                                             "name": "Gone", "duration": 10, "sessionCount": 1})
+    (kept_id,) = [row["_id"] for row in await db[ROLLUPS_COLLECTION].find({"day": "2024-03-01"}).to_list(None)]
+
+    assert await rebuild_rollups(db) == 1
+
+    (row,) = await db[ROLLUPS_COLLECTION].find({}).to_list(None)
+    # Rewritten where it stood rather than deleted and inserted again
+    assert (row["_id"], row["day"], row["duration"], row["sessionCount"]) == (kept_id, "2024-03-01", 30, 1)
+
+
+async def test_rebuild_names_a_rollup_after_its_latest_session(db):
+    await db.sessions.insert_many([
+        {"referenceType": "subject", "referenceId": "a", "name": name, "duration": 10,
+         "startTime": datetime(2024, 3, 1, hour), "endTime": datetime(2024, 3, 1, hour, 10)}
+        for hour, name in ((15, "Renamed"), (9, "Original"))
+    ])
+
+    await rebuild_rollups(db)
+
+    assert [row["name"] for row in await stored_rollups(db)] == ["Renamed"]
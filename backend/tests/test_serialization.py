@@ -0,0 +1,37 @@
+import json
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from app.services import serialization
+from app.services.serialization import default_response_class, dump_json
+
+DOCUMENT = {"_id": ObjectId(), "name": "Ünïcode", "at": datetime(2024, 5, 1, 10, 0, 0, 123000), "tags": ["a"]}
+
+
+def test_dump_json_encodes_bson_values():
+    decoded = json.loads(dump_json(DOCUMENT))
+    assert decoded == {"_id": str(DOCUMENT["_id"]), "name": "Ünïcode", "at": "2024-05-01T10:00:00.123000", "tags": ["a"]}
+
+
+def test_dump_json_without_orjson_produces_the_same_json(monkeypatch):
+    with_orjson = json.loads(dump_json(DOCUMENT))
+    monkeypatch.setattr(serialization, "orjson", None)
+
+    assert json.loads(dump_json(DOCUMENT)) == with_orjson
+    assert default_response_class() is JSONResponse
+
+
+def test_unknown_types_still_fail():
+    with pytest.raises(TypeError):
+        dump_json({"value": object()})
+
+
+async def test_list_endpoints_return_json(client):
+    await client.post("/api/subjects/", json={"name": "Algebra"})
+    response = await client.get("/api/subjects/")
+
+    assert response.headers["content-type"] == "application/json"
+    assert [subject["name"] for subject in response.json()] == ["Algebra"]
@@ -0,0 +1,73 @@
+from datetime import datetime
+
+from bson import ObjectId
+
+from app.services.rollups import ROLLUPS_COLLECTION
+from app.services.session_import import parse_rows, prepare_session
+
+CSV_FILE = """startTime,endTime,duration,tags,name
+2024-04-01T09:00:00,2024-04-01T10:30:00,,graphs;trees,
+2024-04-02T09:00:00Z,,45,,Algebra II
+not a date,,30,,
+2024-04-03T09:00:00,,,,
+"""
+
+ICS_FILE = """BEGIN:VCALENDAR
+BEGIN:VEVENT
+SUMMARY:Reading\\, chapter 2
+DTSTART:20240405T090000Z
+DTEND:20240405T100000Z
+CATEGORIES:reading,notes
+X-REFERENCE-TYPE:project
+X-REFERENCE-ID:p1
+DESCRIPTION:A long
+  line
+END:VEVENT
+END:VCALENDAR
+"""
+
+
+def test_ics_events_are_unfolded_and_unescaped():
+    ((number, row),) = list(parse_rows(ICS_FILE, "ics"))
+    session = prepare_session(row, {})
+
+    assert number == 1
+    assert (session["name"], session["referenceType"], session["referenceId"]) == ("Reading, chapter 2", "project", "p1")
+    assert session["notes"] == "A long line"
+    assert session["tags"] == ["reading", "notes"]
+    assert (session["duration"], session["startTime"]) == (60, datetime(2024, 4, 5, 9))
+
+
+def test_jsonl_rows_report_bad_lines():
+    rows = list(parse_rows('{"startTime": "2024-04-01T09:00:00"}\n\n[1, 2]\n{oops\n', "jsonl"))
+    assert [number for number, _ in rows] == [1, 2, 3]
+    assert "__error__" in rows[1][1] and "__error__" in rows[2][1]
+
+
+async def test_bulk_import_inserts_valid_rows_and_links_the_reference(client, db):
+    subject_id = (await client.post("/api/subjects/", json={"name": "Algebra"})).json()["id"]
+
+    response = await client.post(
+        "/api/sessions/bulk",
+        params={"reference_type": "subject", "reference_id": subject_id, "name": "Algebra"},
+        files={"file": ("sessions.csv", CSV_FILE, "text/csv")}
+    )
+
+    assert response.status_code == 200
+    result = response.json()
+    assert (result["format"], result["received"], result["inserted"], result["failed"]) == ("csv", 4, 2, 2)
+    assert [error["row"] for error in result["errors"]] == [3, 4]
+
+    sessions = await db.sessions.find({}, sort=[("startTime", 1)]).to_list(None)
+    assert [(s["name"], s["duration"], s["tags"]) for s in sessions] == [
+        ("Algebra", 90, ["graphs", "trees"]), ("Algebra II", 45, [])
+    ]
+    assert await db[ROLLUPS_COLLECTION].count_documents({}) == 2
+
+    subject = await db.subjects.find_one({"_id": ObjectId(subject_id)})
+    assert (subject["sessionCount"], subject["totalMinutes"]) == (2, 135)
+
+
+async def test_unknown_import_format_is_rejected(client):
+    response = await client.post("/api/sessions/bulk", files={"file": ("sessions.txt", "x", "text/plain")})
+    assert response.status_code == 400
@@ -0,0 +1,68 @@
+import csv
+import io
+import json
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.pagination import NEXT_CURSOR_HEADER
+
+
+async def insert_sessions(db, count=25):
+    base = datetime(2024, 6, 1, 8)
+    docs = []
+    for i in range(count):
+        # Every third pair shares a startTime, so pages must break ties on _id
+        start = base + timedelta(hours=i // 2 if i % 3 == 0 else i)
+        docs.append({
+            "_id": ObjectId(), "name": "Algebra", "referenceType": "project" if i % 4 == 0 else "subject",
+            "referenceId": "s1", "sessionType": "study", "date": start.replace(hour=0), "startTime": start,
+            "endTime": start + timedelta(minutes=20), "duration": 20, "notes": "", "tags": ["a", "b"],
+            "manualEntry": False, "createdAt": start,
+        })
+    await db.sessions.insert_many(docs)
+    return docs
+
+
+async def read_pages(client, query):
+    ids, cursor = [], None
+    while True:
+        params = {**query, **({"cursor": cursor} if cursor else {})}
+        response = await client.get("/api/sessions/", params=params)
+        assert response.status_code == 200
+        ids += [session["id"] for session in response.json()]
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids
+
+
+async def test_cursor_pages_return_every_session_once_newest_first(client, db):
+    docs = await insert_sessions(db)
+    expected = [str(doc["_id"]) for doc in sorted(docs, key=lambda doc: (doc["startTime"], doc["_id"]), reverse=True)]
+
+    assert await read_pages(client, {"limit": 4}) == expected
+    assert await read_pages(client, {"limit": 1000}) == expected
+
+    subject_ids = [str(doc["_id"]) for doc in docs if doc["referenceType"] == "subject"]
+    filtered = await read_pages(client, {"limit": 3, "type_filter": "subject"})
+    assert sorted(filtered) == sorted(subject_ids) and len(filtered) == len(subject_ids)
+
+
+async def test_invalid_cursor_is_a_bad_request(client):
+    response = await client.get("/api/sessions/", params={"cursor": "not-a-cursor"})
+    assert response.status_code == 400
+
+
+async def test_export_streams_every_session_oldest_first(client, db):
+    docs = await insert_sessions(db, count=12)
+    expected = [str(doc["_id"]) for doc in sorted(docs, key=lambda doc: (doc["startTime"], doc["_id"]))]
+
+    response = await client.get("/api/sessions/export")
+    assert response.headers["content-type"].startswith("application/x-ndjson")
+    rows = [json.loads(line) for line in response.text.splitlines()]
+    assert [row["id"] for row in rows] == expected
+
+    response = await client.get("/api/sessions/export", params={"format": "csv", "type_filter": "project"})
+    rows = list(csv.DictReader(io.StringIO(response.text)))
+    assert {row["referenceType"] for row in rows} == {"project"}
+    assert rows[0]["tags"] == "a;b"
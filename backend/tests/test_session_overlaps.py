@@ -0,0 +1,135 @@
+import random
+from datetime import datetime, timedelta
+
+from bson import ObjectId
+
+from app.services.rollups import ROLLUPS_COLLECTION
+from app.services.session_overlaps import MERGE_SORT, find_mergeable_groups, find_overlapping_sessions
+from tests.helpers import session_payload
+
+BASE = datetime(2024, 3, 1)
+
+
+def session(reference, start_minute, minutes, **fields):
+    start = BASE + timedelta(minutes=start_minute)
+    return {"_id": ObjectId(), "referenceType": "subject", "referenceId": reference, "name": reference,
+            "startTime": start, "endTime": start + timedelta(minutes=minutes), "duration": minutes, **fields}
+
+
+def random_sessions(rng, count):
+    return [session(rng.choice("abc"), rng.randrange(5000), rng.randrange(1, 400)) for _ in range(count)]
+
+
+async def test_overlap_lookup_matches_a_full_scan(db):
+    rng = random.Random(5)
+    docs = random_sessions(rng, 300)
+    running = {**session("a", 4800, 0), "endTime": None}
+    await db.sessions.insert_many(docs + [running])
+
+    for _ in range(50):
+        start = BASE + timedelta(minutes=rng.randrange(5200))
+        end = start + timedelta(minutes=rng.randrange(1, 300))
+
+        found = await find_overlapping_sessions(db, start, end, limit=1000)
+
+        expected = {doc["_id"] for doc in docs if doc["startTime"] < end and doc["endTime"] > start}
+        if running["startTime"] < end:
+            expected.add(running["_id"])
+        assert {doc["_id"] for doc in found} == expected
+
+
+def brute_force_groups(docs, gap):
+    groups = []
+    for reference in sorted({doc["referenceId"] for doc in docs}):
+        run, run_end = [], None
+        for doc in sorted((d for d in docs if d["referenceId"] == reference), key=lambda d: (d["startTime"], d["_id"])):
+            if run and doc["startTime"] <= run_end + gap:
+                run.append(doc)
+                run_end = max(run_end, doc["endTime"])
+            else:
+                if len(run) > 1:
+                    groups.append(run)
+                run, run_end = [doc], doc["endTime"]
+        if len(run) > 1:
+            groups.append(run)
+    return groups
+
+
+def as_ids(groups):
+    return sorted(sorted(doc["_id"] for doc in group) for group in groups)
+
+
+async def test_merge_groups_match_brute_force(db):
+    rng = random.Random(9)
+    docs = random_sessions(rng, 200)
+    await db.sessions.insert_many(docs)
+
+    for gap in (timedelta(0), timedelta(minutes=30)):
+        assert as_ids(await find_mergeable_groups(db, {}, gap)) == as_ids(brute_force_groups(docs, gap))
+
+
+async def test_a_long_session_keeps_later_overlaps_in_one_run(db):
+    # B and C both start inside A but not inside each other
+    docs = [session("a", 0, 100), session("a", 10, 10), session("a", 50, 10)]
+    await db.sessions.insert_many(docs)
+
+    (group,) = await find_mergeable_groups(db, {})
+    assert [doc["_id"] for doc in group] == [doc["_id"] for doc in docs]
+
+
+async def test_merge_scan_order_is_served_by_an_index(db, indexes):
+    # An index serves a sort in its own key order or the exact reverse of it
+    reverse = [(field, -direction) for field, direction in MERGE_SORT]
+    keys = [list(index["key"]) for index in (await db.sessions.index_information()).values()]
+    assert MERGE_SORT in keys or reverse in keys
+
+
+async def test_merge_endpoint_coalesces_runs(client, db):
+    created = []
+    for start_minute, minutes, notes in [(0, 60, "one"), (45, 30, "two"), (200, 20, ""), (230, 20, "")]:
+        payload = session_payload(BASE + timedelta(hours=9, minutes=start_minute), minutes, notes=notes)
+        created.append((await client.post("/api/sessions/", json=payload)).json())
+
+    dry = (await client.post("/api/sessions/merge-overlaps?dry_run=true&gap_minutes=10")).json()
+    assert (dry["groups"], dry["removed"]) == (2, 2)
+    assert await db.sessions.count_documents({}) == 4
+
+    result = (await client.post("/api/sessions/merge-overlaps?gap_minutes=10")).json()
+    assert result["merges"] == dry["merges"]
+
+    merged = await db.sessions.find({}, sort=[("startTime", 1)]).to_list(None)
+    assert [str(doc["_id"]) for doc in merged] == [created[0]["id"], created[2]["id"]]
+    assert [(doc["duration"], doc["notes"]) for doc in merged] == [(75, "one\ntwo"), (50, "")]
+    (rollup,) = await db[ROLLUPS_COLLECTION].find().to_list(None)
+    assert (rollup["duration"], rollup["sessionCount"]) == (125, 2)
+
+
+async def test_overlapping_creates_are_reported_or_rejected(client):
+    first = (await client.post("/api/sessions/", json=session_payload(BASE.replace(hour=9), 60))).json()
+    overlapping = session_payload(BASE.replace(hour=9, minute=30), 60)
+
+    response = await client.post("/api/sessions/", json=overlapping)
+    assert response.headers["X-Overlapping-Sessions"] == first["id"]
+    second = response.json()
+
+    response = await client.post("/api/sessions/?reject_overlap=true", json=overlapping)
+    assert response.status_code == 409
+    assert response.json()["detail"]["overlapping"] == [first["id"], second["id"]]
+
+
+async def test_overlapping_updates_are_reported_or_rejected(client, db):
+    first = (await client.post("/api/sessions/", json=session_payload(BASE.replace(hour=9), 60))).json()
+    second = (await client.post("/api/sessions/", json=session_payload(BASE.replace(hour=12), 30))).json()
+    moved = session_payload(BASE.replace(hour=9, minute=30), 30)
+
+    response = await client.put(f"/api/sessions/{second['id']}?reject_overlap=true", json=moved)
+    assert response.status_code == 409
+    assert (await db.sessions.find_one({"_id": ObjectId(second["id"])}))["startTime"] == BASE.replace(hour=12)
+
+    response = await client.put(f"/api/sessions/{second['id']}", json=moved)
+    assert response.status_code == 200
+    assert response.headers["X-Overlapping-Sessions"] == first["id"]
+
+    # A missing session is not found, whatever it would overlap
+    response = await client.put(f"/api/sessions/{ObjectId()}?reject_overlap=true", json=moved)
+    assert response.status_code == 404
@@ -0,0 +1,129 @@
+from datetime import datetime
+from types import SimpleNamespace
+
+import pytest
+from bson import ObjectId
+from mongomock.filtering import filter_applies
+
+from app.core import database
+from app.core.config import settings
+from app.core.database import ensure_sessions_collection
+from app.services.rollups import ROLLUPS_COLLECTION
+from app.services.session_storage import merge_session_documents, update_session_document
+from tests.helpers import session_payload
+
+
+@pytest.fixture
+def timeseries(monkeypatch):
+    monkeypatch.setattr(settings, "SESSION_STORAGE", "timeseries")
+
+
+async def test_timeseries_deletes_and_creates_keep_derived_data(client, db, timeseries):
+    created = (await client.post("/api/sessions/", json=session_payload(datetime(2024, 5, 1, 9), 30))).json()
+    rollups = await db[ROLLUPS_COLLECTION].find({}, {"_id": 0, "day": 1, "duration": 1}).to_list(None)
+    assert rollups == [{"day": "2024-05-01", "duration": 30}]
+
+    assert (await client.delete(f"/api/sessions/{created['id']}")).status_code == 204
+    assert await db.sessions.count_documents({}) == 0
+    assert await db[ROLLUPS_COLLECTION].count_documents({}) == 0
+    assert (await client.put(f"/api/sessions/{created['id']}", json=session_payload(datetime(2024, 5, 2, 9)))).status_code == 404
+
+
+async def test_timeseries_checks_for_a_running_session_itself(client, timeseries):
+    running = session_payload(datetime(2024, 5, 1, 9))
+    running.pop("endTime")
+    await client.post("/api/sessions/", json=running)
+
+    assert (await client.post("/api/sessions/", json=running)).status_code == 409
+
+    other = (await client.post("/api/sessions/", json=session_payload(datetime(2024, 5, 1, 7), 30))).json()
+    reopened = {**running, "startTime": other["startTime"], "date": other["date"]}
+    assert (await client.put(f"/api/sessions/{other['id']}", json=reopened)).status_code == 409
+
+
+class TimeseriesSessions:
+    """
+    The few session commands session_storage uses, over a list: like a
+    time-series collection (and unlike mongomock) it holds documents with
+    the same _id. `fail` names a command that raises, to interrupt a write.
+    """
+
+    def __init__(self, docs, fail=None):
+        self.docs = [dict(doc) for doc in docs]
+        self.fail = fail
+
+    def _check(self, command):
+        if command == self.fail:
+            raise ConnectionError(command)
+
+    async def find_one(self, query, projection=None):
+        return next((dict(doc) for doc in self.docs if filter_applies(query, doc)), None)
+
+    async def insert_one(self, doc):
+        self._check("insert")
+        self.docs.append(dict(doc))
+
+    async def insert_many(self, docs, ordered=True):
+        self._check("insert")
+        self.docs.extend(dict(doc) for doc in docs)
+
+    async def delete_many(self, query):
+        self._check("delete")
+        self.docs = [doc for doc in self.docs if not filter_applies(query, doc)]
+
+
+def finished_session(**fields):
+    return {"_id": ObjectId(), "referenceId": "ref-1", "startTime": datetime(2024, 5, 1, 9),
+            "endTime": datetime(2024, 5, 1, 9, 30), "duration": 30, "notes": "", **fields}
+
+
+async def test_timeseries_update_stores_the_new_version_before_removing_the_old(timeseries):
+    session = finished_session()
+    sessions = TimeseriesSessions([session])
+
+    before = await update_session_document(SimpleNamespace(sessions=sessions), session["_id"], {"duration": 45}, "missing")
+
+    assert before == session
+    assert sessions.docs == [{**session, "duration": 45}]
+
+    # Nothing changed: nothing is written
+    sessions.fail = "insert"
+    await update_session_document(SimpleNamespace(sessions=sessions), session["_id"], {"duration": 45}, "missing")
+
+
+@pytest.mark.parametrize("fail, versions", [("insert", [30]), ("delete", [30, 45])])
+async def test_interrupted_timeseries_update_never_loses_the_session(timeseries, fail, versions):
+    session = finished_session()
+    sessions = TimeseriesSessions([session], fail=fail)
+
+    with pytest.raises(ConnectionError):
+        await update_session_document(SimpleNamespace(sessions=sessions), session["_id"], {"duration": 45}, "missing")
+
+    assert [doc["duration"] for doc in sessions.docs] == versions
+
+
+async def test_timeseries_update_of_the_running_session_is_no_conflict(timeseries):
+    running = finished_session(endTime=None)
+    sessions = TimeseriesSessions([running, finished_session()])
+
+    await update_session_document(SimpleNamespace(sessions=sessions), running["_id"], {"notes": "x"}, "missing")
+
+    assert [doc["notes"] for doc in sessions.docs] == ["", "x"]
+
+
+async def test_timeseries_merge_replaces_and_removes(timeseries):
+    first, second, untouched = finished_session(), finished_session(startTime=datetime(2024, 5, 1, 9, 20)), finished_session()
+    merged = {**first, "endTime": datetime(2024, 5, 1, 9, 50), "duration": 50}
+    sessions = TimeseriesSessions([first, second, untouched])
+
+    await merge_session_documents(SimpleNamespace(sessions=sessions), [first], [merged], [second["_id"]])
+
+    assert sorted(sessions.docs, key=lambda doc: doc["_id"]) == sorted([merged, untouched], key=lambda doc: doc["_id"])
+
+
+async def test_timeseries_refuses_a_regular_sessions_collection(db, monkeypatch, timeseries):
+    monkeypatch.setattr(database.db, "db", db)
+    await db.create_collection("sessions")
+
+    with pytest.raises(RuntimeError):
+        await ensure_sessions_collection()
@@ -0,0 +1,88 @@
+import random
+from datetime import datetime
+
+from app.services.sketches import (
+    QUANTILES, SKETCH_RELATIVE_ACCURACY, SKETCHES_COLLECTION, collect_sketch_deltas, rebuild_sketches, sketch_summary
+)
+from tests.helpers import session_payload
+
+
+def test_quantiles_stay_within_the_relative_accuracy():
+    rng = random.Random(3)
+    durations = [rng.randint(2, 600) for _ in range(2000)]
+    sessions = [{"startTime": datetime(2024, 1, 1), "referenceType": "subject", "referenceId": "a", "duration": d}
+                for d in durations]
+
+    (sketch, *_) = collect_sketch_deltas((), sessions).values()
+    summary = sketch_summary(sketch)
+
+    ordered = sorted(durations)
+    for name, q in QUANTILES.items():
+        exact = ordered[int(q * (len(ordered) - 1))]
+        assert abs(summary[name] - exact) <= exact * SKETCH_RELATIVE_ACCURACY + 0.05
+    assert summary["count"] == 2000
+    assert sum(row["count"] for row in summary["histogram"]) == 2000
+
+
+async def stored_sketches(db):
+    rows = await db[SKETCHES_COLLECTION].find({}, {"_id": 0}).to_list(None)
+    for row in rows:
+        row["buckets"] = {bucket: count for bucket, count in row["buckets"].items() if count}
+    return sorted(rows, key=lambda row: (row["month"], row["referenceType"] or "", row["referenceId"] or ""))
+
+
+async def create_sessions(client):
+    created = []
+    for start, minutes, reference_type, reference_id in [
+        (datetime(2024, 1, 5, 9), 25, "subject", "s1"),
+        (datetime(2024, 1, 9, 9), 70, "subject", "s2"),
+        (datetime(2024, 2, 2, 9), 45, "project", "p1"),
+        (datetime(2024, 2, 7, 9), 130, "subject", "s1"),
+        (datetime(2024, 3, 1, 9), 15, "subject", "s1"),
+    ]:
+        payload = session_payload(start, minutes, reference_id, referenceType=reference_type)
+        response = await client.post("/api/sessions/", json=payload)
+        assert response.status_code == 201
+        created.append(response.json())
+    return created
+
+
+async def test_session_writes_keep_sketches_equal_to_a_rebuild(client, db):
+    created = await create_sessions(client)
+    moved = session_payload(datetime(2024, 3, 3, 9), 50, "s2")
+    assert (await client.put(f"/api/sessions/{created[0]['id']}", json=moved)).status_code == 200
+    assert (await client.delete(f"/api/sessions/{created[2]['id']}")).status_code == 204
+
+    incremental = await stored_sketches(db)
+    await rebuild_sketches(db)
+    assert await stored_sketches(db) == incremental
+
+
+async def test_filtered_session_lengths_keep_the_monthly_trend(client):
+    await create_sessions(client)
+
+    lengths = (await client.get("/api/analytics/session-lengths?reference_type=subject&reference_id=s1")).json()
+
+    assert lengths["overall"]["count"] == 3
+    assert [(month["month"], month["count"]) for month in lengths["monthly"]] == [
+        ("2024-01", 1), ("2024-02", 1), ("2024-03", 1)
+    ]
+    assert [item["referenceId"] for item in lengths["byReference"]] == ["s1"]
+
+    by_type = (await client.get("/api/analytics/session-lengths?reference_type=subject")).json()
+    assert by_type["overall"]["count"] == 4
+    assert sum(month["count"] for month in by_type["monthly"]) == 4
+
+
+async def test_rebuild_overwrites_sketches_in_place_and_drops_stale_ones(client, db):
+    await create_sessions(client)
+    expected = await stored_sketches(db)
+    await db[SKETCHES_COLLECTION].update_many({}, {"$inc": {"count": 5}})
+    await db[SKETCHES_COLLECTION].insert_one({"month": "2023-12", "referenceType": None, "referenceId": None,
+                                              "count": 1, "totalDuration": 10, "buckets": {"24": 1}})
+    ids = {doc["_id"] for doc in await db[SKETCHES_COLLECTION].find({"month": {"$ne": "2023-12"}}).to_list(None)}
+
+    await rebuild_sketches(db)
+
+    assert await stored_sketches(db) == expected
+    assert {doc["_id"] for doc in await db[SKETCHES_COLLECTION].find({}).to_list(None)} == ids
@@ -0,0 +1,50 @@
+from datetime import datetime, timedelta
+
+from tests.helpers import session_payload
+
+
+async def seed_dashboard(client):
+    now = datetime.utcnow().replace(microsecond=0)
+    for days_ago, minutes, reference_type in [(0, 30, "subject"), (1, 45, "project"), (3, 20, "subject"), (20, 60, "subject")]:
+        start = now - timedelta(days=days_ago, hours=2)
+        payload = session_payload(start, minutes, referenceType=reference_type, reference_id=f"{reference_type}-1")
+        assert (await client.post("/api/sessions/", json=payload)).status_code == 201
+
+    subject = {"name": "Algebra", "status": "in_progress", "subtopics": [
+        {"name": "Groups", "status": "completed"}, {"name": "Rings"}
+    ]}
+    assert (await client.post("/api/subjects/", json=subject)).status_code == 201
+    assert (await client.post("/api/projects/", json={"name": "Tracker"})).status_code == 201
+
+
+async def get_json(client, url):
+    response = await client.get(url)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_snapshot_matches_the_individual_widgets(client):
+    await seed_dashboard(client)
+
+    snapshot = await get_json(client, "/api/analytics/snapshot?distribution_days=7&activity_days=2")
+
+    for period in ("day", "week", "month"):
+        assert snapshot["timeSummary"][period] == await get_json(client, f"/api/analytics/time-summary?period={period}")
+    assert snapshot["distribution"] == await get_json(client, "/api/analytics/distribution?days=7")
+    assert snapshot["streaks"] == await get_json(client, "/api/analytics/streaks")
+    assert snapshot["progress"] == await get_json(client, "/api/analytics/progress")
+    assert snapshot["dailyActivity"] == await get_json(client, "/api/analytics/daily-activity?days=2")
+
+    summary = await get_json(client, "/api/sessions/stats/summary")
+    assert snapshot["sessionStats"] == {key: summary[key] for key in snapshot["sessionStats"]}
+
+
+async def test_snapshot_activity_window_uses_the_activity_days_parameter(client):
+    await seed_dashboard(client)
+
+    narrow = await get_json(client, "/api/analytics/snapshot?activity_days=1")
+    wide = await get_json(client, "/api/analytics/snapshot?activity_days=30")
+
+    assert narrow["dailyActivity"]["days"] == 1
+    assert len(narrow["dailyActivity"]["activity"]) < len(wide["dailyActivity"]["activity"])
+    assert (await client.get("/api/analytics/snapshot?activity_days=0")).status_code == 422
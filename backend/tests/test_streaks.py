@@ -0,0 +1,111 @@
+import random
+from datetime import date, timedelta
+
+from app.services import streaks
+from app.services.rollups import ROLLUPS_COLLECTION, day_key
+from app.services.streaks import (
+    STATE_COLLECTION, ActivityBitmap, apply_activity_changes, get_streak_state, rebuild_streaks,
+    state_from_bitmap, streaks_response, updated_streak_state
+)
+
+ORIGIN = date(2024, 1, 1)
+
+
+def brute_force_runs(active):
+    """(run ending at the last active day, longest run) by walking every day."""
+    if not active:
+        return 0, 0
+    longest = current = 0
+    day = min(active)
+    while day <= max(active):
+        current = current + 1 if day in active else 0
+        longest = max(longest, current)
+        day += timedelta(days=1)
+    return current, longest
+
+
+def test_bitmap_grows_backwards_without_moving_bits():
+    bitmap = ActivityBitmap()
+    bitmap.set(ORIGIN, True)
+    bitmap.set(ORIGIN - timedelta(days=3), True)
+
+    assert bitmap.origin <= ORIGIN - timedelta(days=3)
+    assert bitmap.get(ORIGIN) and bitmap.get(ORIGIN - timedelta(days=3))
+    assert not bitmap.get(ORIGIN - timedelta(days=1))
+    assert bitmap.last_active() == ORIGIN
+
+
+def test_incremental_updates_match_brute_force():
+    rng = random.Random(7)
+    state = state_from_bitmap(ActivityBitmap(), 0, 0)
+    active = set()
+
+    for _ in range(500):
+        days = {ORIGIN + timedelta(days=rng.randrange(120)) for _ in range(rng.choice([1, 1, 1, 3]))}
+        now_active = {day for day in days if rng.random() < 0.7}
+        active = (active - days) | now_active
+
+        updated = updated_streak_state(state, sorted(map(day_key, days)), set(map(day_key, now_active)))
+        state = updated or state
+
+        current, longest = brute_force_runs(active)
+        assert state["runLength"] == current
+        assert state["longestStreak"] == longest
+        assert state["lastActiveDay"] == (day_key(max(active)) if active else None)
+
+
+def test_unchanged_days_need_no_write():
+    state = state_from_bitmap(ActivityBitmap(), 0, 0)
+    state = updated_streak_state(state, ["2024-01-01"], {"2024-01-01"})
+    assert updated_streak_state(state, ["2024-01-01"], {"2024-01-01"}) is None
+
+
+def test_current_streak_only_counts_through_yesterday():
+    state = {"lastActiveDay": "2024-01-10", "runLength": 4, "longestStreak": 6}
+
+    assert streaks_response(state, today=date(2024, 1, 11))["currentStreak"] == 4
+    assert streaks_response(state, today=date(2024, 1, 12))["currentStreak"] == 0
+    assert streaks_response(state, today=date(2024, 1, 12))["longestStreak"] == 6
+
+
+async def add_rollup(db, day):
+    await db[ROLLUPS_COLLECTION].insert_one(
+        {"day": day, "referenceType": "subject", "referenceId": "a", "duration": 30, "sessionCount": 1}
+    )
+
+
+async def test_concurrent_updates_retry_instead_of_losing_days(db, monkeypatch):
+    await add_rollup(db, "2024-01-01")
+    await rebuild_streaks(db)
+
+    read_state = streaks.get_streak_state
+    interfered = False
+
+    async def stale_read(database):
+        # The first read is overtaken by another writer before this one saves its update
+        nonlocal interfered
+        state = await read_state(database)
+        if not interfered:
+            interfered = True
+            await add_rollup(db, "2024-01-02")
+            await apply_activity_changes(db, ["2024-01-02"])
+        return state
+
+    monkeypatch.setattr(streaks, "get_streak_state", stale_read)
+    await add_rollup(db, "2024-01-03")
+    await apply_activity_changes(db, ["2024-01-03"])
+
+    state = await get_streak_state(db)
+    assert state["lastActiveDay"] == "2024-01-03"
+    assert state["runLength"] == 3
+    assert state["version"] == 3
+
+
+async def test_missing_state_is_rebuilt_from_rollups(db):
+    for day in ("2024-01-01", "2024-01-02", "2024-01-05"):
+        await add_rollup(db, day)
+
+    await apply_activity_changes(db, ["2024-01-05"])
+
+    state = await db[STATE_COLLECTION].find_one({})
+    assert (state["runLength"], state["longestStreak"]) == (1, 2)
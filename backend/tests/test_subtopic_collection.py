@@ -0,0 +1,116 @@
+import pytest
+
+from app.core.config import settings
+from app.core.database import create_subtopic_indexes
+from migrations import subtopics_to_collection
+from tests.helpers import check_progress, subtopic, syllabus
+
+
+@pytest.fixture
+def collection_mode(db, monkeypatch):
+    monkeypatch.setattr(settings, "SUBTOPIC_STORAGE", "collection")
+    return db
+
+
+async def create_subject(client, subtopics):
+    response = await client.post("/api/subjects/", json={"name": "Maths", "subtopics": subtopics})
+    assert response.status_code == 201, response.text
+    return response.json()
+
+
+async def test_subtopic_writes_keep_counters_and_completions(client, collection_mode):
+    db = collection_mode
+    await create_subtopic_indexes(db)
+    subject = await create_subject(client, syllabus())
+    check_progress(subject)
+    stored = await db.subjects.find_one({})
+    assert stored["subtopics"] == []
+    assert await db.subtopics.count_documents({"subjectId": stored["_id"]}) == 6
+
+    url = f"/api/subjects/{subject['id']}/subtopics"
+    # Nested subtopics can be toggled, replaced and deleted directly
+    subject = (await client.put(f"{url}/lagrange/toggle")).json()
+    check_progress(subject)
+    assert subject["completionPercentage"] == 100.0
+
+    subject = (await client.post(url, json=subtopic("physics", subtopic("optics", completed=True), subtopic("waves")))).json()
+    check_progress(subject)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (5, 9)
+
+    subject = (await client.delete(f"{url}/groups")).json()
+    check_progress(subject)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (3, 6)
+
+    subject = (await client.put(f"{url}/rings", json=subtopic("rings", subtopic("ideals"), subtopic("fields", completed=True)))).json()
+    check_progress(subject)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (3, 8)
+
+    # The stored counters match the tree the responses were built from
+    stored = await db.subjects.find_one({})
+    assert (stored["completedSubtopicsCount"], stored["totalSubtopicsCount"]) == (3, 8)
+    assert stored["completionPercentage"] == subject["completionPercentage"]
+
+    assert (await client.put(f"{url}/groups/toggle")).status_code == 404
+    assert (await client.get(f"/api/subjects/{subject['id']}")).json()["subtopics"] == subject["subtopics"]
+
+
+async def test_invalid_subtopics_are_rejected(client, collection_mode):
+    await create_subtopic_indexes(collection_mode)
+    subject = await create_subject(client, syllabus())
+    url = f"/api/subjects/{subject['id']}"
+
+    assert (await client.post(f"{url}/subtopics", json=subtopic("cosets"))).status_code == 409
+    assert (await client.patch(url, json={"subtopics": [subtopic("a/b")]})).status_code == 400
+    assert (await client.patch(url, json={"subtopics": [subtopic("a"), subtopic("a")]})).status_code == 400
+
+    response = await client.patch(url, json={"subtopics": [{"id": "a", "status": "active"}]})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"][:3] == ["body", "subtopics", 0]
+
+    # Nothing was written by the rejected requests
+    check_progress((await client.get(url)).json())
+    assert (await client.get(url)).json()["totalSubtopicsCount"] == 6
+
+
+async def test_progress_analytics_total_the_stored_counters(client, collection_mode):
+    await create_subtopic_indexes(collection_mode)
+    await create_subject(client, syllabus())
+    await create_subject(client, [subtopic("a", completed=True), subtopic("b")])
+
+    progress = (await client.get("/api/analytics/progress")).json()
+    assert (progress["completedSubtopics"], progress["totalSubtopics"]) == (4, 8)
+
+
+@pytest.fixture
+def migration_db(mongo_client, db, monkeypatch):
+    """Point the migration's client at the test database."""
+    monkeypatch.setattr(subtopics_to_collection, "AsyncIOMotorClient", lambda url: mongo_client)
+    monkeypatch.setattr(subtopics_to_collection.settings, "DATABASE_NAME", db.name)
+    return db
+
+
+async def test_migration_round_trip(migration_db):
+    db = migration_db
+    await db.subjects.insert_many([
+        {"name": "Maths", "subtopics": syllabus()},
+        {"name": "Broken", "subtopics": [subtopic("x"), subtopic("x")]},
+    ])
+
+    await subtopics_to_collection.migrate(reverse=False, batch_size=10)
+
+    maths = await db.subjects.find_one({"name": "Maths"})
+    assert maths["subtopics"] == []
+    assert (maths["completedSubtopicsCount"], maths["totalSubtopicsCount"], maths["completionPercentage"]) == (3, 6, 87.5)
+    assert await db.subtopics.count_documents({"subjectId": maths["_id"]}) == 6
+    # Subjects with duplicate IDs stay embedded, and the run is not marked complete
+    assert len((await db.subjects.find_one({"name": "Broken"}))["subtopics"]) == 2
+    assert await db.migrations.find_one({"_id": subtopics_to_collection.CHECKPOINT_ID}) is None
+
+    await subtopics_to_collection.migrate(reverse=True, batch_size=10)
+
+    maths = await db.subjects.find_one({"name": "Maths"})
+    check_progress({**maths, "id": str(maths["_id"])})
+    assert [root["id"] for root in maths["subtopics"]] == ["algebra", "geometry"]
+    assert [child["id"] for child in maths["subtopics"][0]["subtopics"][0]["subtopics"]] == ["cosets", "lagrange"]
+    assert await db.subtopics.count_documents({}) == 0
+    assert (await db.migrations.find_one({"_id": subtopics_to_collection.CHECKPOINT_ID}))["storage"] == "embedded"
@@ -0,0 +1,52 @@
+import pytest
+
+from app.core.config import settings
+from app.core.database import create_subtopic_indexes
+from tests.helpers import syllabus
+
+
+def outline(nodes):
+    """(id, childCount, cachedCompletion, children) of each returned node."""
+    return [(node["id"], node["childCount"], node["cachedCompletion"], outline(node["subtopics"])) for node in nodes]
+
+
+@pytest.fixture(params=["embedded", "collection"])
+async def subject_url(request, client, db, monkeypatch):
+    monkeypatch.setattr(settings, "SUBTOPIC_STORAGE", request.param)
+    if request.param == "collection":
+        await create_subtopic_indexes(db)
+    subject = (await client.post("/api/subjects/", json={"name": "Maths", "subtopics": syllabus()})).json()
+    return f"/api/subjects/{subject['id']}/subtopics"
+
+
+async def test_top_level_only_by_default(client, subject_url):
+    response = await client.get(subject_url)
+    assert response.status_code == 200
+    assert outline(response.json()) == [("algebra", 2, 75.0, []), ("geometry", 0, 100.0, [])]
+
+
+async def test_expanding_a_node_and_deeper_levels(client, subject_url):
+    nodes = (await client.get(subject_url, params={"parent": "algebra"})).json()
+    assert outline(nodes) == [("groups", 2, 50.0, []), ("rings", 0, 100.0, [])]
+    assert nodes[0]["name"] == "Groups" and nodes[0]["status"] == "active"
+
+    nodes = (await client.get(subject_url, params={"parent": "algebra", "depth": 2})).json()
+    assert outline(nodes) == [
+        ("groups", 2, 50.0, [("cosets", 0, 100.0, []), ("lagrange", 0, 0.0, [])]),
+        ("rings", 0, 100.0, []),
+    ]
+
+    assert (await client.get(subject_url, params={"parent": "cosets"})).json() == []
+
+
+async def test_completions_follow_toggles(client, subject_url):
+    await client.put(f"{subject_url}/lagrange/toggle")
+    nodes = (await client.get(subject_url, params={"depth": 2})).json()
+    assert outline(nodes)[0][:3] == ("algebra", 2, 100.0)
+    assert outline(nodes)[0][3][0][:3] == ("groups", 2, 100.0)
+
+
+async def test_unknown_parent_or_subject_is_404(client, subject_url):
+    assert (await client.get(subject_url, params={"parent": "nope"})).status_code == 404
+    assert (await client.get("/api/subjects/000000000000000000000000/subtopics")).status_code == 404
+    assert (await client.get(subject_url, params={"depth": 0})).status_code == 422
@@ -0,0 +1,112 @@
+from bson import ObjectId
+
+from tests.helpers import check_progress, subtopic, syllabus
+
+
+async def create_subject(client, subtopics=None):
+    response = await client.post("/api/subjects/", json={"name": "Maths", "subtopics": syllabus() if subtopics is None else subtopics})
+    assert response.status_code == 201
+    subject = response.json()
+    check_progress(subject)
+    return subject
+
+
+async def toggle(client, subject_id, subtopic_id):
+    response = await client.put(f"/api/subjects/{subject_id}/subtopics/{subtopic_id}/toggle")
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+async def test_toggle_updates_the_path_and_counters(client):
+    subject = await create_subject(client)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"], subject["completionPercentage"]) == (3, 6, 87.5)
+
+    subject = await toggle(client, subject["id"], "lagrange")
+    check_progress(subject)
+    assert subject["completionPercentage"] == 100.0
+
+    subject = await toggle(client, subject["id"], "rings")
+    check_progress(subject)
+    assert subject["completedSubtopicsCount"] == 3
+
+
+async def test_add_and_delete_keep_counters_in_step(client):
+    subject = await create_subject(client)
+
+    # A parent added together with its children gets its cachedCompletion too
+    response = await client.post(f"/api/subjects/{subject['id']}/subtopics",
+                                 json=subtopic("physics", subtopic("optics", completed=True), subtopic("waves")))
+    subject = response.json()
+    check_progress(subject)
+    assert subject["totalSubtopicsCount"] == 9
+
+    subject = await toggle(client, subject["id"], "waves")
+    check_progress(subject)
+
+    subject = (await client.delete(f"/api/subjects/{subject['id']}/subtopics/algebra")).json()
+    check_progress(subject)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (3, 4)
+
+    replaced = subtopic("geometry", subtopic("euclid"), subtopic("conics"))
+    subject = (await client.put(f"/api/subjects/{subject['id']}/subtopics/geometry", json=replaced)).json()
+    check_progress(subject)
+    assert subject["completionPercentage"] == 50.0
+
+
+async def test_subject_put_and_patch_refresh_counters(client):
+    subject = await create_subject(client)
+
+    body = {"name": "Maths", "subtopics": [subtopic("a", completed=True), subtopic("b")]}
+    subject = (await client.put(f"/api/subjects/{subject['id']}", json=body)).json()
+    check_progress(subject)
+
+    subject = (await client.patch(f"/api/subjects/{subject['id']}", json={"subtopics": syllabus()})).json()
+    check_progress(subject)
+    subject = await toggle(client, subject["id"], "cosets")
+    check_progress(subject)
+
+
+async def test_missing_or_inconsistent_counters_are_recomputed(client, db):
+    subject = await create_subject(client)
+    oid = ObjectId(subject["id"])
+
+    await db.subjects.update_one({"_id": oid}, {"$unset": {"completedSubtopicsCount": "", "totalSubtopicsCount": ""}})
+    check_progress(await toggle(client, subject["id"], "lagrange"))
+
+    await db.subjects.update_one({"_id": oid}, {"$set": {"completedSubtopicsCount": 9}})
+    check_progress(await toggle(client, subject["id"], "lagrange"))
+
+
+async def test_unknown_subtopic_is_404(client):
+    subject = await create_subject(client)
+    assert (await client.put(f"/api/subjects/{subject['id']}/subtopics/nope/toggle")).status_code == 404
+    assert (await client.delete(f"/api/subjects/{subject['id']}/subtopics/nope")).status_code == 404
+
+
+async def test_top_level_writes_leave_other_subtrees_alone(client, db):
+    subject = await create_subject(client)
+    oid = ObjectId(subject["id"])
+    # A stale cachedCompletion below algebra, which recomputing the whole tree would correct
+    await db.subjects.update_one({"_id": oid}, {"$set": {"subtopics.0.subtopics.0.cachedCompletion": 10.0}})
+
+    url = f"/api/subjects/{subject['id']}/subtopics"
+    subject = (await client.post(url, json=subtopic("physics", subtopic("optics", completed=True)))).json()
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (4, 8)
+    subject = (await client.put(f"{url}/geometry", json=subtopic("geometry", subtopic("euclid")))).json()
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (3, 9)
+    subject = (await client.delete(f"{url}/physics")).json()
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (2, 7)
+    assert subject["completionPercentage"] == 37.5
+
+    stored = await db.subjects.find_one({"_id": oid})
+    assert stored["subtopics"][0]["subtopics"][0]["cachedCompletion"] == 10.0
+
+
+async def test_top_level_writes_without_counters_recount_the_tree(client, db):
+    subject = await create_subject(client)
+    oid = ObjectId(subject["id"])
+    await db.subjects.update_one({"_id": oid}, {"$unset": {"completedSubtopicsCount": "", "totalSubtopicsCount": ""}})
+
+    subject = (await client.post(f"/api/subjects/{subject['id']}/subtopics", json=subtopic("physics"))).json()
+    check_progress(subject)
+    assert (subject["completedSubtopicsCount"], subject["totalSubtopicsCount"]) == (3, 7)
@@ -0,0 +1,72 @@
+import random
+import sys
+
+import pytest
+
+from app.services.subtopic_tree import find_subtopic_path, subtopic_tree_stats
+from benchmarks.subtopic_tree import deep_tree, recursive_stats, wide_tree
+from tests.helpers import subtopic, syllabus
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_single_pass_matches_recursive_passes(seed):
+    rng = random.Random(seed)
+    # wide_tree stores siblings out of `order` order, so this also checks completions
+    # are averaged in stored order, as the recursive definition rounds them
+    for subtopics in (wide_tree(rng, depth=4, branching=rng.randint(1, 5)), deep_tree(rng, depth=30, siblings=3)):
+        assert subtopic_tree_stats(subtopics) == recursive_stats(subtopics)
+
+
+def parent(subtopic_id, done, of, order):
+    """A parent of `of` leaves, `done` of them completed."""
+    leaves = [subtopic(f"{subtopic_id}-{i}", completed=i < done) for i in range(of)]
+    return subtopic(subtopic_id, *leaves, order=order)
+
+
+def test_completions_are_averaged_in_stored_order():
+    # Stored: 33.33, 33.33, 66.67, 83.33 -> 54.16. Summed in `order` order
+    # (33.33, 33.33, 83.33, 66.67) the float total rounds to 54.17 instead.
+    subtopics = [subtopic("root", parent("a", 1, 3, 0), parent("b", 1, 3, 1), parent("c", 2, 3, 3), parent("d", 5, 6, 2))]
+    assert subtopic_tree_stats(subtopics) == recursive_stats(subtopics)
+    assert subtopic_tree_stats(subtopics)["completionPercentage"] == 54.16
+
+
+def test_empty_tree():
+    stats = subtopic_tree_stats([])
+    assert stats["completionPercentage"] == 0.0
+    assert (stats["totalSubtopicsCount"], stats["levelStats"], stats["nextRecommendedSubtopic"]) == (0, [], None)
+
+
+def test_trees_deeper_than_the_recursion_limit():
+    rng = random.Random(7)
+    subtopics = deep_tree(rng, depth=sys.getrecursionlimit() + 500, siblings=1)
+    stats = subtopic_tree_stats(subtopics)
+    assert len(stats["levelStats"]) == sys.getrecursionlimit() + 500
+
+    node = subtopics[0]
+    while node["subtopics"]:
+        node = node["subtopics"][0]
+    path = find_subtopic_path(subtopics, node["id"])
+    assert len(path) == sys.getrecursionlimit() + 500
+    assert path[0] is subtopics[0] and path[-1] is node
+
+
+def test_find_subtopic_path():
+    subtopics = syllabus()
+    assert [node["id"] for node in find_subtopic_path(subtopics, "lagrange")] == ["algebra", "groups", "lagrange"]
+    assert [node["id"] for node in find_subtopic_path(subtopics, "geometry")] == ["geometry"]
+    assert find_subtopic_path(subtopics, "missing") is None
+
+
+async def test_progress_endpoint(client):
+    subject = (await client.post("/api/subjects/", json={"name": "Maths", "subtopics": syllabus()})).json()
+
+    response = await client.get(f"/api/subjects/{subject['id']}/progress")
+    assert response.status_code == 200
+    progress = response.json()
+    assert progress["overallProgress"] == 87.5
+    assert (progress["completedCount"], progress["totalCount"], progress["remainingCount"]) == (3, 6, 3)
+    assert [level["total"] for level in progress["levelStats"]] == [2, 2, 2]
+    assert progress["nextRecommendedSubtopic"] == {"id": "lagrange", "name": "Lagrange", "level": 2}
+
+    assert (await client.get("/api/subjects/000000000000000000000000/progress")).status_code == 404
@@ -0,0 +1,58 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+from pydantic import ValidationError
+
+from app.core.config import settings
+from app.models.project import Project
+from app.services.serialization import DocumentSerializer
+from tests.helpers import session_payload
+
+
+async def seed(client):
+    subject = {"name": "Algebra", "subtopics": [
+        {"name": "Groups", "status": "completed", "subtopics": [{"name": "Cosets"}, {"name": "Lagrange"}]},
+        {"name": "Rings"},
+    ]}
+    subject_id = (await client.post("/api/subjects/", json=subject)).json()["id"]
+    project_id = (await client.post("/api/projects/", json={"name": "Tracker"})).json()["id"]
+    await client.post("/api/sessions/", json=session_payload(datetime(2024, 5, 1, 9), 30, subject_id))
+    return [
+        f"/api/subjects/{subject_id}", "/api/subjects/?include=all",
+        f"/api/projects/{project_id}", "/api/projects/?include=all",
+        "/api/sessions/",
+    ]
+
+
+async def test_trusted_reads_match_validated_responses(client, monkeypatch):
+    urls = await seed(client)
+
+    trusted = {url: (await client.get(url)).json() for url in urls}
+    monkeypatch.setattr(settings, "FAST_SERIALIZATION", False)
+    validated = {url: (await client.get(url)).json() for url in urls}
+
+    assert trusted == validated
+
+
+def test_missing_fields_get_model_defaults():
+    serializer = DocumentSerializer(Project, lambda doc: doc)
+    oid = ObjectId()
+
+    prepared = serializer.prepare({"_id": oid, "name": "Tracker", "legacyField": 1})
+
+    assert prepared["id"] == str(oid)
+    assert prepared["status"] == "active"
+    assert prepared["projectType"] == ["personal"]
+    assert "legacyField" not in prepared
+    assert list(prepared)[0] == "id"
+
+
+def test_validate_reads_rejects_drifted_documents(monkeypatch):
+    serializer = DocumentSerializer(Project, lambda doc: doc)
+    drifted = {"_id": ObjectId(), "name": "Tracker", "status": "not-a-status"}
+
+    assert serializer.prepare(drifted)["status"] == "not-a-status"
+    monkeypatch.setattr(settings, "VALIDATE_READS", True)
+    with pytest.raises(ValidationError):
+        serializer.prepare(drifted)
@@ -7,6 +7,7 @@ import useUIStore from './stores/uiStore';
 import useTimerStore from './stores/timerStore';
 import useKeyboardShortcuts from './hooks/useKeyboardShortcuts';
 import useThemeColors from './hooks/useThemeColors';
+import useServerEvents from './hooks/useServerEvents';
 import BoardContainer from './components/layout/BoardContainer';
 import TopBar from './components/layout/TopBar';
 import VisionBoard from './boards/VisionBoard';
@@ -27,6 +28,9 @@ function App() {
   // Initialize theme colors from config
   useThemeColors();
 
+  // Refresh data when the server reports changes (replaces polling)
+  useServerEvents();
+
   // Load boards and active session on mount
   useEffect(() => {
     const loadBoards = async () => {
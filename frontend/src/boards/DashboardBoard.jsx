@@ -1,5 +1,4 @@
-import { useSessionStats } from '../hooks/useSessions';
-import { useProgress, useStreaks } from '../hooks/useAnalytics';
+import { useAnalyticsSnapshot } from '../hooks/useAnalytics';
 import { useCourses } from '../hooks/useCourses';
 import { useProjects } from '../hooks/useProjects';
 import Card from '../components/ui/Card';
@@ -11,9 +10,11 @@ import { formatDuration } from '../utils/date';
 import { COURSE_STATUS, PROJECT_STATUS } from '../utils/constants';
 
 const DashboardBoard = () => {
-  const { data: stats, isLoading: statsLoading } = useSessionStats();
-  const { data: progress, isLoading: progressLoading } = useProgress();
-  const { data: streaks, isLoading: streaksLoading } = useStreaks();
+  // Stats, progress and streaks arrive together from the analytics snapshot
+  const { data: snapshot, isLoading: snapshotLoading } = useAnalyticsSnapshot();
+  const stats = snapshot?.sessionStats;
+  const progress = snapshot?.progress;
+  const streaks = snapshot?.streaks;
   const { data: courses, isLoading: coursesLoading } = useCourses(COURSE_STATUS.IN_PROGRESS);
   const { data: projects, isLoading: projectsLoading } = useProjects(PROJECT_STATUS.ACTIVE);
 
@@ -27,7 +28,7 @@ const DashboardBoard = () => {
     { i: 'projects-list', x: 6, y: 2, w: 6, h: 4, minW: 4, minH: 3, cardType: 'list' },
   ];
 
-  if (statsLoading || progressLoading || streaksLoading) {
+  if (snapshotLoading) {
     return (
       <div className="flex items-center justify-center h-full">
         <div className="text-gray-500">Loading dashboard...</div>
@@ -1,4 +1,4 @@
-import { useQuery } from '@tanstack/react-query';
+import { useInfiniteQuery, useQuery, useQueryClient } from '@tanstack/react-query';
 import { analyticsApi } from '../lib/api';
 import { queryKeys } from '../lib/queryClient';
 
@@ -52,3 +52,51 @@ export const useDailyActivity = (days = 30) => {
     },
   });
 };
+
+/**
+ * Daily activity for an arbitrary date range (ISO dates), fetched one page of
+ * calendar days at a time. Call fetchNextPage() while hasNextPage is true.
+ */
+export const useHeatmap = ({ start, end, breakdown = false } = {}) => {
+  return useInfiniteQuery({
+    queryKey: queryKeys.analytics.heatmap({ start, end, breakdown }),
+    queryFn: async ({ pageParam }) => {
+      const response = await analyticsApi.getHeatmap({ start, end, breakdown, cursor: pageParam });
+      return response.data;
+    },
+    initialPageParam: undefined,
+    getNextPageParam: (lastPage) => lastPage.nextCursor ?? undefined,
+    select: (data) => data.pages.flatMap((page) => page.activity),
+  });
+};
+
+/**
+ * Fetch every dashboard widget in one request and seed the per-widget queries,
+ * so useTimeSummary/useDistribution/useStreaks/useProgress/useDailyActivity/
+ * useSessionStats read from the snapshot instead of issuing their own requests.
+ */
+export const useAnalyticsSnapshot = ({ distributionDays = 30, activityDays = 30 } = {}) => {
+  const queryClient = useQueryClient();
+
+  return useQuery({
+    queryKey: queryKeys.analytics.snapshot({ distributionDays, activityDays }),
+    queryFn: async () => {
+      const response = await analyticsApi.getSnapshot({ distributionDays, activityDays });
+      const snapshot = response.data;
+
+      Object.entries(snapshot.timeSummary).forEach(([period, summary]) => {
+        queryClient.setQueryData(queryKeys.analytics.timeSummary(period), summary);
+      });
+      queryClient.setQueryData(queryKeys.analytics.distribution(distributionDays), snapshot.distribution);
+      queryClient.setQueryData(queryKeys.analytics.streaks, snapshot.streaks);
+      queryClient.setQueryData(queryKeys.analytics.progress, snapshot.progress);
+      queryClient.setQueryData(
+        queryKeys.analytics.dailyActivity(activityDays),
+        snapshot.dailyActivity.activity || []
+      );
+      queryClient.setQueryData(queryKeys.sessions.stats, snapshot.sessionStats);
+
+      return snapshot;
+    },
+  });
+};
@@ -3,11 +3,14 @@ import { projectsApi } from '../lib/api';
 import { queryKeys } from '../lib/queryClient';
 import toast from 'react-hot-toast';
 
-export const useProjects = (status) => {
+// Summaries by default; pass include (e.g. 'all') when the page reads notes, readme or GitHub data
+export const useProjects = (status, { include } = {}) => {
   return useQuery({
-    queryKey: status ? queryKeys.projects.byStatus(status) : queryKeys.projects.all,
+    queryKey: include
+      ? queryKeys.projects.list(status, include)
+      : status ? queryKeys.projects.byStatus(status) : queryKeys.projects.all,
     queryFn: async () => {
-      const response = await projectsApi.getAll(status);
+      const response = await projectsApi.getAll(status, { include });
       return response.data;
     },
   });
@@ -0,0 +1,78 @@
+import { useEffect } from 'react';
+import { API_BASE_URL, boardsApi } from '../lib/api';
+import { queryClient, queryKeys } from '../lib/queryClient';
+import useTimerStore from '../stores/timerStore';
+import useUIStore from '../stores/uiStore';
+
+// Queries refreshed when a collection changes on the server
+const INVALIDATED_BY = {
+  sessions: [queryKeys.sessions.all, ['analytics']],
+  subjects: [['subjects'], queryKeys.analytics.progress, ['analytics', 'snapshot']],
+  projects: [queryKeys.projects.all, queryKeys.analytics.progress, ['analytics', 'snapshot']],
+};
+
+const reloadBoards = async () => {
+  try {
+    const response = await boardsApi.getAll();
+    useUIStore.getState().setBoards(response.data);
+  } catch (error) {
+    console.error('Failed to reload boards:', error);
+  }
+};
+
+const handleChange = (event) => {
+  if (event.collection === 'boards') {
+    reloadBoards();
+    return;
+  }
+  (INVALIDATED_BY[event.collection] || []).forEach((queryKey) => {
+    queryClient.invalidateQueries({ queryKey });
+  });
+};
+
+const handleActiveSession = (event) => {
+  const session = event.action === 'started' ? event.session : null;
+  queryClient.setQueryData(queryKeys.sessions.active, session);
+  useTimerStore.getState().syncActiveSession(session);
+};
+
+/**
+ * Subscribe to the server's event stream (GET /api/events).
+ * Replaces polling: cached queries are refreshed only when the data behind them
+ * changes, so an idle dashboard makes no requests.
+ */
+export const useServerEvents = () => {
+  useEffect(() => {
+    if (typeof EventSource === 'undefined') return undefined;
+
+    const source = new EventSource(`${API_BASE_URL}/api/events/`);
+    let connectedBefore = false;
+
+    const parse = (handler) => (message) => {
+      try {
+        handler(JSON.parse(message.data));
+      } catch (error) {
+        console.error('Invalid server event:', error);
+      }
+    };
+
+    // After a reconnect or when the server dropped events for us, anything may have changed
+    const resync = () => {
+      queryClient.invalidateQueries();
+      useTimerStore.getState().loadActiveSession();
+      reloadBoards();
+    };
+
+    source.addEventListener('ready', () => {
+      if (connectedBefore) resync();
+      connectedBefore = true;
+    });
+    source.addEventListener('change', parse(handleChange));
+    source.addEventListener('active-session', parse(handleActiveSession));
+    source.addEventListener('resync', resync);
+
+    return () => source.close();
+  }, []);
+};
+
+export default useServerEvents;
@@ -39,7 +39,6 @@ export const useActiveSession = () => {
       const response = await sessionsApi.getActive();
       return response.data;
     },
-    refetchInterval: 5000, // Refetch every 5 seconds
   });
 };
 
@@ -50,7 +49,6 @@ export const useSessionStats = () => {
       const response = await sessionsApi.getStats();
       return response.data;
     },
-    refetchInterval: 30000, // Refetch every 30 seconds
   });
 };
 
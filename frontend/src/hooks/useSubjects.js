@@ -7,14 +7,18 @@ const queryKeys = {
     all: ['subjects'],
     byId: (id) => ['subjects', id],
     byStatus: (status) => ['subjects', { status }],
+    list: (status, include) => ['subjects', { status, include }],
   },
 };
 
-export const useSubjects = (status) => {
+// Summaries by default; pass include (e.g. 'all') when the page reads subtopics or notes
+export const useSubjects = (status, { include } = {}) => {
   return useQuery({
-    queryKey: status ? queryKeys.subjects.byStatus(status) : queryKeys.subjects.all,
+    queryKey: include
+      ? queryKeys.subjects.list(status, include)
+      : status ? queryKeys.subjects.byStatus(status) : queryKeys.subjects.all,
     queryFn: async () => {
-      const response = await subjectsApi.getAll(status);
+      const response = await subjectsApi.getAll(status, { include });
       return response.data;
     },
   });
@@ -1,7 +1,7 @@
 import axios from 'axios';
 
 // API base URL - use environment variable or default to localhost
-const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
+export const API_BASE_URL = import.meta.env.VITE_API_BASE_URL || 'http://localhost:8000';
 
 // Create axios instance with default config
 const apiClient = axios.create({
@@ -66,8 +66,9 @@ export const coursesApi = {
 // SUBJECTS API
 // ============================================
 export const subjectsApi = {
-  getAll: (status) =>
-    apiClient.get('/subjects', { params: status ? { status } : {} }),
+  // Lists return summaries unless sections are requested with include (e.g. 'subtopics,notes' or 'all')
+  getAll: (status, { fields, include, limit, cursor } = {}) =>
+    apiClient.get('/subjects', { params: { ...(status ? { status } : {}), include, fields, limit, cursor } }),
 
   getById: (id) =>
     apiClient.get(`/subjects/${id}`),
@@ -84,6 +85,9 @@ export const subjectsApi = {
   delete: (id) =>
     apiClient.delete(`/subjects/${id}`),
 
+  getSubtopics: (subjectId, { parent, depth } = {}) =>
+    apiClient.get(`/subjects/${subjectId}/subtopics`, { params: { parent, depth } }),
+
   addSubtopic: (subjectId, data) =>
     apiClient.post(`/subjects/${subjectId}/subtopics`, data),
 
@@ -104,8 +108,8 @@ export const subjectsApi = {
 // PRACTICES API
 // ============================================
 export const practicesApi = {
-  getAll: () =>
-    apiClient.get('/practices'),
+  getAll: ({ fields, include, limit, cursor } = {}) =>
+    apiClient.get('/practices', { params: { include, fields, limit, cursor } }),
 
   getById: (id) =>
     apiClient.get(`/practices/${id}`),
@@ -153,8 +157,8 @@ export const practiceSessionsApi = {
 // PROJECTS API
 // ============================================
 export const projectsApi = {
-  getAll: (status) =>
-    apiClient.get('/projects', { params: status ? { status } : {} }),
+  getAll: (status, { fields, include, limit, cursor } = {}) =>
+    apiClient.get('/projects', { params: { ...(status ? { status } : {}), include, fields, limit, cursor } }),
 
   getById: (id) =>
     apiClient.get(`/projects/${id}`),
@@ -199,6 +203,25 @@ export const sessionsApi = {
 
   getStats: () =>
     apiClient.get('/sessions/stats/summary'),
+
+  // Keyset pagination: pass the previous page's cursor; nextCursor is null on the last page
+  getPage: async ({ cursor, ...params } = {}) => {
+    const response = await apiClient.get('/sessions', { params: { ...params, cursor } });
+    return { sessions: response.data, nextCursor: response.headers['x-next-cursor'] ?? null };
+  },
+
+  // file: CSV, JSON lines or .ics; defaults fill referenceType/referenceId/name for rows that omit them
+  importFile: (file, defaults = {}) => {
+    const formData = new FormData();
+    formData.append('file', file);
+    return apiClient.post('/sessions/bulk', formData, {
+      params: defaults,
+      headers: { 'Content-Type': 'multipart/form-data' },
+    });
+  },
+
+  export: (format = 'ndjson', params = {}) =>
+    apiClient.get('/sessions/export', { params: { ...params, format }, responseType: 'blob' }),
 };
 
 // ============================================
@@ -253,6 +276,17 @@ export const analyticsApi = {
 
   getDailyActivity: (days = 30) =>
     apiClient.get('/analytics/daily-activity', { params: { days } }),
+
+  getHeatmap: ({ start, end, breakdown = false, cursor, limit } = {}) =>
+    apiClient.get('/analytics/heatmap', { params: { start, end, breakdown, cursor, limit } }),
+
+  getBreakdown: ({ period = 'month', start, end } = {}) =>
+    apiClient.get('/analytics/breakdown', { params: { period, start, end } }),
+
+  getSnapshot: ({ distributionDays = 30, activityDays = 30 } = {}) =>
+    apiClient.get('/analytics/snapshot', {
+      params: { distribution_days: distributionDays, activity_days: activityDays },
+    }),
 };
 
 // ============================================
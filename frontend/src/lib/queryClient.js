@@ -26,6 +26,7 @@ export const queryKeys = {
     all: ['projects'],
     byId: (id) => ['projects', id],
     byStatus: (status) => ['projects', { status }],
+    list: (status, include) => ['projects', { status, include }],
   },
   sessions: {
     all: ['sessions'],
@@ -44,6 +45,9 @@ export const queryKeys = {
     streaks: ['analytics', 'streaks'],
     progress: ['analytics', 'progress'],
     dailyActivity: (days) => ['analytics', 'daily-activity', days],
+    heatmap: (params) => ['analytics', 'heatmap', params],
+    breakdown: (params) => ['analytics', 'breakdown', params],
+    snapshot: (params) => ['analytics', 'snapshot', params],
   },
   uiCustomization: {
     all: ['ui-customization'],
@@ -14,7 +14,7 @@ import CardEditModal from '../components/projects/CardEditModal';
 import GitHubSection from '../components/projects/GitHubSection';
 
 const ProjectPage = ({ projectId }) => {
-  const { data: projects } = useProjects();
+  const { data: projects } = useProjects(undefined, { include: 'all' });
   const { data: sessions } = useSessions({ type: 'project', referenceId: projectId });
   const { closeProjectPage, openProjectModal, openSettings, isEditMode, toggleEditMode } = useUIStore();
   const { theme, toggleTheme } = useSettingsStore();
@@ -15,7 +15,7 @@ import SubtopicModal from '../components/subjects/SubtopicModal';
 import PracticeSessionModal from '../components/subjects/PracticeSessionModal';
 
 const SubjectPage = ({ subjectId }) => {
-  const { data: subjects } = useSubjects();
+  const { data: subjects } = useSubjects(undefined, { include: 'all' });
   const { data: sessions } = useSessions({ type: 'subject', referenceId: subjectId });
   const { data: progressData } = useSubjectProgress(subjectId);
   const { data: practiceSessions = [] } = usePracticeSessions(subjectId);
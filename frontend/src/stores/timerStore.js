@@ -120,33 +120,46 @@ const useTimerStore = create((set, get) => ({
   loadActiveSession: async () => {
     try {
       const response = await sessionsApi.getActive();
-      const session = response.data;
-
-      if (session) {
-        // Calculate elapsed time from start
-        const startTime = new Date(session.startTime);
-        const now = new Date();
-        const elapsed = Math.floor((now - startTime) / 1000);
-
-        // Start the interval
-        const interval = setInterval(() => {
-          set((state) => ({
-            elapsedSeconds: state.elapsedSeconds + 1,
-          }));
-        }, 1000);
-
-        set({
-          activeSession: session,
-          isRunning: true,
-          elapsedSeconds: elapsed,
-          timerInterval: interval,
-        });
-      }
+      get().syncActiveSession(response.data);
     } catch (error) {
       console.error('Failed to load active session:', error);
     }
   },
 
+  // Match the timer to the server's active session (null when none is running)
+  syncActiveSession: (session) => {
+    const { activeSession, timerInterval } = get();
+
+    if (!session) {
+      if (activeSession) get().resetTimer();
+      return;
+    }
+    if (activeSession?.id === session.id) return;
+
+    if (timerInterval) {
+      clearInterval(timerInterval);
+    }
+
+    // Calculate elapsed time from start
+    const startTime = new Date(session.startTime);
+    const now = new Date();
+    const elapsed = Math.max(0, Math.floor((now - startTime) / 1000));
+
+    // Start the interval
+    const interval = setInterval(() => {
+      set((state) => ({
+        elapsedSeconds: state.elapsedSeconds + 1,
+      }));
+    }, 1000);
+
+    set({
+      activeSession: session,
+      isRunning: true,
+      elapsedSeconds: elapsed,
+      timerInterval: interval,
+    });
+  },
+
   resetTimer: () => {
     const { timerInterval } = get();
 